@@ -0,0 +1,226 @@
+"""JSON API（fridge.api）の負荷テスト
+
+Open Food Facts の代わりに、応答を一定時間遅らせるだけの簡単なサーバーを手元で動かし、
+API を uvicorn で起動して、複数のクライアントから同時に呼んだときの1秒あたりの処理数と
+応答時間を測る（データベースなどは一時ディレクトリ）。商品 API への問い合わせ回数の制限は、
+アプリと同じ値（--rate で変更できる）。
+
+- list_items: 食材 200 件の一覧
+- add_item: 食材を1件登録
+- suggest: レシピ提案（同じ組み合わせはキャッシュから返る）
+- barcode_cold: キャッシュに無いバーコード（すべて Open Food Facts の代わりのサーバーに問い合わせる）
+- barcode_warm: 一度引いたバーコード（キャッシュから返る）
+- list_items_during_lookups: キャッシュに無いバーコードの問い合わせが --backlog 件たまっているあいだの食材の一覧
+
+    python benchmarks/bench_api.py --output api.json
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from fridge.barcode import REQUESTS_PER_SECOND  # noqa: E402
+
+# API を起動する（データベース・キャッシュ・商品 API の URL を引数で受け取る）
+SERVER = """
+import sys
+import uvicorn
+from fridge.api import create_app
+from fridge.barcode import BarcodeLookup
+from fridge.recipe_files import RecipeSource
+from fridge.storage import Storage
+db, cache, url, recipe_dir, rate, port = sys.argv[1:]
+lookup = BarcodeLookup(cache_path=cache, requests_per_second=float(rate), product_url=url)
+app = create_app(Storage(db), lookup, RecipeSource(recipe_dir, None))
+uvicorn.run(app, host="127.0.0.1", port=int(port), log_level="warning")
+"""
+
+ITEM_NAMES = ["玉ねぎ", "にんじん", "じゃがいも", "豚こま肉", "キャベツ", "卵", "豆腐", "トマト", "ツナ", "ピーマン"]
+
+
+def stub_server(delay):
+    """Open Food Facts の代わりに、delay 秒待ってから商品データを返すサーバーを起動する"""
+    counter = {"requests": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            counter["requests"] += 1
+            barcode = self.path.rsplit("/", 1)[-1].split(".")[0]
+            time.sleep(delay)
+            body = json.dumps({"status": 1, "product": {"product_name_ja": f"商品{barcode}"}}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counter
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def prepare_database(path):
+    """世帯1つと食材 200 件の入ったデータベースを作る"""
+    from fridge.storage import Storage
+
+    storage = Storage(path)
+    storage.add_user("ベンチ")
+    storage.add_items("ベンチ", [
+        {
+            "name": ITEM_NAMES[i % len(ITEM_NAMES)], "barcode": "未登録", "purchase_date": "2026-01-01",
+            "expiry_date": f"2026-02-{i % 28 + 1:02d}", "category": "その他", "quantity": 1,
+            "registered_at": "2026-01-01 12:00", "registered_by": "ベンチ",
+        }
+        for i in range(200)
+    ])
+    storage.close()
+
+
+def load_test(requests_to_send, concurrency):
+    """(メソッド, URL, JSON) のリストを concurrency 本の接続で送り、結果をまとめる"""
+    local = threading.local()
+
+    def send(request):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        method, url, body = request
+        start = time.perf_counter()
+        response = session.request(method, url, json=body, timeout=30)
+        elapsed = (time.perf_counter() - start) * 1000
+        return elapsed, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send, requests_to_send))
+    total = time.perf_counter() - start
+
+    times = sorted(elapsed for elapsed, _ in results)
+    errors = sum(1 for _, status in results if status >= 400)
+    return {
+        "requests": len(results),
+        "concurrency": concurrency,
+        "requests_per_second": len(results) / total,
+        "ms_p50": times[len(times) // 2],
+        "ms_p95": times[int(len(times) * 0.95) - 1],
+        "errors": errors,
+    }
+
+
+def send_in_background(urls):
+    """urls を1本ずつ別のスレッドで送り、応答を待たずに戻る（サーバーを止めたときのエラーは無視する）"""
+
+    def send(url):
+        try:
+            requests.get(url, timeout=120)
+        except requests.RequestException:
+            pass
+
+    for url in urls:
+        threading.Thread(target=send, args=(url,), daemon=True).start()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="シナリオごとのリクエスト数")
+    parser.add_argument("--concurrency", type=int, default=32, help="同時に送るクライアントの数")
+    parser.add_argument("--stub-delay", type=float, default=50, help="商品 API の代わりのサーバーの応答時間（ミリ秒）")
+    parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND, help="商品 API への1秒あたりの問い合わせ回数の上限")
+    parser.add_argument("--cold", type=int, default=20, help="キャッシュに無いバーコードの問い合わせ数")
+    parser.add_argument("--backlog", type=int, default=60, help="list_items_during_lookups でためておく問い合わせ数")
+    parser.add_argument("--output", help="結果を JSON で書き出すファイル")
+    args = parser.parse_args(argv)
+
+    stub, counter = stub_server(args.stub_delay / 1000)
+    product_url = f"http://127.0.0.1:{stub.server_address[1]}/api/v0/product/{{barcode}}.json"
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as work:
+        db = os.path.join(work, "fridge.db")
+        prepare_database(db)
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-c", SERVER, db, os.path.join(work, "barcode_cache.db"), product_url,
+             os.path.join(work, "recipes"), str(args.rate), str(port)],
+            cwd=ROOT,
+        )
+        try:
+            base = f"http://127.0.0.1:{port}/api"
+            items_url = f"{base}/households/ベンチ/items"
+            for _ in range(100):
+                try:
+                    requests.get(items_url, timeout=1)
+                    break
+                except requests.ConnectionError:
+                    time.sleep(0.1)
+
+            barcodes = [f"49{i:011d}" for i in range(args.cold)]
+            scenarios = {
+                "list_items": [("GET", items_url, None)] * args.requests,
+                "add_item": [
+                    ("POST", items_url, {"name": rng.choice(ITEM_NAMES), "expiry_date": "2026-12-01"})
+                    for _ in range(args.requests)
+                ],
+                "suggest": [
+                    ("POST", f"{base}/recipes/suggest", {"items": rng.sample(ITEM_NAMES, 3)})
+                    for _ in range(args.requests)
+                ],
+                "barcode_cold": [("GET", f"{base}/barcodes/{code}", None) for code in barcodes],
+                "barcode_warm": [
+                    ("GET", f"{base}/barcodes/{barcodes[i % len(barcodes)]}", None) for i in range(args.requests)
+                ],
+            }
+            results = {name: load_test(sent, args.concurrency) for name, sent in scenarios.items()}
+
+            # 回数制限で待っている問い合わせがあっても、ほかの API が待たされないこと
+            send_in_background(f"{base}/barcodes/48{i:011d}" for i in range(args.backlog))
+            time.sleep(0.5)
+            results["list_items_during_lookups"] = load_test(
+                [("GET", items_url, None)] * args.requests, args.concurrency
+            )
+        finally:
+            server.terminate()
+            server.wait()
+            stub.shutdown()
+
+    result = {
+        "benchmark": "api",
+        "stub_delay_ms": args.stub_delay,
+        "upstream_rate": args.rate,
+        "upstream_requests": counter["requests"],
+        "scenarios": results,
+    }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
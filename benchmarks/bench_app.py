@@ -0,0 +1,121 @@
+"""アプリの起動時間と再実行1回あたりの時間のベンチマーク
+
+Streamlit の AppTest でアプリを動かし、次を測る（データベースは一時ファイル）。
+
+- cold_start: 新しいプロセスで、import から最初の実行が終わるまで
+- rerun: 同じプロセスで、2回目以降の実行1回あたり（食材リストを表示した状態）
+- lazy_modules: 最初の実行のあとに PIL と requests が読み込まれているか
+
+    python benchmarks/bench_app.py --output app.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+APP_PATH = os.path.join(ROOT, "streamlit_app.py")
+
+# 新しいプロセスで1回だけ実行して、かかった時間と読み込まれたモジュールを出力する
+COLD_START = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=60)
+at.run()
+done = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_run_ms": (done - imported) * 1000,
+    "modules": {name: name in sys.modules for name in ("PIL", "requests")},
+}))
+"""
+
+
+def prepare_database(path):
+    """利用者1人と食材 200 件の入ったデータベースを作る"""
+    sys.path.insert(0, ROOT)
+    from fridge.storage import Storage
+
+    storage = Storage(path)
+    storage.add_user("ベンチ")
+    storage.add_items("ベンチ", [
+        {
+            "name": f"食材{i}", "barcode": "未登録", "purchase_date": "2026-01-01",
+            "expiry_date": f"2026-02-{i % 28 + 1:02d}", "category": "野菜", "quantity": 1,
+            "registered_at": "2026-01-01 12:00", "registered_by": "ベンチ",
+        }
+        for i in range(200)
+    ])
+    storage.close()
+
+
+def cold_start(env, repeat):
+    results = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", COLD_START, APP_PATH],
+            env=env, cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        result["process_ms"] = (time.perf_counter() - start) * 1000
+        results.append(result)
+    return results
+
+
+def reruns(repeat):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.session_state["current_user"] = "ベンチ"
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        at.run()
+        times.append((time.perf_counter() - start) * 1000)
+    return sorted(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cold", type=int, default=3, help="起動時間を測る回数")
+    parser.add_argument("--reruns", type=int, default=30, help="再実行の時間を測る回数")
+    parser.add_argument("--output", help="結果を JSON で書き出すファイル")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as work:
+        os.environ["FRIDGE_DB_PATH"] = os.path.join(work, "fridge.db")
+        os.environ["FRIDGE_BARCODE_CACHE_PATH"] = os.path.join(work, "barcode_cache.db")
+        os.environ["FRIDGE_TIMING_LOG"] = os.path.join(work, "timings.jsonl")
+        prepare_database(os.environ["FRIDGE_DB_PATH"])
+
+        cold = cold_start(dict(os.environ), args.cold)
+        rerun_times = reruns(args.reruns)
+
+    result = {
+        "benchmark": "app",
+        "cold_start_ms": statistics.median(run["process_ms"] for run in cold),
+        "first_run_ms": statistics.median(run["first_run_ms"] for run in cold),
+        "lazy_modules": cold[0]["modules"],
+        "rerun_ms_p50": rerun_times[len(rerun_times) // 2],
+        "rerun_ms_p95": rerun_times[int(len(rerun_times) * 0.95) - 1],
+        "reruns": len(rerun_times),
+    }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""レシピ提案・食材リストの処理のベンチマーク
+
+合成したレシピカタログと食材リストで、次の処理の時間を大きさを変えながら測る。
+
+- recipe_suggestions: generate_recipe_suggestions（レシピ 30〜10,000 件、食材名の一致結果のキャッシュは毎回空にする）
+- recipe_suggestions_cached: 同じ食材で続けて呼んだとき（食材名の一致結果がキャッシュにある）
+- inventory_frame: 配列から表示用 DataFrame と days_left を作る（食材 10〜100,000 件）
+- expiry_buckets: 期限切れ・今日・3日以内などの件数と位置を求める
+- list_page: 期限順に並べ、絞り込み・ページ分け・警告の文言と色を作って Arrow に変換する
+- delete_items: SQLite から ID で 1% の食材を削除し、読み直す
+
+結果は JSON で書き出し、--compare で前回の結果と比べられる。
+
+    python benchmarks/bench_core.py --output core.json
+    python benchmarks/bench_core.py --quick --compare core.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fridge.inventory import InventoryArrays, day_ordinal, expiry_alerts  # noqa: E402
+from fridge.recipes import RECIPE_DATA, SELECTED_ITEMS, RecipeCatalog, generate_recipe_suggestions  # noqa: E402
+from fridge.storage import Storage  # noqa: E402
+
+ITEM_SIZES = (10, 100, 1_000, 10_000, 100_000)
+RECIPE_SIZES = (30, 100, 1_000, 10_000)
+QUICK_ITEM_SIZES = (10, 1_000, 10_000)
+QUICK_RECIPE_SIZES = (30, 1_000)
+
+CATEGORIES = ("野菜", "果物", "肉類", "魚類", "乳製品", "卵", "調味料", "その他")
+RECIPE_TYPES = ("和食", "洋食", "中華", "簡単レシピ")
+MEMBERS = ("父", "母", "長男", "長女")
+
+# 本物のレシピのキーワードに、合成したキーワードを足した語彙
+BASE_KEYWORDS = sorted({
+    keyword
+    for data in RECIPE_DATA.values()
+    for keyword in data["required"] + data["optional"] + data["keywords"]
+})
+
+
+def make_vocabulary(size):
+    """キーワードの語彙を作る（合成した語は桁をそろえて、互いに部分一致しないようにする）"""
+    return BASE_KEYWORDS + [f"食材{i:05d}" for i in range(max(size - len(BASE_KEYWORDS), 0))]
+
+
+def make_catalog(n_recipes, rng):
+    """n_recipes 件の合成レシピカタログを作る（キーワードの数はレシピ数に比例させる）"""
+    vocabulary = make_vocabulary(max(n_recipes // 5, 200))
+    recipes = {}
+    for i in range(n_recipes):
+        words = rng.sample(vocabulary, 8)
+        recipes[f"レシピ{i:05d}"] = {
+            "required": words[:rng.randint(0, 1)],
+            "optional": words[1:rng.randint(2, 4)],
+            "keywords": words[4:rng.randint(5, 8)],
+            "type": rng.sample(RECIPE_TYPES, rng.randint(1, 2)),
+            "time": "15分",
+            "servings": "2人分",
+            "difficulty": "⭐ 簡単",
+            "ingredients": [SELECTED_ITEMS, "塩こしょう 少々"],
+            "steps": ["切る", "炒める"],
+            "tips": "",
+        }
+    return RecipeCatalog(recipes), vocabulary
+
+
+def make_inventory(n_items, rng, today, vocabulary=BASE_KEYWORDS):
+    """n_items 件の合成食材リスト（InventoryArrays）を作る
+
+    食材名は語彙の語に前後の文字を付けたもの、賞味期限は今日の 10 日前〜30 日後。
+    """
+    base = day_ordinal(today)
+    rows = []
+    for i in range(n_items):
+        purchase = base - rng.randint(0, 10)
+        rows.append((
+            i + 1,
+            rng.choice(("", "国産", "特売")) + rng.choice(vocabulary) + rng.choice(("", "パック", "(大)")),
+            f"49{rng.randrange(10 ** 11):011d}",
+            purchase,
+            base + rng.randint(-10, 30),
+            rng.choice(CATEGORIES),
+            rng.randint(1, 5),
+            "2026-01-01 12:00",
+            rng.choice(MEMBERS),
+        ))
+    return InventoryArrays.from_rows(rows)
+
+
+def measure(fn, repeat, setup=None):
+    """fn を repeat 回実行し、1回あたりの時間（ミリ秒）の一覧を返す（setup は毎回の前に呼び、時間に含めない）"""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def summarize(name, size, times, **extra):
+    times = sorted(times)
+    return {
+        "name": name,
+        "size": size,
+        "repeat": len(times),
+        "ms_min": times[0],
+        "ms_p50": times[len(times) // 2],
+        "ms_mean": statistics.fmean(times),
+        **extra,
+    }
+
+
+def bench_recipes(sizes, repeat, rng):
+    results = []
+    for n_recipes in sizes:
+        start = time.perf_counter()
+        catalog, vocabulary = make_catalog(n_recipes, rng)
+        build_ms = (time.perf_counter() - start) * 1000
+        inventory = make_inventory(10, rng, date.today(), vocabulary)
+        selected = list(inventory.names)
+
+        def suggest():
+            generate_recipe_suggestions(selected, "おまかせ", None, catalog)
+
+        # 食材名ごとの一致結果はカタログにキャッシュされるため、毎回空にして照合の時間も測る
+        times = measure(suggest, repeat, setup=catalog._match_cache.clear)
+        results.append(summarize(
+            "recipe_suggestions", n_recipes, times,
+            selected_items=len(selected), keywords=len(catalog.keyword_index), catalog_build_ms=build_ms,
+        ))
+        suggest()
+        results.append(summarize("recipe_suggestions_cached", n_recipes, measure(suggest, repeat)))
+    return results
+
+
+def list_page(inventory, frame, category, page_size=50):
+    """食材リストのタブと同じ手順で1ページ分の表を作る"""
+    df = frame.iloc[inventory.expiry_order]
+    df = df[df["category"] == category]
+    page_df = df.iloc[:page_size]
+    alerts, colors = expiry_alerts(page_df["days_left"])
+    table = page_df[["name", "category", "quantity", "purchase_date", "expiry_date", "registered_by"]]
+    table.insert(2, "alert", alerts)
+    return pa.Table.from_pandas(table), colors
+
+
+def bench_inventory(sizes, repeat, rng):
+    results = []
+    today = date.today()
+    for n_items in sizes:
+        inventory = make_inventory(n_items, rng, today)
+        frame = inventory.to_frame(today)
+
+        times = measure(lambda: inventory.to_frame(today), repeat)
+        results.append(summarize("inventory_frame", n_items, times, array_bytes=inventory.nbytes))
+
+        def buckets():
+            for start, stop in ((None, 0), (0, 1), (1, 4), (4, None)):
+                inventory.count_expiring(today, start, stop)
+                inventory.expiring(today, start, stop)
+        results.append(summarize("expiry_buckets", n_items, measure(buckets, repeat)))
+
+        results.append(summarize(
+            "list_page", n_items, measure(lambda: list_page(inventory, frame, "野菜"), repeat)
+        ))
+    return results
+
+
+def bench_delete(sizes, repeat, rng):
+    results = []
+    item = {
+        "name": "玉ねぎ", "barcode": "4901234567890", "purchase_date": "2026-01-01",
+        "expiry_date": "2026-01-10", "category": "野菜", "quantity": 1,
+        "registered_at": "2026-01-01 12:00", "registered_by": "父",
+    }
+    with tempfile.TemporaryDirectory() as work:
+        storage = Storage(os.path.join(work, "bench.db"))
+        try:
+            for n_items in sizes:
+                household = f"世帯{n_items}"
+                storage.add_user(household)
+                times = []
+                for _ in range(repeat):
+                    # 毎回減った分を足して、同じ件数から 1% を削除する
+                    missing = n_items - len(storage.load_inventory(household))
+                    storage.add_items(household, [item] * missing)
+                    ids = storage.load_inventory(household).ids
+                    targets = rng.sample(list(ids), max(n_items // 100, 1))
+                    start = time.perf_counter()
+                    storage.delete_items(household, targets)
+                    storage.load_inventory(household)
+                    times.append((time.perf_counter() - start) * 1000)
+                results.append(summarize("delete_items", n_items, times, deleted=max(n_items // 100, 1)))
+        finally:
+            storage.close()
+    return results
+
+
+def compare(results, baseline_path):
+    """前回の結果と比べて、ms_p50 の比（今回 / 前回）を表示する"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["name"], r["size"]): r for r in json.load(f)["results"]}
+    for result in results:
+        before = baseline.get((result["name"], result["size"]))
+        if before:
+            ratio = result["ms_p50"] / before["ms_p50"] if before["ms_p50"] else float("inf")
+            print(f"{result['name']:<26} {result['size']:>7}  {before['ms_p50']:9.3f} → "
+                  f"{result['ms_p50']:9.3f} ms  ×{ratio:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="小さい大きさだけで測る")
+    parser.add_argument("--repeat", type=int, default=5, help="1つの大きさで繰り返す回数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="結果を JSON で書き出すファイル")
+    parser.add_argument("--compare", help="比べる前回の結果（JSON）")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    item_sizes = QUICK_ITEM_SIZES if args.quick else ITEM_SIZES
+    recipe_sizes = QUICK_RECIPE_SIZES if args.quick else RECIPE_SIZES
+
+    results = (bench_recipes(recipe_sizes, args.repeat, rng)
+               + bench_inventory(item_sizes, args.repeat, rng)
+               + bench_delete(item_sizes, args.repeat, rng))
+    report = {
+        "benchmark": "core",
+        "seed": args.seed,
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
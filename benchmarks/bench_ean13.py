@@ -0,0 +1,90 @@
+"""EAN-13 読み取りのベンチマーク
+
+合成したバーコード画像（モジュール幅・ノイズ・ぼかし・向き・明るさを変えたもの）を
+decode_ean13 で読み取り、1枚あたりの時間と読み取り率を表示する。
+
+    python benchmarks/bench_ean13.py --images 200 --output ean13.json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fridge.ean13 import decode_ean13, ean13_check_digit, encode_ean13  # noqa: E402
+
+
+def random_code(rng):
+    first12 = "".join(str(rng.randrange(10)) for _ in range(12))
+    return first12 + str(ean13_check_digit(first12))
+
+
+def render(code, rng, canvas=(1280, 960)):
+    """バーコードを1枚の写真らしい画像にする"""
+    module = rng.choice([2, 3, 4, 5])
+    bits = np.array([c == "1" for c in encode_ean13(code)])
+    bar_height = rng.randint(60, 200)
+    row = np.repeat(np.where(bits, 30, 235), module).astype(np.float32)
+    quiet = np.full(module * 11, 235, dtype=np.float32)
+    row = np.concatenate([quiet, row, quiet])
+    barcode = np.tile(row, (bar_height, 1))
+
+    width, height = canvas
+    image = np.full((height, width), 235, dtype=np.float32)
+    top = rng.randint(0, height - bar_height)
+    left = rng.randint(0, max(width - barcode.shape[1], 0))
+    image[top:top + bar_height, left:left + barcode.shape[1]] = barcode[:, :width - left]
+
+    # 明るさのむら・ノイズ・ぼかし
+    gradient = np.linspace(rng.uniform(0.7, 1.0), rng.uniform(0.7, 1.0), width, dtype=np.float32)
+    image = image * gradient + np.random.default_rng(rng.randrange(2 ** 32)).normal(0, 8, image.shape)
+    pil = Image.fromarray(image.clip(0, 255).astype(np.uint8), mode="L")
+    pil = pil.filter(ImageFilter.GaussianBlur(rng.uniform(0.3, 1.0)))
+    return pil.rotate(rng.choice([0, 90, 180, 270]), expand=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=200, help="画像の枚数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="結果を JSON で書き出すファイル")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    samples = [(code, render(code, rng)) for code in (random_code(rng) for _ in range(args.images))]
+
+    latencies = []
+    correct = 0
+    for code, image in samples:
+        start = time.perf_counter()
+        decoded = decode_ean13(image)
+        latencies.append((time.perf_counter() - start) * 1000)
+        correct += decoded == code
+
+    latencies.sort()
+    result = {
+        "benchmark": "ean13_decode",
+        "images": len(samples),
+        "decoded": correct,
+        "decode_rate": correct / len(samples),
+        "ms_mean": statistics.fmean(latencies),
+        "ms_p50": latencies[len(latencies) // 2],
+        "ms_p95": latencies[int(len(latencies) * 0.95) - 1],
+        "ms_max": latencies[-1],
+    }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""冷蔵庫管理アプリのドメインロジック"""
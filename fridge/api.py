@@ -0,0 +1,254 @@
+"""食材・バーコード検索・レシピ提案の JSON API（ASGI）
+
+Streamlit の画面と同じデータベース・バーコードのキャッシュ・レシピファイルを使い、
+画面の再実行なしにタブレットやスクリプトから操作できるようにする。
+Starlette と uvicorn が必要（``pip install starlette uvicorn``）。
+
+    python -m fridge.api --port 8502
+    uvicorn --factory fridge.api:create_app --port 8502
+
+エンドポイント:
+
+- GET    /api/households/{household}/items               食材の一覧とバージョン
+- POST   /api/households/{household}/items               食材の登録（1件の辞書か {"items": [...]}）
+- DELETE /api/households/{household}/items/{item_id}     食材を1件削除
+- DELETE /api/households/{household}/items?expected_version=N  食材をすべて削除
+- GET    /api/barcodes/{barcode}                         バーコードから商品名
+- POST   /api/recipes/suggest                            {"items": [...], "type": "和食"} からレシピ提案
+
+SQLite・レシピ提案・バーコード検索（requests）は同期処理なので、スレッドで実行してイベントループを
+止めない。バーコード検索は API の回数制限で待つことがあるため、SQLite と同じスレッドプールの枠は使わず、
+同時に UPSTREAM_WORKERS 本までの別の枠で実行する（待っている問い合わせがほかの API を止めない）。
+同じバーコードを同時に問い合わせたときは、API への問い合わせを1回にまとめる。
+"""
+import argparse
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+
+import anyio.to_thread
+from anyio import CapacityLimiter
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from fridge.barcode import MISS, BarcodeLookup
+from fridge.inventory import CATEGORIES, validate_dates
+from fridge.recipe_files import RecipeSource
+from fridge.recipes import suggest_recipes
+from fridge.storage import DEFAULT_DB_PATH, InventoryConflict, Storage
+
+# 一度に登録できる食材の数
+MAX_ITEMS = 1000
+
+# 食材1件の数量の上限（SQLite の整数に収まらない値を送られないように）
+MAX_QUANTITY = 1_000_000
+
+# バーコード検索を同時に実行するスレッドの数（回数制限で待つスレッドもここに収まる）
+UPSTREAM_WORKERS = 4
+
+
+class ApiError(Exception):
+    """JSON のエラー応答にする例外"""
+
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class AsyncBarcodeLookup:
+    """BarcodeLookup をイベントループから使う
+
+    メモリ上のキャッシュにあればそのまま返し、無ければスレッドで lookup を実行する。
+    スレッドは SQLite などと共有するスレッドプールの枠とは別に、workers 本までに制限する。
+    同じバーコードの問い合わせが実行中なら、その結果を待つ。
+    """
+
+    def __init__(self, lookup, workers=UPSTREAM_WORKERS):
+        self.lookup = lookup
+        self.workers = workers
+        self._limiter = None
+        self._pending = {}
+
+    async def _lookup(self, barcode):
+        if self._limiter is None:
+            self._limiter = CapacityLimiter(self.workers)
+        return await anyio.to_thread.run_sync(self.lookup.lookup, barcode, limiter=self._limiter)
+
+    async def get(self, barcode):
+        name = self.lookup.memory_cached(barcode)
+        if name is not MISS:
+            return name
+
+        task = self._pending.get(barcode)
+        if task is None:
+            task = asyncio.ensure_future(self._lookup(barcode))
+            self._pending[barcode] = task
+            task.add_done_callback(lambda _: self._pending.pop(barcode, None))
+        # 待っている1人が切断しても、ほかの人の問い合わせは止めない
+        return await asyncio.shield(task)
+
+
+async def _json_body(request):
+    try:
+        return await request.json()
+    except ValueError:
+        raise ApiError(400, "JSON を送ってください")
+
+
+def _is_barcode(code):
+    """8〜14桁の数字の文字列か"""
+    return isinstance(code, str) and code.isdigit() and 8 <= len(code) <= 14
+
+
+def _parse_item(data, now):
+    """送られた食材1件を検証して、保存する辞書にする"""
+    if not isinstance(data, dict):
+        raise ApiError(400, "食材は辞書で送ってください")
+    name = str(data.get("name") or "").strip()
+    if not name:
+        raise ApiError(400, "name（食材名）がありません")
+    try:
+        purchase_date = date.fromisoformat(str(data.get("purchase_date") or date.today().isoformat()))
+        expiry_date = date.fromisoformat(str(data["expiry_date"]))
+    except (KeyError, ValueError):
+        raise ApiError(400, f"{name}: purchase_date / expiry_date は YYYY-MM-DD で送ってください")
+    is_valid, error_msg = validate_dates(purchase_date, expiry_date)
+    if not is_valid:
+        raise ApiError(400, f"{name}: {error_msg}")
+    category = data.get("category") or "その他"
+    if category not in CATEGORIES:
+        raise ApiError(400, f"{name}: category は {'・'.join(CATEGORIES)} のどれかです")
+    quantity = data.get("quantity", 1)
+    if not isinstance(quantity, int) or isinstance(quantity, bool) or not 1 <= quantity <= MAX_QUANTITY:
+        raise ApiError(400, f"{name}: quantity は1〜{MAX_QUANTITY}の整数です")
+    barcode = data.get("barcode") or "未登録"
+    if barcode != "未登録" and not _is_barcode(barcode):
+        raise ApiError(400, f"{name}: barcode は8〜14桁の数字の文字列です")
+    return {
+        "name": name,
+        "barcode": barcode,
+        "purchase_date": purchase_date.isoformat(),
+        "expiry_date": expiry_date.isoformat(),
+        "category": category,
+        "quantity": quantity,
+        "registered_at": now,
+        "registered_by": str(data.get("registered_by") or ""),
+    }
+
+
+def create_app(storage=None, barcode_lookup=None, recipe_source=None):
+    """API のアプリを作る（省略したものは画面と同じ設定で作る）"""
+    storage = storage or Storage(DEFAULT_DB_PATH)
+    barcodes = AsyncBarcodeLookup(barcode_lookup or BarcodeLookup.from_environment())
+    recipe_source = recipe_source or RecipeSource()
+
+    async def household_of(request):
+        household = request.path_params["household"]
+        if not await run_in_threadpool(storage.has_household, household):
+            raise ApiError(404, f"世帯がありません: {household}")
+        return household
+
+    async def list_items(request):
+        household = await household_of(request)
+
+        def load():
+            # 一覧とバージョンを同じ時点のものにするため、読み込みの前後でバージョンを比べる
+            while True:
+                version = storage.inventory_version(household)
+                items = storage.load_items(household)
+                if storage.inventory_version(household) == version:
+                    return {"household": household, "version": version, "items": items}
+
+        return JSONResponse(await run_in_threadpool(load))
+
+    async def add_items(request):
+        household = await household_of(request)
+        data = await _json_body(request)
+        entries = data.get("items") if isinstance(data, dict) and "items" in data else [data]
+        if not isinstance(entries, list) or not entries or len(entries) > MAX_ITEMS:
+            raise ApiError(400, f"items は1〜{MAX_ITEMS}件のリストで送ってください")
+        now = datetime.now().strftime('%Y-%m-%d %H:%M')
+        items = [_parse_item(entry, now) for entry in entries]
+        version = await run_in_threadpool(storage.add_items, household, items)
+        return JSONResponse({"household": household, "version": version, "added": len(items)}, status_code=201)
+
+    async def delete_item(request):
+        household = await household_of(request)
+        deleted = await run_in_threadpool(storage.delete_item, household, request.path_params["item_id"])
+        if not deleted:
+            raise ApiError(404, "食材がありません（すでに削除されています）")
+        return JSONResponse({"deleted": deleted})
+
+    async def delete_all_items(request):
+        household = await household_of(request)
+        expected_version = request.query_params.get("expected_version")
+        if expected_version is None or not expected_version.isdigit():
+            raise ApiError(400, "expected_version（一覧で受け取ったバージョン）を指定してください")
+        try:
+            await run_in_threadpool(storage.delete_all_items, household, int(expected_version))
+        except InventoryConflict as e:
+            raise ApiError(409, str(e))
+        return JSONResponse({"deleted": "all"})
+
+    async def barcode(request):
+        code = request.path_params["barcode"]
+        if not _is_barcode(code):
+            raise ApiError(400, "バーコードは8〜14桁の数字です")
+        try:
+            name = await barcodes.get(code)
+        except Exception as e:
+            raise ApiError(502, f"商品を検索できませんでした: {e}")
+        return JSONResponse({"barcode": code, "name": name})
+
+    async def suggest(request):
+        data = await _json_body(request)
+        items = data.get("items") if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items or not all(isinstance(item, str) for item in items):
+            raise ApiError(400, "items（食材名のリスト）を送ってください")
+        recipe_type = data.get("type") or "おまかせ"
+        if not isinstance(recipe_type, str):
+            raise ApiError(400, "type（レシピの種類）は文字列で送ってください")
+
+        def compute():
+            # レシピファイルが変わっていればカタログを作り直すため、イベントループの外で行う
+            return suggest_recipes(items, recipe_type, recipe_source.catalog())
+
+        return JSONResponse({"recipes": await run_in_threadpool(compute)})
+
+    async def api_error(request, exc):
+        return JSONResponse({"error": str(exc)}, status_code=exc.status_code)
+
+    routes = [
+        Route("/api/households/{household}/items", list_items, methods=["GET"]),
+        Route("/api/households/{household}/items", add_items, methods=["POST"]),
+        Route("/api/households/{household}/items", delete_all_items, methods=["DELETE"]),
+        Route("/api/households/{household}/items/{item_id:int}", delete_item, methods=["DELETE"]),
+        Route("/api/barcodes/{barcode}", barcode, methods=["GET"]),
+        Route("/api/recipes/suggest", suggest, methods=["POST"]),
+    ]
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        storage.close()
+
+    return Starlette(routes=routes, exception_handlers={ApiError: api_error}, lifespan=lifespan)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="食材・バーコード検索・レシピ提案の JSON API を起動する")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    uvicorn.run(create_app(), host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""Open Food Facts を使ったバーコード（JAN）→商品名の検索とキャッシュ
+
+検索結果はメモリ上の LRU と SQLite ファイルの2段でキャッシュする。
+「見つからない」結果も短めの期限でキャッシュし、ネットワークに繋がらない
+ときは期限切れのキャッシュでも返す。オフライン索引（fridge.offline_index）を
+渡した場合は API より先に索引を引き、API は索引に無いときだけ使う。
+requests は読み込みに時間がかかるため、API を初めて使うときに読み込む。
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+PRODUCT_URL = "https://world.openfoodfacts.org/api/v0/product/{barcode}.json"
+
+# キャッシュファイルの場所（環境変数で変更できる）
+DEFAULT_CACHE_PATH = os.environ.get("FRIDGE_BARCODE_CACHE_PATH", "barcode_cache.db")
+
+# キャッシュの有効期限（秒）
+FOUND_TTL = 30 * 24 * 60 * 60
+NOT_FOUND_TTL = 24 * 60 * 60
+
+# API への問い合わせ回数の上限（Open Food Facts の目安は商品取得 100回/分）
+REQUESTS_PER_SECOND = 100 / 60
+
+# キャッシュに無いことを表す目印（None は「商品が見つからない」の意味で使う）
+MISS = object()
+
+
+def extract_product_name(product):
+    """Open Food Facts の商品データから表示用の商品名を取り出す"""
+    product_name = (product.get('product_name_ja') or
+                    product.get('product_name') or
+                    product.get('product_name_en'))
+    if product_name:
+        product_name = product_name.split('【')[0].split('(')[0].strip()
+    return product_name or None
+
+
+class RateLimiter:
+    """呼び出しの間隔が一定以上になるように待つ（複数スレッドで共有できる）"""
+
+    def __init__(self, per_second):
+        self.interval = 1.0 / per_second if per_second else 0.0
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class BarcodeLookup:
+    """バーコードから商品名を引く（LRU → ディスク → オフライン索引 → API の順に探す）"""
+
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH, maxsize=4096, timeout=5,
+                 offline_index=None, online=True, requests_per_second=REQUESTS_PER_SECOND,
+                 product_url=PRODUCT_URL):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.offline_index = offline_index
+        self.online = online
+        self.product_url = product_url
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS products ("
+            "barcode TEXT PRIMARY KEY, name TEXT, expires_at REAL NOT NULL)"
+        )
+
+        self._session = None
+
+    @classmethod
+    def from_environment(cls):
+        """環境変数の設定から作る（オフライン索引があれば使い、FRIDGE_BARCODE_ONLINE=0 なら API を使わない）"""
+        from fridge.offline_index import DEFAULT_INDEX_PATH, OfflineBarcodeIndex
+
+        offline_index = None
+        if os.path.exists(DEFAULT_INDEX_PATH):
+            offline_index = OfflineBarcodeIndex(DEFAULT_INDEX_PATH)
+        online = os.environ.get("FRIDGE_BARCODE_ONLINE", "1") != "0"
+        return cls(offline_index=offline_index, online=online)
+
+    @property
+    def session(self):
+        """接続を使い回すセッション（複数スレッドから同時に使えるようプールを広げる）"""
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    def lookup(self, barcode):
+        """商品名を返す。見つからなければ None、通信に失敗したら例外を送出する"""
+        name = self.cached(barcode)
+        if name is not MISS:
+            return name
+
+        name = None
+        if self.offline_index is not None:
+            name = self.offline_index.lookup(barcode)
+        # 索引で見つかったとき・API を使わない設定のときは、API に問い合わせない
+        if name or not self.online:
+            with self._lock:
+                self._remember(barcode, name, time.time() + NOT_FOUND_TTL)
+            return name
+
+        import requests
+
+        try:
+            name = self.fetch(barcode)
+        except (requests.RequestException, ValueError):
+            # オフラインなどで取得できないときは、期限切れのキャッシュでも使う
+            entry = self._disk_entry(barcode)
+            if entry is None:
+                raise
+            return entry[0]
+
+        self.store(barcode, name)
+        return name
+
+    def lookup_many(self, barcodes, max_workers=4):
+        """複数のバーコードを並行して引き、{バーコード: 商品名} を返す
+
+        見つからない商品や通信に失敗した商品の値は None になる。
+        API への問い合わせは rate_limiter で間隔を空ける。
+        """
+        unique = list(dict.fromkeys(barcodes))
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            names = list(pool.map(self._lookup_or_none, unique))
+        return dict(zip(unique, names))
+
+    def _lookup_or_none(self, barcode):
+        try:
+            return self.lookup(barcode)
+        except Exception:
+            return None
+
+    def fetch(self, barcode):
+        """API に問い合わせて商品名を返す（キャッシュは使わない）"""
+        self.rate_limiter.wait()
+        response = self.session.get(self.product_url.format(barcode=barcode), timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        if data.get('status') == 1:
+            return extract_product_name(data.get('product', {}))
+        return None
+
+    def memory_cached(self, barcode):
+        """メモリ上のキャッシュだけを見て商品名を返す（ディスクは読まない）。無ければ MISS"""
+        with self._lock:
+            entry = self._memory.get(barcode)
+        if entry is None or entry[1] <= time.time():
+            return MISS
+        return entry[0]
+
+    def cached(self, barcode):
+        """キャッシュ済みの商品名を返す。キャッシュに無ければ MISS"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(barcode)
+            if entry is not None:
+                name, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(barcode)
+                    return name
+                del self._memory[barcode]
+
+        entry = self._disk_entry(barcode)
+        if entry is None or entry[1] <= now:
+            return MISS
+        name, expires_at = entry
+        with self._lock:
+            self._remember(barcode, name, expires_at)
+        return name
+
+    def store(self, barcode, name):
+        """検索結果を両方のキャッシュに保存する"""
+        expires_at = time.time() + (FOUND_TTL if name else NOT_FOUND_TTL)
+        with self._lock:
+            self._remember(barcode, name, expires_at)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO products (barcode, name, expires_at) VALUES (?, ?, ?)",
+                (barcode, name, expires_at),
+            )
+
+    def _remember(self, barcode, name, expires_at):
+        self._memory[barcode] = (name, expires_at)
+        self._memory.move_to_end(barcode)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def _disk_entry(self, barcode):
+        """ディスクキャッシュの (商品名, 期限) を返す（期限切れも含む）"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT name, expires_at FROM products WHERE barcode = ?", (barcode,)
+            ).fetchone()
@@ -0,0 +1,142 @@
+"""多数の利用者のレシピ提案をまとめて計算する
+
+レシピカタログを「キーワード×レシピ」の接続行列にしておき、利用者ごとの
+食材を「利用者×食材」の個数行列にして、行列積でスコアを一度に求める。
+順位は generate_recipe_suggestions と同じ（スコアの高い順、同点はカタログ順、
+必須食材と料理のタイプを満たすものだけ）。
+"""
+import numpy as np
+
+from fridge.recipes import CATALOG
+
+# 一度に計算する利用者の数（メモリ使用量の上限を決める）
+BLOCK_SIZE = 1024
+
+
+class RecipeIncidence:
+    """レシピカタログの接続行列（キーワード×レシピ）と、必須食材・料理タイプのマスク"""
+
+    def __init__(self, catalog=CATALOG):
+        self.catalog = catalog
+        self.keywords = catalog.matcher.keywords
+        self.keyword_position = {keyword: k for k, keyword in enumerate(self.keywords)}
+        shape = (len(self.keywords), len(catalog))
+
+        # keywords[k] がレシピ r のキーワード（必須・任意を含む）なら 1
+        self.keyword_recipe = np.zeros(shape, dtype=np.float32)
+        # 必須食材は少ないので、レシピごとのキーワードの位置を CSR 形式で持つ
+        # （レシピ r の必須食材は required_keywords[required_indptr[r]:required_indptr[r + 1]]）
+        required_keywords = []
+        self.required_indptr = np.zeros(len(catalog) + 1, dtype=np.intp)
+        for r, keywords in enumerate(catalog.match_keywords):
+            for keyword in keywords:
+                self.keyword_recipe[self.keyword_position[keyword], r] = 1
+            required_keywords.extend(sorted({self.keyword_position[keyword] for keyword in catalog.required[r]}))
+            self.required_indptr[r + 1] = len(required_keywords)
+        self.required_keywords = np.array(required_keywords, dtype=np.intp)
+        # 必須食材のあるレシピ（reduceat は空の区間を扱えないため、これらだけで判定する）
+        self.has_required = np.flatnonzero(np.diff(self.required_indptr) > 0)
+
+        # 同点のときはカタログ順を優先するための位置
+        self.positions = np.arange(len(catalog), dtype=np.float64)
+
+        types = {recipe_type for data in catalog.recipes.values() for recipe_type in data["type"]}
+        self.type_masks = {
+            recipe_type: np.array([recipe_type in data["type"] for data in catalog.recipes.values()])
+            for recipe_type in types
+        }
+        self.type_masks["おまかせ"] = np.ones(len(catalog), dtype=bool)
+
+        self._item_keywords = {}
+
+    def item_keywords(self, item_lower):
+        """食材名（小文字）にマッチするキーワードの位置を返す（食材名ごとに覚えておく）"""
+        positions = self._item_keywords.get(item_lower)
+        if positions is None:
+            positions = np.array(
+                sorted(self.keyword_position[keyword] for keyword in self.catalog.match_item(item_lower)),
+                dtype=np.intp,
+            )
+            self._item_keywords[item_lower] = positions
+        return positions
+
+    def rank(self, inventories, recipe_type="おまかせ", top_k=3, block_size=BLOCK_SIZE):
+        """利用者ごとの食材名リストから、上位 top_k 件の (レシピ名, スコア) を返す
+
+        マッチするレシピが無い利用者は空のリストになる
+        （generate_recipe_suggestions が返す既定の炒め物レシピは含めない）。
+        """
+        type_mask = self.type_masks.get(recipe_type, np.zeros(len(self.catalog), dtype=bool))
+        results = []
+        for start in range(0, len(inventories), block_size):
+            results.extend(self._rank_block(inventories[start:start + block_size], type_mask, top_k))
+        return results
+
+    def _rank_block(self, inventories, type_mask, top_k):
+        # このブロックに出てくる食材名だけで語彙を作る
+        vocabulary = {}
+        rows, columns = [], []
+        for u, items in enumerate(inventories):
+            for item in items:
+                column = vocabulary.setdefault(item.lower(), len(vocabulary))
+                rows.append(u)
+                columns.append(column)
+
+        # 利用者×食材の個数行列（同じ食材を2つ選べば2回数える）
+        user_item = np.zeros((len(inventories), len(vocabulary)), dtype=np.float32)
+        np.add.at(user_item, (rows, columns), 1)
+
+        # 食材×キーワードの一致行列
+        item_keyword = np.zeros((len(vocabulary), len(self.keywords)), dtype=np.float32)
+        for item_lower, column in vocabulary.items():
+            item_keyword[column, self.item_keywords(item_lower)] = 1
+
+        # 食材がレシピで使われるか（食材×レシピ）→ 利用者ごとのスコア
+        item_recipe = (item_keyword @ self.keyword_recipe) > 0
+        scores = user_item @ item_recipe.astype(np.float32)
+
+        # 必須食材がすべてそろっているか（レシピごとに、足りない必須食材が1つも無いか）
+        matched_keywords = (user_item @ item_keyword) > 0
+        required_ok = np.ones((len(inventories), len(self.catalog)), dtype=bool)
+        if len(self.has_required):
+            missing = ~matched_keywords[:, self.required_keywords]
+            any_missing = np.logical_or.reduceat(missing, self.required_indptr[self.has_required], axis=1)
+            required_ok[:, self.has_required] = ~any_missing
+
+        valid = (scores > 0) & required_ok & type_mask
+        # スコアが高いほど、同点ならカタログ順が先ほど大きくなる並べ替えキー
+        keys = np.where(valid, scores * len(self.catalog) - self.positions, -np.inf)
+
+        k = min(top_k, keys.shape[1])
+        if k == 0:
+            return [[] for _ in inventories]
+        top = np.argpartition(-keys, k - 1, axis=1)[:, :k]
+        top_keys = np.take_along_axis(keys, top, axis=1)
+        order = np.argsort(-top_keys, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+
+        results = []
+        for u in range(len(inventories)):
+            results.append([
+                (self.catalog.names[r], int(scores[u, r])) for r in top[u] if valid[u, r]
+            ])
+        return results
+
+
+# 最後に使ったカタログの接続行列（レシピファイルを読み直すとバージョンが変わるので、
+# 古いバージョンの行列は捨てて1つだけ持つ）
+_INCIDENCE = {}
+
+
+def batch_rank_recipes(inventories, recipe_type="おまかせ", top_k=3, catalog=CATALOG):
+    """利用者ごとの食材名リストをまとめて採点し、上位のレシピを返す
+
+    例: batch_rank_recipes([["豚肉", "玉ねぎ"], ["卵"]]) →
+        [[("豚の生姜焼き", 1), ...], [("卵焼き", 1), ...]]
+    """
+    incidence = _INCIDENCE.get(catalog.version)
+    if incidence is None:
+        incidence = RecipeIncidence(catalog)
+        _INCIDENCE.clear()
+        _INCIDENCE[catalog.version] = incidence
+    return incidence.rank(inventories, recipe_type, top_k)
@@ -0,0 +1,60 @@
+"""複数の食材をまとめて登録するための補助関数"""
+import re
+import unicodedata
+from collections import Counter
+
+import pandas as pd
+
+# JAN/EAN/UPC として扱う桁数
+BARCODE_PATTERN = re.compile(r"\d{8,14}")
+
+# CSV でバーコードが入っているとみなす列名
+BARCODE_COLUMNS = ("barcode", "jan", "JAN", "バーコード")
+
+
+def parse_barcodes(text):
+    """貼り付けたテキストからバーコードを取り出し、{バーコード: 個数} を返す
+
+    全角数字も受け付ける。同じバーコードが複数回あれば個数にまとめる。
+    """
+    return Counter(BARCODE_PATTERN.findall(unicodedata.normalize("NFKC", text)))
+
+
+def read_barcode_csv(file):
+    """CSV からバーコードを取り出し、{バーコード: 個数} を返す
+
+    barcode / jan / バーコード 列（無ければ先頭の列）を使い、
+    quantity 列があればその値を個数として足し合わせる。
+    空のファイルやヘッダーだけのファイルは空の Counter、CSV として読めないファイルは ValueError。
+    """
+    try:
+        df = pd.read_csv(file, dtype=str).fillna("")
+    except pd.errors.EmptyDataError:
+        return Counter()
+    except (pd.errors.ParserError, UnicodeDecodeError) as e:
+        raise ValueError(f"CSV を読み込めませんでした: {e}") from e
+    if df.empty:
+        return Counter()
+    column = next((name for name in BARCODE_COLUMNS if name in df.columns), df.columns[0])
+    barcodes = df[column].map(lambda value: unicodedata.normalize("NFKC", value).strip())
+    if "quantity" in df.columns:
+        quantities = pd.to_numeric(df["quantity"], errors="coerce").fillna(1).astype(int)
+    else:
+        quantities = pd.Series(1, index=df.index)
+    valid = barcodes.str.fullmatch(BARCODE_PATTERN.pattern)
+    counts = Counter()
+    for barcode, quantity in zip(barcodes[valid], quantities[valid]):
+        counts[barcode] += max(quantity, 1)
+    return counts
+
+
+def build_bulk_rows(counts, names, purchase_date, expiry_date, category):
+    """確認・編集用の表を作る（商品名が見つからなかった行は空欄）"""
+    return pd.DataFrame({
+        "barcode": list(counts),
+        "name": [names.get(barcode) or "" for barcode in counts],
+        "category": category,
+        "quantity": list(counts.values()),
+        "purchase_date": purchase_date,
+        "expiry_date": expiry_date,
+    })
@@ -0,0 +1,188 @@
+"""賞味期限のお知らせ（ダイジェスト）を、画面を開いていなくても作るワーカー
+
+すべての世帯の食材のうち期限が近いものだけをデータベースから読み、残り日数と区分
+（期限切れ・今日まで・N日以内）を配列でまとめて求める。結果は利用者ごとの JSON ファイルとして
+送信待ちのディレクトリ（outbox/日付/利用者.json）に書き出す。
+
+使い方::
+
+    python -m fridge.digest                       # 1回だけ実行
+    python -m fridge.digest --days 5 --outbox /var/spool/fridge
+    python -m fridge.digest --every 60            # 60分ごとに実行し続ける
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from fridge.inventory import day_ordinal
+from fridge.storage import CHUNK_SIZE, DEFAULT_DB_PATH, Storage
+
+# ダイジェストを書き出すディレクトリ（環境変数で変更できる）
+DEFAULT_OUTBOX = os.environ.get("FRIDGE_OUTBOX", "outbox")
+
+# 何日以内の食材を知らせるか（サイドバーの通知設定の既定値と同じ）
+DEFAULT_DAYS = 3
+
+# 区分の名前（残り日数が 0 未満・0・1〜days）
+BUCKETS = ("expired", "today", "soon")
+
+# ファイル名に使えない文字（% は符号化の目印なので、それ自体も符号化する）
+_UNSAFE = re.compile(r'[\\/:*?"<>|%\x00-\x1f]')
+
+# ファイル名（.json を除く）の UTF-8 でのバイト数の上限（多くのファイルシステムの上限は 255 バイトで、
+# 書き込み中の一時ファイルの名前にはさらに数十バイト付く）
+MAX_FILENAME_BYTES = 180
+
+# 符号化した1文字（%XX か、そのままの1文字）
+_ENCODED_CHAR = re.compile(r"%[0-9A-F]{2}|.", re.DOTALL)
+
+
+def digest_filename(user):
+    """利用者のダイジェストのファイル名（使えない文字は %XX にするので、別の利用者と重ならない）
+
+    長すぎる名前は MAX_FILENAME_BYTES に収まるよう切り詰め、利用者名のハッシュを "%-" に続けて付ける
+    （符号化した名前の % のあとには必ず16進数が続くので、切り詰めていない名前とは重ならない）。
+    """
+    encoded = _UNSAFE.sub(lambda match: "".join(f"%{byte:02X}" for byte in match.group().encode("utf-8")), user)
+    if len(encoded.encode("utf-8")) > MAX_FILENAME_BYTES:
+        suffix = "%-" + hashlib.sha256(user.encode("utf-8")).hexdigest()[:16]
+        budget = MAX_FILENAME_BYTES - len(suffix)
+        kept = []
+        for char in _ENCODED_CHAR.findall(encoded):
+            budget -= len(char.encode("utf-8"))
+            if budget < 0:
+                break
+            kept.append(char)
+        encoded = "".join(kept) + suffix
+    return encoded + ".json"
+
+
+def compute_buckets(chunks, today, days=DEFAULT_DAYS):
+    """(世帯, id, 食材名, カテゴリ, 数量, 賞味期限の日数) の行から、区分の付いた DataFrame を作る
+
+    行は iter_expiring のチャンクのまま受け取り、チャンクごとに配列で残り日数と区分を求めて
+    対象の行だけを残す。結果は世帯・残り日数・id の順に並べる。
+    """
+    base = day_ordinal(today)
+    frames = []
+    for rows in chunks:
+        households, ids, names, categories, quantities, expiry_days = (np.array(column) for column in zip(*rows))
+        days_left = expiry_days.astype(np.int64) - base
+        keep = days_left <= days
+        bucket = np.select([days_left < 0, days_left == 0], [0, 1], default=2)
+        frames.append(pd.DataFrame({
+            "household": households[keep],
+            "id": ids[keep].astype(np.int64),
+            "name": names[keep],
+            "category": categories[keep],
+            "quantity": quantities[keep].astype(np.int64),
+            "expiry_days": expiry_days[keep].astype(np.int64),
+            "days_left": days_left[keep],
+            "bucket": bucket[keep].astype(np.int8),
+        }))
+    if not frames:
+        return pd.DataFrame(columns=["household", "id", "name", "category", "quantity",
+                                     "expiry_days", "days_left", "bucket"])
+    df = pd.concat(frames, ignore_index=True)
+    return df.sort_values(["household", "days_left", "id"], kind="stable", ignore_index=True)
+
+
+def build_digests(df, today, days=DEFAULT_DAYS):
+    """区分の付いた DataFrame から {世帯: ダイジェストの辞書} を作る"""
+    digests = {}
+    expiry = (df["expiry_days"].to_numpy().astype("datetime64[D]")).astype(str)
+    records = zip(
+        df["household"].tolist(), df["bucket"].tolist(), df["name"].tolist(), df["category"].tolist(),
+        df["quantity"].tolist(), expiry.tolist(), df["days_left"].tolist(),
+    )
+    for household, bucket, name, category, quantity, expiry_date, days_left in records:
+        digest = digests.get(household)
+        if digest is None:
+            digest = digests[household] = {
+                "date": today.isoformat(), "household": household, "days": days,
+                **{key: [] for key in BUCKETS},
+            }
+        digest[BUCKETS[bucket]].append({
+            "name": name, "category": category, "quantity": quantity,
+            "expiry_date": expiry_date, "days_left": days_left,
+        })
+    return digests
+
+
+def _write_text(path, text):
+    """一時ファイルに書いてから置き換える（読み手が書きかけのファイルを見ないように）"""
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temporary, path)
+
+
+def run_once(storage, outbox=DEFAULT_OUTBOX, days=DEFAULT_DAYS, today=None, chunk_size=CHUNK_SIZE):
+    """すべての利用者のダイジェストを書き出し、{"households", "users", "items"} の件数を返す
+
+    知らせる食材の無い世帯の利用者には書き出さず、同じ日の前の実行で書いたファイルがあれば消す
+    （食材を食べたり捨てたりしたあとに、古いお知らせが残らないように）。
+    同じ日に何度実行しても同じファイルを上書きする。
+    """
+    today = today or date.today()
+    until = (today + timedelta(days=days + 1)).isoformat()
+    df = compute_buckets(storage.iter_expiring(until, chunk_size), today, days)
+    digests = build_digests(df, today, days)
+
+    directory = os.path.join(outbox, today.isoformat())
+    os.makedirs(directory, exist_ok=True)
+    written = set()
+    for household, members in storage.list_members().items():
+        digest = digests.get(household)
+        if digest is None:
+            continue
+        # 世帯の内容は1回だけ JSON にし、利用者ごとに名前を足して書く
+        body = json.dumps(digest, ensure_ascii=False)
+        for user in members:
+            text = '{"user": ' + json.dumps(user, ensure_ascii=False) + ", " + body[1:] + "\n"
+            filename = digest_filename(user)
+            _write_text(os.path.join(directory, filename), text)
+            written.add(filename)
+
+    for filename in os.listdir(directory):
+        if filename.endswith(".json") and filename not in written:
+            os.remove(os.path.join(directory, filename))
+    return {"households": len(digests), "users": len(written), "items": len(df)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="賞味期限のお知らせを利用者ごとのファイルに書き出す")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="データベースファイル")
+    parser.add_argument("--outbox", default=DEFAULT_OUTBOX, help="ダイジェストを書き出すディレクトリ")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="何日以内の食材を知らせるか")
+    parser.add_argument("--every", type=float, help="指定した分ごとに実行し続ける（省略すると1回だけ）")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="一度に読む件数")
+    args = parser.parse_args(argv)
+
+    storage = Storage(args.db)
+    try:
+        while True:
+            start = time.perf_counter()
+            result = run_once(storage, args.outbox, args.days, chunk_size=args.chunk_size)
+            print(f"{result['users']}人分（{result['households']}世帯・{result['items']}件）のお知らせを"
+                  f"{args.outbox} に書き出しました（{time.perf_counter() - start:.2f}秒）", flush=True)
+            if args.every is None:
+                break
+            time.sleep(max(0.0, args.every * 60 - (time.perf_counter() - start)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        storage.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""写真から EAN-13（JAN）バーコードを読み取る
+
+ネットワークやネイティブライブラリを使わず、NumPy だけで処理する。
+
+1. 画像の何本かの横線（走査線）を取り出し、行ごとのしきい値で白黒にする
+2. 白黒の並びをランレングス（連続する同じ色の幅）に変換する
+3. 59本のラン（ガード 3+5+3、数字 12×4）の窓をすべての開始位置で一度に作り、
+   数字ごとに 7 モジュールに正規化して L/G/R のパターンと照合する
+4. 左側 6 桁の L/G の並びから先頭の数字を求め、チェックディジットで確かめる
+
+見つからなければ画像を 90 度回した向きでも同じことを行う。
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# L コード（左側・奇数パリティ）の 7 モジュール。1 がバー（黒）
+L_CODES = ("0001101", "0011001", "0010011", "0111101", "0100011",
+           "0110001", "0101111", "0111011", "0110111", "0001011")
+
+# 先頭の数字ごとの、左側 6 桁のパリティの並び
+FIRST_DIGIT_PARITY = ("LLLLLL", "LLGLGG", "LLGGLG", "LLGGGL", "LGLLGG",
+                      "LGGLLG", "LGGGLL", "LGLGLG", "LGLGGL", "LGGLGL")
+
+
+def _run_widths(bits):
+    """モジュールの並びを、連続する同じ色の幅の並びにする"""
+    widths = []
+    count = 1
+    for previous, current in zip(bits, bits[1:]):
+        if current == previous:
+            count += 1
+        else:
+            widths.append(count)
+            count = 1
+    widths.append(count)
+    return widths
+
+
+# 数字1つ分の 4 本のランの幅（L と R は同じ幅で色が逆、G は L を逆順にしたもの）
+L_WIDTHS = np.array([_run_widths(code) for code in L_CODES], dtype=np.float64)
+G_WIDTHS = L_WIDTHS[:, ::-1]
+LEFT_WIDTHS = np.concatenate([L_WIDTHS, G_WIDTHS])  # 0-9: L, 10-19: G
+
+PARITY_TO_FIRST = {parity: digit for digit, parity in enumerate(FIRST_DIGIT_PARITY)}
+
+RUNS = 59      # ガード 3 + 左 24 + 中央ガード 5 + 右 24 + ガード 3
+MODULES = 95   # ガード 3 + 左 42 + 中央ガード 5 + 右 42 + ガード 3
+
+# 数字1つのランの幅が、パターンからどれだけずれてよいか（モジュール数の合計）
+MAX_DIGIT_ERROR = 1.6
+
+
+def ean13_check_digit(first12):
+    """先頭 12 桁からチェックディジットを計算する"""
+    digits = [int(c) for c in first12]
+    total = sum(digits[0::2]) + 3 * sum(digits[1::2])
+    return (10 - total % 10) % 10
+
+
+def is_valid_ean13(code):
+    """13 桁の数字で、チェックディジットが正しいか"""
+    return (len(code) == 13 and code.isdigit()
+            and ean13_check_digit(code[:12]) == int(code[12]))
+
+
+def encode_ean13(code):
+    """13 桁のコードを 95 モジュールの '0'/'1' 文字列にする（1 がバー）"""
+    if not is_valid_ean13(code):
+        raise ValueError(f"EAN-13 のコードではありません: {code}")
+    r_codes = ["".join("1" if c == "0" else "0" for c in code) for code in L_CODES]
+    g_codes = [r[::-1] for r in r_codes]
+    parity = FIRST_DIGIT_PARITY[int(code[0])]
+    left = "".join(L_CODES[int(d)] if p == "L" else g_codes[int(d)] for d, p in zip(code[1:7], parity))
+    right = "".join(r_codes[int(d)] for d in code[7:])
+    return "101" + left + "01010" + right + "101"
+
+
+def _to_gray(image):
+    """PIL 画像または配列を、float32 のグレースケール配列にする"""
+    if hasattr(image, "convert"):
+        image = image.convert("L")
+    array = np.asarray(image, dtype=np.float32)
+    if array.ndim == 3:
+        array = array[..., :3] @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    return array
+
+
+def _scanlines(gray, count):
+    """画像の上下 10%〜90% から count 本の走査線を、上下 1 行ずつ平均して取り出す"""
+    height = gray.shape[0]
+    rows = np.unique(np.linspace(height * 0.1, height * 0.9, count).astype(int).clip(1, max(height - 2, 1)))
+    if height < 3:
+        return gray[rows]
+    return (gray[rows - 1] + gray[rows] + gray[rows + 1]) / 3
+
+
+def _binarize(lines):
+    """走査線ごとに明暗の中間をしきい値にして、黒（True）/白（False）にする"""
+    low = np.percentile(lines, 5, axis=1, keepdims=True)
+    high = np.percentile(lines, 95, axis=1, keepdims=True)
+    dark = lines < (low + high) / 2
+    contrast = (high - low)[:, 0] > 32
+    return dark[contrast]
+
+
+def _runs(dark_line):
+    """白黒の並びを (幅, 黒かどうか) の配列にする"""
+    boundaries = np.flatnonzero(dark_line[1:] != dark_line[:-1]) + 1
+    starts = np.concatenate(([0], boundaries))
+    widths = np.diff(np.concatenate((starts, [len(dark_line)])))
+    return widths.astype(np.float64), dark_line[starts]
+
+
+def _decode_runs(widths, is_bar):
+    """ランの並びから EAN-13 を探す。見つからなければ None"""
+    if len(widths) < RUNS:
+        return None
+
+    # 黒のランから始まる、59 本の窓をすべて並べる
+    windows = sliding_window_view(widths, RUNS)
+    starts = np.flatnonzero(is_bar[:len(windows)])
+    windows = windows[starts]
+    module = windows.sum(axis=1) / MODULES
+
+    # 左端の余白（クワイエットゾーン）はモジュール 5 つ分以上
+    before = np.where(starts > 0, widths[np.maximum(starts - 1, 0)], np.inf)
+    guards = np.concatenate([windows[:, 0:3], windows[:, 27:32], windows[:, 56:59]], axis=1)
+    guard_ok = np.all(np.abs(guards / module[:, None] - 1) < 0.6, axis=1)
+    candidate = guard_ok & (before >= module * 5)
+    if not candidate.any():
+        return None
+    windows = windows[candidate]
+
+    # 数字ごとに 7 モジュールへ正規化してパターンと照合する
+    left = windows[:, 3:27].reshape(-1, 6, 4)
+    right = windows[:, 32:56].reshape(-1, 6, 4)
+    left = left / left.sum(axis=2, keepdims=True) * 7
+    right = right / right.sum(axis=2, keepdims=True) * 7
+
+    left_error = np.abs(left[:, :, None, :] - LEFT_WIDTHS[None, None]).sum(axis=3)
+    right_error = np.abs(right[:, :, None, :] - L_WIDTHS[None, None]).sum(axis=3)
+    left_match = left_error.argmin(axis=2)
+    right_match = right_error.argmin(axis=2)
+    ok = ((left_error.min(axis=2) < MAX_DIGIT_ERROR).all(axis=1)
+          & (right_error.min(axis=2) < MAX_DIGIT_ERROR).all(axis=1))
+
+    for c in np.flatnonzero(ok):
+        parity = "".join("G" if m >= 10 else "L" for m in left_match[c])
+        first = PARITY_TO_FIRST.get(parity)
+        if first is None:
+            continue
+        code = str(first) + "".join(str(m % 10) for m in left_match[c]) + "".join(str(m) for m in right_match[c])
+        if is_valid_ean13(code):
+            return code
+    return None
+
+
+def decode_ean13(image, scanlines=24):
+    """画像から EAN-13 のコード（13 桁の文字列）を読み取る。読めなければ None"""
+    gray = _to_gray(image)
+    for array in (gray, gray.T):
+        if array.shape[1] < MODULES:
+            continue
+        for dark_line in _binarize(_scanlines(array, scanlines)):
+            widths, is_bar = _runs(dark_line)
+            # 逆さまに写っている場合に備えて、右から左にも読む
+            for w, b in ((widths, is_bar), (widths[::-1], is_bar[::-1])):
+                code = _decode_runs(w, b)
+                if code:
+                    return code
+    return None
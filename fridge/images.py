@@ -0,0 +1,53 @@
+"""アップロードされた写真を、メモリ使用量を抑えて縮小する
+
+スマートフォンの写真（12〜48MP）をそのままデコードすると1枚で数百MBになるため、
+JPEG はドラフトモード（1/2〜1/8 に縮小しながらデコード）で読み込み、
+EXIF の向きを反映してから決まった大きさのサムネイルにする。
+縮小しながら読めない形式（PNG など）は、画素数が上限を超えたら受け付けない。
+PIL は写真がアップロードされたときに初めて読み込む。
+"""
+# 表示用サムネイルの長辺（ピクセル）
+THUMBNAIL_SIZE = 1024
+
+# バーコードを読み取るときの長辺（細いバーがつぶれないように表示用より大きめ）
+DECODE_SIZE = 1600
+
+# 受け付けるファイルサイズと画素数の上限
+MAX_FILE_BYTES = 25 * 1024 * 1024
+MAX_JPEG_PIXELS = 100_000_000   # ドラフトモードで 1/8 まで縮めて読めるので大きめ
+MAX_OTHER_PIXELS = 16_000_000   # 全画素をデコードする形式
+
+
+def load_thumbnail(uploaded_file, size=THUMBNAIL_SIZE):
+    """アップロードされたファイルから、長辺が size 以下の RGB 画像を作る
+
+    返り値は (サムネイル, 元画像の (幅, 高さ))。
+    大きすぎる画像や画像として読めないファイルは ValueError を送出する。
+    """
+    from PIL import Image, ImageOps
+
+    if getattr(uploaded_file, "size", 0) > MAX_FILE_BYTES:
+        raise ValueError(f"ファイルが大きすぎます（{MAX_FILE_BYTES // (1024 * 1024)}MB まで）")
+
+    try:
+        image = Image.open(uploaded_file)  # ここではヘッダーだけを読む
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"画像を読み込めませんでした: {e}") from e
+
+    original_size = image.size
+    width, height = original_size
+    limit = MAX_JPEG_PIXELS if image.format == "JPEG" else MAX_OTHER_PIXELS
+    if width * height > limit:
+        raise ValueError(f"画像が大きすぎます（{width}×{height}）")
+
+    # JPEG は必要な大きさに近い縮小率でデコードする（EXIF の回転前なので長辺で指定）。
+    # 画素を読むのはここからなので、途中で切れたファイルなどのエラーもここで起きる
+    try:
+        image.draft("RGB", (size, size))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size), Image.Resampling.LANCZOS, reducing_gap=2.0)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise ValueError(f"画像を読み込めませんでした: {e}") from e
+    return image, original_size
@@ -0,0 +1,155 @@
+"""食材リストのコンパクトな表現と、画面表示用の DataFrame への変換"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# 日付は 1970-01-01 からの日数（整数）で持つ
+EPOCH = date(1970, 1, 1)
+
+# 食材のカテゴリ
+CATEGORIES = ("野菜", "果物", "肉類", "魚類", "乳製品", "卵", "調味料", "その他")
+
+# 残り日数の区分ごとの背景色（期限切れ・今日・2日以内・5日以内・それ以降）
+ALERT_COLORS = np.array(["#ffcccc", "#ffeecc", "#fff4cc", "#ffffcc", "#e8f5e9"], dtype=object)
+
+
+def day_ordinal(value):
+    """date を 1970-01-01 からの日数にする"""
+    return (value - EPOCH).days
+
+
+def validate_dates(purchase_date, expiry_date):
+    """日付の妥当性をチェック"""
+    if expiry_date < purchase_date:
+        return False, "賞味期限は購入日より後の日付を選択してください"
+    return True, ""
+
+
+def validate_date_columns(purchase_dates, expiry_dates):
+    """validate_dates を列ごとにまとめて行う
+
+    datetime64 の列（読めなかった日付は NaT）を受け取り、妥当な行が True の配列を返す。
+    """
+    purchase_dates = pd.Series(purchase_dates)
+    expiry_dates = pd.Series(expiry_dates, index=purchase_dates.index)
+    valid = purchase_dates.notna() & expiry_dates.notna() & (expiry_dates >= purchase_dates)
+    return valid.to_numpy()
+
+
+def _encode(values):
+    """文字列の並びを (コード配列, 値の一覧) にする。同じ文字列は1つだけ持つ"""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), sort=False)
+    dtype = np.int8 if len(uniques) < 2 ** 7 else np.int16 if len(uniques) < 2 ** 15 else np.int32
+    return codes.astype(dtype), tuple(uniques)
+
+
+class InventoryArrays:
+    """1人分の食材を列ごとの配列で持つ
+
+    カテゴリと登録者は重複しない一覧へのコード、日付は datetime64[s]（pandas がそのまま
+    使える単位）で持つため、食材が数千件に増えても1件あたりのメモリはほぼ一定。
+    賞味期限の早い順に並べた索引も持ち、「期限切れ」「今日まで」「N日以内」などの
+    範囲は二分探索で取り出す（全件を走査しない）。
+    """
+
+    __slots__ = (
+        "ids", "names", "barcodes", "purchase_dates", "expiry_dates", "expiry_days",
+        "category_codes", "categories", "quantities", "registered_at",
+        "user_codes", "users", "expiry_order", "sorted_expiry",
+    )
+
+    def __init__(self, ids, names, barcodes, purchase_days, expiry_days,
+                 categories, quantities, registered_at, registered_by):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.names = np.asarray(names, dtype=object)
+        self.barcodes = np.asarray(barcodes, dtype=object)
+        self.expiry_days = np.asarray(expiry_days, dtype=np.int64)
+        # pandas は datetime64[D] を [s] に変換（コピー）するため、表示用の日付は最初から [s] で持つ
+        self.purchase_dates = (np.asarray(purchase_days, dtype=np.int64) * 86400).view('datetime64[s]')
+        self.expiry_dates = (self.expiry_days * 86400).view('datetime64[s]')
+        self.category_codes, self.categories = _encode(categories)
+        self.quantities = np.asarray(quantities, dtype=np.int32)
+        self.registered_at = np.asarray(registered_at, dtype=object)
+        self.user_codes, self.users = _encode(registered_by)
+
+        # 賞味期限順の索引（同じ日付は登録順）
+        self.expiry_order = np.argsort(self.expiry_days, kind='stable')
+        self.sorted_expiry = self.expiry_days[self.expiry_order]
+
+    @classmethod
+    def from_rows(cls, rows):
+        """(id, 食材名, バーコード, 購入日の日数, 賞味期限の日数, カテゴリ, 数量, 登録日時, 登録者) の行から作る"""
+        columns = list(zip(*rows)) if rows else [()] * 9
+        return cls(*columns)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nbytes(self):
+        """配列部分のおおよそのメモリ量（文字列の中身は含まない）"""
+        return sum(getattr(self, name).nbytes for name in self.__slots__
+                   if isinstance(getattr(self, name), np.ndarray))
+
+    def _expiry_bounds(self, today, start, stop):
+        base = day_ordinal(today)
+        lo = 0 if start is None else int(np.searchsorted(self.sorted_expiry, base + start, 'left'))
+        hi = len(self) if stop is None else int(np.searchsorted(self.sorted_expiry, base + stop, 'left'))
+        return lo, max(lo, hi)
+
+    def expiring(self, today, start=None, stop=None):
+        """残り日数が start 以上 stop 未満の食材の位置を、賞味期限の早い順に返す
+
+        None は上限・下限なし。例: 期限切れは stop=0、今日が期限は start=0, stop=1。
+        """
+        lo, hi = self._expiry_bounds(today, start, stop)
+        return self.expiry_order[lo:hi]
+
+    def count_expiring(self, today, start=None, stop=None):
+        """expiring() と同じ範囲の件数を返す（索引の位置の差だけで求める）"""
+        lo, hi = self._expiry_bounds(today, start, stop)
+        return hi - lo
+
+    def to_frame(self, today):
+        """画面表示用の DataFrame を作る
+
+        数値・日付の列と、カテゴリ・登録者のコードは配列をコピーせずにそのまま使う
+        （コピーするのは文字列の列と days_left だけ）。
+        インデックスは食材ID（df.loc[item_id] で1件を引ける）。
+        返り値は複数の画面で共有されるため、呼び出し側で変更しないこと。
+        """
+        days_left = self.expiry_days - day_ordinal(today)
+        df = pd.DataFrame(
+            {
+                'id': self.ids,
+                'name': self.names,
+                'barcode': self.barcodes,
+                'purchase_date': self.purchase_dates,
+                'expiry_date': self.expiry_dates,
+                'category': pd.Categorical.from_codes(self.category_codes, self.categories),
+                'quantity': self.quantities,
+                'registered_at': self.registered_at,
+                'registered_by': pd.Categorical.from_codes(self.user_codes, self.users),
+                'days_left': days_left,
+            },
+            index=pd.Index(self.ids, name='item_id'),
+            copy=False,
+        )
+        return df
+
+
+def expiry_alerts(days_left):
+    """残り日数の Series から、表示用の文言と背景色をまとめて作る"""
+    days = days_left.astype(str)
+    alert = "あと" + days + "日"
+    alert = alert.mask(days_left <= 5, "注意: あと" + days + "日")
+    alert = alert.mask(days_left <= 2, "⚠️ あと" + days + "日")
+    alert = alert.mask(days_left == 0, "⚠️ 今日が期限です！")
+    alert = alert.mask(days_left < 0, "⚠️ 期限切れ（" + (-days_left).astype(str) + "日前）")
+
+    bucket = np.select(
+        [days_left < 0, days_left == 0, days_left <= 2, days_left <= 5], [0, 1, 2, 3], default=4
+    )
+    color = pd.Series(ALERT_COLORS[bucket], index=days_left.index)
+    return alert, color
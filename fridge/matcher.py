@@ -0,0 +1,114 @@
+"""複数キーワードの部分一致検索（Aho-Corasick 法）
+
+食材名とレシピのキーワードは「キーワードが食材名に含まれる」か
+「食材名がキーワードに含まれる」ときに一致とみなす。前者はオートマトンで
+食材名を1回走査するだけで求め、後者はキーワードの全部分文字列の辞書で引く。
+"""
+from collections import deque
+
+
+class KeywordMatcher:
+    """キーワード集合に対する双方向の部分一致マッチャー"""
+
+    def __init__(self, keywords):
+        self.keywords = tuple(dict.fromkeys(keywords))
+
+        # トライ（状態ごとの遷移表）と、各状態で見つかるキーワード
+        self._goto = [{}]
+        self._output = [set()]
+        for keyword in self.keywords:
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._output.append(set())
+                state = next_state
+            self._output[state].add(keyword)
+
+        # 失敗リンクを幅優先で張り、出力をリンク先から引き継ぐ
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                link = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = link if link != next_state else 0
+                self._output[next_state] |= self._output[self._fail[next_state]]
+        self._output = [frozenset(found) for found in self._output]
+
+        # 逆方向: キーワードの部分文字列 → それを含むキーワード
+        containing = {}
+        for keyword in self.keywords:
+            for start in range(len(keyword) + 1):
+                for end in range(start, len(keyword) + 1):
+                    containing.setdefault(keyword[start:end], set()).add(keyword)
+        self._containing = {part: frozenset(found) for part, found in containing.items()}
+
+    def contained_in(self, text):
+        """text に含まれるキーワードをすべて返す"""
+        found = set(self._output[0])
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            found |= self._output[state]
+        return found
+
+    def containing(self, text):
+        """text を含むキーワードをすべて返す"""
+        return self._containing.get(text, frozenset())
+
+    def find(self, text):
+        """text と双方向に部分一致するキーワードをすべて返す"""
+        return self.contained_in(text) | self.containing(text)
+
+
+def _grams(text):
+    """文字の 1-gram と 2-gram の集合"""
+    return set(text) | {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class NgramIndex:
+    """キーワードの文字 n-gram の転置インデックス（表記ゆれ・打ち間違いの近似一致用）
+
+    キーワード k の n-gram のうち、食材名にも現れるものの割合が threshold 以上で、
+    2-gram（隣り合う2文字）も1つ以上共通なら一致とみなす。1-gram だけでは、文字が離れていても
+    並びが違っても数えてしまう（「かいわれ」と「いか」など）ため、2-gram の共通を条件にする。
+    候補は食材名の n-gram からインデックスを引いて数えるだけで、キーワードと1つずつ比べない。
+    min_length 文字未満のキーワードは、n-gram が少なく偶然の一致が多いので部分一致だけにする。
+    """
+
+    def __init__(self, keywords, threshold=2 / 3, min_length=3):
+        self.threshold = threshold
+        self._postings = {}
+        self._sizes = {}
+        for keyword in dict.fromkeys(keywords):
+            if len(keyword) < min_length:
+                continue
+            grams = _grams(keyword)
+            self._sizes[keyword] = len(grams)
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(keyword)
+        self._postings = {gram: tuple(found) for gram, found in self._postings.items()}
+
+    def similar(self, text):
+        """text と近似一致するキーワードをすべて返す"""
+        counts = {}
+        bigram_hits = set()
+        for gram in _grams(text):
+            for keyword in self._postings.get(gram, ()):
+                counts[keyword] = counts.get(keyword, 0) + 1
+                if len(gram) == 2:
+                    bigram_hits.add(keyword)
+        return {
+            keyword for keyword, count in counts.items()
+            if keyword in bigram_hits and count >= self.threshold * self._sizes[keyword]
+        }
@@ -0,0 +1,66 @@
+"""食材名の表記ゆれをそろえる
+
+1. NFKC 正規化（全角英数字・半角カタカナなどをそろえる）
+2. 小文字にして、空白を取り除く
+3. カタカナをひらがなにする（「タマネギ」→「たまねぎ」）
+4. 別名辞書で代表の表記にする（「玉ねぎ」「玉葱」→「たまねぎ」、「人参」→「にんじん」）
+
+食材名とレシピのキーワードの両方に同じ処理をしてから照合する。
+"""
+import re
+import unicodedata
+
+# 代表の表記 → 別名（どちらも 1〜3 の処理をしてから使う）
+ALIASES = {
+    "たまねぎ": ("玉ねぎ", "玉葱", "たま葱", "オニオン"),
+    "にんじん": ("人参", "キャロット"),
+    "じゃがいも": ("じゃが芋", "馬鈴薯"),
+    "ねぎ": ("葱",),
+    "きゅうり": ("胡瓜",),
+    "ごぼう": ("牛蒡",),
+    "こんにゃく": ("蒟蒻",),
+    "わかめ": ("若布", "和布"),
+    "にら": ("韮",),
+    "えび": ("海老", "蝦"),
+    "いか": ("烏賊",),
+    "大根": ("だいこん",),
+    "豆腐": ("とうふ",),
+    "卵": ("たまご", "玉子", "鶏卵"),
+    "鶏肉": ("とり肉", "鳥肉", "チキン"),
+    "鶏もも": ("とりもも",),
+    "鶏むね": ("とりむね",),
+    "豚肉": ("ぶた肉", "ポーク"),
+    "牛肉": ("ぎゅう肉", "ビーフ"),
+    "ひき肉": ("挽肉", "挽き肉", "ミンチ"),
+    "油揚げ": ("油あげ", "油揚", "あぶらあげ"),
+}
+
+# カタカナ（ァ〜ヶ）をひらがなにする変換表
+_KANA_TABLE = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+
+_SPACES = re.compile(r"\s+")
+
+
+def fold_kana(text):
+    """NFKC 正規化・小文字化・空白の除去をして、カタカナをひらがなにする"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    return _SPACES.sub("", text).translate(_KANA_TABLE)
+
+
+def _build_aliases():
+    aliases = {}
+    for canonical, variants in ALIASES.items():
+        for variant in variants:
+            aliases[fold_kana(variant)] = fold_kana(canonical)
+    # 長い別名を先に試す（「玉葱」を「葱」より先に置き換える）
+    pattern = re.compile("|".join(re.escape(v) for v in sorted(aliases, key=len, reverse=True)))
+    return aliases, pattern
+
+
+_ALIAS_MAP, _ALIAS_PATTERN = _build_aliases()
+
+
+def normalize_name(text):
+    """食材名・キーワードを照合用の表記にする"""
+    folded = fold_kana(text)
+    return _ALIAS_PATTERN.sub(lambda match: _ALIAS_MAP[match.group()], folded)
@@ -0,0 +1,199 @@
+"""Open Food Facts のダンプから作るオフライン用のバーコード索引
+
+ダンプ（JSONL または CSV/TSV、.gz 圧縮も可）を1行ずつ読み、商品名に使う
+product_name_ja / product_name / product_name_en だけを残して、バーコード順に
+並べた索引ファイルへ書き出す。索引はメモリマップして二分探索するため、
+数百万件でも常駐メモリはほとんど増えない。
+
+ファイル形式（すべてリトルエンディアン）::
+
+    ヘッダ   : MAGIC(8バイト) + 件数 n (uint64)
+    キー     : バーコードの数値 uint64 × n（昇順）
+    オフセット: 商品名の開始位置 uint64 × (n + 1)
+    商品名   : UTF-8 文字列を連結したもの
+
+使い方::
+
+    python -m fridge.offline_index openfoodfacts-products.jsonl.gz -o off_index.bin
+"""
+import argparse
+import csv
+import gzip
+import heapq
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+
+import numpy as np
+
+from fridge.barcode import extract_product_name
+
+MAGIC = b"OFFIDX1\0"
+HEADER = struct.Struct("<8sQ")
+
+# 索引ファイルの場所（環境変数で変更できる）
+DEFAULT_INDEX_PATH = os.environ.get("FRIDGE_OFF_INDEX_PATH", "off_index.bin")
+
+# 一度にメモリ上で並べ替える件数
+CHUNK_SIZE = 500_000
+
+NAME_FIELDS = ("product_name_ja", "product_name", "product_name_en")
+
+
+def barcode_key(barcode):
+    """バーコード文字列を索引のキー（整数）にする。数字以外を含む場合は None"""
+    barcode = str(barcode).strip()
+    if not barcode.isdigit() or len(barcode) > 19:
+        return None
+    return int(barcode)
+
+
+def _open_text(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def iter_dump_products(path):
+    """ダンプから (バーコード, 商品名) を1件ずつ取り出す"""
+    with _open_text(path) as f:
+        if ".json" in os.path.basename(path):
+            for line in f:
+                try:
+                    product = json.loads(line)
+                except ValueError:
+                    continue
+                yield product.get("code"), extract_product_name(
+                    {field: product.get(field) for field in NAME_FIELDS}
+                )
+        else:
+            header = f.readline()
+            delimiter = "\t" if "\t" in header else ","
+            columns = next(csv.reader([header], delimiter=delimiter))
+            csv.field_size_limit(2 ** 31 - 1)
+            for row in csv.DictReader(f, fieldnames=columns, delimiter=delimiter):
+                yield row.get("code"), extract_product_name(
+                    {field: row.get(field) for field in NAME_FIELDS}
+                )
+
+
+def _write_run(entries, directory):
+    """並べ替えた (キー, 商品名) を一時ファイルに書き出す"""
+    entries.sort(key=lambda entry: entry[0])
+    run = tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=directory, suffix=".run", delete=False
+    )
+    with run:
+        for key, name in entries:
+            run.write(f"{key}\t{name}\n")
+    return run.name
+
+
+def _read_run(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            key, name = line.rstrip("\n").split("\t", 1)
+            yield int(key), name
+
+
+def import_dump(source_path, index_path=DEFAULT_INDEX_PATH, chunk_size=CHUNK_SIZE):
+    """ダンプを読み込んで索引ファイルを作る。登録した件数を返す"""
+    directory = os.path.dirname(os.path.abspath(index_path))
+    with tempfile.TemporaryDirectory(dir=directory) as work:
+        # 1. 一定件数ごとに並べ替えて一時ファイルに書き出す
+        runs = []
+        entries = []
+        for barcode, name in iter_dump_products(source_path):
+            key = barcode_key(barcode) if barcode else None
+            if key is None or not name:
+                continue
+            entries.append((key, " ".join(name.split())))
+            if len(entries) >= chunk_size:
+                runs.append(_write_run(entries, work))
+                entries = []
+        if entries:
+            runs.append(_write_run(entries, work))
+
+        # 2. マージしながらキー・オフセット・商品名を別々に書き出す（重複は先勝ち）
+        keys_path = os.path.join(work, "keys")
+        offsets_path = os.path.join(work, "offsets")
+        names_path = os.path.join(work, "names")
+        count = 0
+        offset = 0
+        last_key = None
+        with open(keys_path, "wb") as keys, open(offsets_path, "wb") as offsets, \
+                open(names_path, "wb") as names:
+            for key, name in heapq.merge(*(_read_run(run) for run in runs), key=lambda entry: entry[0]):
+                if key == last_key:
+                    continue
+                last_key = key
+                encoded = name.encode("utf-8")
+                keys.write(struct.pack("<Q", key))
+                offsets.write(struct.pack("<Q", offset))
+                names.write(encoded)
+                offset += len(encoded)
+                count += 1
+            offsets.write(struct.pack("<Q", offset))
+
+        # 3. ヘッダを付けて1つのファイルにまとめ、置き換える
+        tmp_index = os.path.join(work, "index")
+        with open(tmp_index, "wb") as out:
+            out.write(HEADER.pack(MAGIC, count))
+            for part in (keys_path, offsets_path, names_path):
+                with open(part, "rb") as f:
+                    shutil.copyfileobj(f, out)
+        os.replace(tmp_index, index_path)
+    return count
+
+
+class OfflineBarcodeIndex:
+    """メモリマップした索引ファイルを二分探索して商品名を引く"""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"バーコード索引ファイルではありません: {path}")
+        self.count = count
+        self._keys = np.frombuffer(self._mmap, dtype="<u8", count=count, offset=HEADER.size)
+        self._offsets = np.frombuffer(
+            self._mmap, dtype="<u8", count=count + 1, offset=HEADER.size + 8 * count
+        )
+        self._names_start = HEADER.size + 8 * count + 8 * (count + 1)
+
+    def __len__(self):
+        return self.count
+
+    def lookup(self, barcode):
+        """商品名を返す。索引に無ければ None"""
+        key = barcode_key(barcode)
+        if key is None or self.count == 0:
+            return None
+        position = int(np.searchsorted(self._keys, np.uint64(key)))
+        if position >= self.count or int(self._keys[position]) != key:
+            return None
+        start = self._names_start + int(self._offsets[position])
+        end = self._names_start + int(self._offsets[position + 1])
+        return self._mmap[start:end].decode("utf-8")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Open Food Facts のダンプからオフライン用のバーコード索引を作る")
+    parser.add_argument("dump", help="JSONL または CSV/TSV のダンプファイル（.gz 可）")
+    parser.add_argument("-o", "--output", default=DEFAULT_INDEX_PATH, help="索引ファイルの出力先")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="一度に並べ替える件数")
+    args = parser.parse_args(argv)
+
+    count = import_dump(args.dump, args.output, chunk_size=args.chunk_size)
+    print(f"{count}件の商品を {args.output} に書き出しました")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
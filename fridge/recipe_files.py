@@ -0,0 +1,198 @@
+"""レシピをデータファイル（JSON / YAML）から読み込む
+
+レシピのディレクトリ（既定は recipes/）にある *.json / *.yaml / *.yml を読み、組み込みの
+レシピ（RECIPE_DATA）に足したカタログを作る。同じ名前のレシピはファイルの方を使う。
+ファイルの書き方は RECIPE_DATA と同じで、レシピ名 → 内容の辞書か、name を持つ辞書のリスト::
+
+    ポテトサラダ:
+      required: [じゃがいも]
+      optional: [きゅうり, ハム]
+      keywords: [にんじん, 玉ねぎ]
+      type: [洋食, 簡単レシピ]
+      time: 20分
+      servings: 2人分
+      difficulty: ⭐ 簡単
+      ingredients: ["{selected_items}", マヨネーズ 大さじ3]
+      steps: [じゃがいもをゆでてつぶす, 具材と和える]
+      tips: 熱いうちに下味をつけると味がなじみます。
+
+作ったカタログ（転置インデックスとマッチャーを含む）は、ファイルの内容のハッシュを名前にした
+バイナリファイルに保存し、次の起動では読み込みと索引作りを省く。
+RecipeSource はファイルの更新時刻を見て、変わっていればカタログを作り直す。
+"""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+
+from fridge.recipes import CATALOG, RECIPE_DATA, SELECTED_ITEMS, RecipeCatalog
+
+# レシピファイルのディレクトリとカタログのキャッシュの場所（環境変数で変更できる）
+RECIPE_DIR = os.environ.get("FRIDGE_RECIPE_DIR", "recipes")
+CACHE_DIR = os.environ.get("FRIDGE_RECIPE_CACHE_DIR", ".recipe_cache")
+
+EXTENSIONS = (".json", ".yaml", ".yml")
+
+# キャッシュの形式（RecipeCatalog の中身を変えたら増やす）
+CACHE_FORMAT = 3
+
+LIST_FIELDS = ("required", "optional", "keywords", "type", "ingredients", "steps")
+TEXT_FIELDS = ("time", "servings", "difficulty", "tips")
+
+
+def recipe_files(directory=RECIPE_DIR):
+    """ディレクトリにあるレシピファイルを名前順に返す（ディレクトリが無ければ空）"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(EXTENSIONS) and not name.startswith(".")
+    )
+
+
+def _parse(path, content):
+    """JSON / YAML として読む。構文の誤りは ValueError にする"""
+    if path.lower().endswith(".json"):
+        try:
+            return json.loads(content)
+        except ValueError as e:
+            raise ValueError(f"{path}: 読み込めませんでした: {e}") from e
+    try:
+        import yaml
+    except ImportError as e:
+        raise ValueError(f"YAML のレシピを読むには PyYAML が必要です: {path}") from e
+    try:
+        return yaml.safe_load(content)
+    except yaml.YAMLError as e:
+        raise ValueError(f"{path}: 読み込めませんでした: {e}") from e
+
+
+def _check_recipe(path, name, data):
+    """1つのレシピの項目をそろえる（材料を省略したら選択した食材だけにする）"""
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: {name}: レシピは辞書で書いてください")
+    unknown = set(data) - set(LIST_FIELDS) - set(TEXT_FIELDS) - {"name"}
+    if unknown:
+        raise ValueError(f"{path}: {name}: 知らない項目があります: {', '.join(sorted(unknown))}")
+    recipe = {"ingredients": [SELECTED_ITEMS], "tips": ""}
+    for field in LIST_FIELDS:
+        value = data.get(field, recipe.get(field, []))
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            raise ValueError(f"{path}: {name}: {field} は文字列のリストで書いてください")
+        recipe[field] = value
+    for field in TEXT_FIELDS:
+        value = data.get(field, recipe.get(field, ""))
+        if not isinstance(value, str):
+            raise ValueError(f"{path}: {name}: {field} は文字列で書いてください")
+        recipe[field] = value
+    if not recipe["steps"]:
+        raise ValueError(f"{path}: {name}: steps（作り方）がありません")
+    return recipe
+
+
+def parse_recipe_file(path, content):
+    """ファイルの内容から {レシピ名: レシピ} を作る。書き方が正しくなければ ValueError"""
+    data = _parse(path, content)
+    if isinstance(data, list):
+        entries = []
+        for entry in data:
+            if not isinstance(entry, dict) or not entry.get("name"):
+                raise ValueError(f"{path}: リストで書くときは、各レシピに name を書いてください")
+            entries.append((entry["name"], entry))
+    elif isinstance(data, dict):
+        entries = list(data.items())
+    else:
+        raise ValueError(f"{path}: レシピの辞書かリストを書いてください")
+    return {str(name): _check_recipe(path, name, recipe) for name, recipe in entries}
+
+
+def load_catalog(paths, cache_dir=CACHE_DIR):
+    """組み込みのレシピとファイルからカタログを作る
+
+    ファイルの内容が同じなら、前に保存したバイナリのカタログを読み込むだけで済ませる。
+    """
+    contents = []
+    for path in paths:
+        with open(path, "rb") as f:
+            contents.append((path, f.read()))
+    if not contents:
+        return CATALOG
+
+    digest = hashlib.sha256(f"{CACHE_FORMAT}\0{CATALOG.version}".encode())
+    for path, content in contents:
+        digest.update(os.path.basename(path).encode("utf-8") + b"\0" + content + b"\0")
+    cache_path = os.path.join(cache_dir, f"catalog-{digest.hexdigest()[:16]}.pickle") if cache_dir else None
+
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                catalog = pickle.load(f)
+            if isinstance(catalog, RecipeCatalog):
+                return catalog
+        except Exception:
+            pass  # 壊れたキャッシュは作り直す
+
+    recipes = dict(RECIPE_DATA)
+    for path, content in contents:
+        recipes.update(parse_recipe_file(path, content.decode("utf-8")))
+    catalog = RecipeCatalog(recipes)
+
+    if cache_path:
+        _write_cache(cache_path, catalog)
+    return catalog
+
+
+def _write_cache(cache_path, catalog):
+    """カタログを一時ファイルに書いてから置き換え、古いキャッシュを消す"""
+    directory = os.path.dirname(cache_path)
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile("wb", dir=directory, suffix=".tmp", delete=False) as f:
+        pickle.dump(catalog, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f.name, cache_path)
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith("catalog-") and path != cache_path:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class RecipeSource:
+    """レシピファイルから作ったカタログを返す。ファイルが変わっていたら作り直す
+
+    ファイルの一覧・更新時刻・サイズを毎回調べるだけなので、画面の再実行ごとに呼んでよい。
+    ファイルに誤りがあるときは前のカタログを使い続け、error に理由を入れる。
+    """
+
+    def __init__(self, directory=RECIPE_DIR, cache_dir=CACHE_DIR):
+        self.directory = directory
+        self.cache_dir = cache_dir
+        self.error = None
+        self._catalog = CATALOG
+        self._signature = ()
+        self._lock = threading.Lock()
+
+    def _current_signature(self):
+        signature = []
+        for path in recipe_files(self.directory):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def catalog(self):
+        signature = self._current_signature()
+        with self._lock:
+            if signature != self._signature:
+                try:
+                    self._catalog = load_catalog([path for path, _, _ in signature], self.cache_dir)
+                    self.error = None
+                except (OSError, ValueError) as e:
+                    self.error = str(e)
+                self._signature = signature
+            return self._catalog
@@ -0,0 +1,700 @@
+"""レシピデータベースとレシピ提案ロジック
+
+レシピカタログはインポート時に一度だけ構築され、以降は読み取り専用で共有される。
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+from fridge.matcher import KeywordMatcher, NgramIndex
+from fridge.normalize import ALIASES, normalize_name
+
+# 材料リストの中で、選択された食材（「〇〇 適量」）に展開される位置を示す目印
+SELECTED_ITEMS = "{selected_items}"
+
+# 食材名ごとのマッチ結果を覚えておく件数の上限（超えたら捨てて覚え直す）
+MATCH_CACHE_SIZE = 4096
+
+# 大幅に拡充したレシピデータベース
+RECIPE_DATA = {
+    # 和食
+    "野菜炒め": {
+        "required": ["野菜"],
+        "optional": ["肉", "豚肉", "鶏肉", "牛肉"],
+        "keywords": ["キャベツ", "ピーマン", "玉ねぎ", "にんじん", "もやし", "ネギ", "ニラ"],
+        "type": ["和食", "簡単レシピ"],
+        "time": "15分",
+        "servings": "2人分",
+        "difficulty": "⭐ 簡単",
+        "ingredients": [SELECTED_ITEMS, "醤油 大さじ1", "酒 大さじ1", "塩こしょう 少々", "サラダ油 大さじ1"],
+        "steps": [
+            "野菜を食べやすい大きさに切る",
+            "フライパンに油を熱し、火が通りにくいものから炒める",
+            "全体に火が通ったら、醤油・酒・塩こしょうで味付けする",
+            "強火でサッと炒めて完成"
+        ],
+        "tips": "野菜は大きさを揃えて切ると、火の通りが均一になります。"
+    },
+    "具だくさん味噌汁": {
+        "required": ["野菜"],
+        "optional": ["豆腐", "わかめ", "油揚げ"],
+        "keywords": ["キャベツ", "大根", "にんじん", "じゃがいも", "玉ねぎ", "ネギ"],
+        "type": ["和食", "簡単レシピ"],
+        "time": "20分",
+        "servings": "3-4人分",
+        "difficulty": "⭐ 簡単",
+        "ingredients": [SELECTED_ITEMS, "水 800ml", "だしの素 小さじ2", "味噌 大さじ3"],
+        "steps": [
+            "野菜を一口大に切る",
+            "鍋に水とだしの素を入れて沸騰させる",
+            "火が通りにくい野菜から順に入れて煮る",
+            "全ての野菜が柔らかくなったら、味噌を溶き入れる",
+            "ひと煮立ちしたら完成"
+        ],
+        "tips": "味噌は沸騰させると香りが飛ぶので、火を止める直前に入れましょう。"
+    },
+    "肉じゃが": {
+        "required": ["じゃがいも", "肉"],
+        "optional": ["にんじん", "玉ねぎ"],
+        "keywords": ["牛肉", "豚肉"],
+        "type": ["和食"],
+        "time": "30分",
+        "servings": "3-4人分",
+        "difficulty": "⭐⭐ 普通",
+        "ingredients": [SELECTED_ITEMS, "醤油 大さじ3", "砂糖 大さじ2", "みりん 大さじ2", "だし汁 400ml"],
+        "steps": [
+            "じゃがいも・にんじん・玉ねぎを一口大に切る",
+            "鍋に油を熱し、肉を炒める",
+            "野菜を加えて軽く炒める",
+            "だし汁と調味料を加えて20分ほど煮込む",
+            "じゃがいもが柔らかくなったら完成"
+        ],
+        "tips": "じゃがいもは煮崩れしにくいメークインがおすすめです。"
+    },
+    "親子丼": {
+        "required": ["鶏肉", "卵"],
+        "optional": ["玉ねぎ", "ネギ"],
+        "keywords": [],
+        "type": ["和食", "簡単レシピ"],
+        "time": "15分",
+        "servings": "2人分",
+        "difficulty": "⭐ 簡単",
+        "ingredients": [SELECTED_ITEMS, "ご飯 2膳", "醤油 大さじ2", "みりん 大さじ2", "砂糖 大さじ1", "だし汁 100ml"],
+        "steps": [
+            "玉ねぎをスライスし、鶏肉は一口大に切る",
+            "フライパンにだし汁と調味料を入れて煮立てる",
+            "鶏肉と玉ねぎを加えて煮る",
+            "溶き卵を回し入れ、半熟になったらご飯にのせる"
+        ],
+        "tips": "卵は2回に分けて入れると、ふわふわに仕上がります。"
+    },
+    "他人丼": {
+        "required": ["豚肉", "卵"],
+        "optional": ["玉ねぎ", "ネギ"],
+        "keywords": [],
+        "type": ["和食", "簡単レシピ"],
+        "time": "15分",
+        "servings": "2人分",
+        "difficulty": "⭐ 簡単",
+        "ingredients": [SELECTED_ITEMS, "ご飯 2膳", "醤油 大さじ2", "みりん 大さじ2", "砂糖 大さじ1", "だし汁 100ml"],
+        "steps": [
+            "玉ねぎをスライスし、豚肉は食べやすく切る",
+            "フライパンにだし汁と調味料を入れて煮立てる",
+            "豚肉と玉ねぎを加えて煮る",
+            "溶き卵を回し入れ、半熟になったらご飯にのせる"
+        ],
+        "tips": "豚肉でも親子丼のような味わいが楽しめます。"
+    },
+    "豚の生姜焼き": {
+        "required": ["豚肉"],
+        "optional": ["玉ねぎ", "キャベツ"],
+        "keywords": [],
+        "type": ["和食", "簡単レシピ"],
+        "time": "15分",
+        "servings": "2人分",
+        "difficulty": "⭐ 簡単",
+        "ingredients": [SELECTED_ITEMS, "醤油 大さじ2", "みりん 大さじ2", "生姜 1片", "サラダ油 大さじ1"],
+        "steps": [
+            "豚肉に塩こしょうをふる",
+            "生姜をすりおろし、調味料と混ぜる",
+            "フライパンで豚肉を焼く",
+            "タレを加えて絡める"
+        ],
+        "tips": "生姜は多めに入れると風味が増します。"
+    },
+    "卵焼き": {
+        "required": ["卵"],
+        "optional": ["ネギ", "チーズ"],
+        "keywords": [],
+        "type": ["和食", "簡単レシピ"],
+        "time": "10分",
+        "servings": "2人分",
+        "difficulty": "⭐⭐ 普通",
+        "ingredients": [SELECTED_ITEMS, "砂糖 大さじ1", "醤油 小さじ1", "だし汁 大さじ2", "サラダ油 適量"],
+        "steps": [
+            "卵を溶きほぐし、調味料を混ぜる",
+            "卵焼き器に油を薄く引き、卵液を1/3流し込む",
+            "半熟になったら手前に巻く",
+            "同じ作業を繰り返して厚みを出す"
+        ],
+        "tips": "火加減は中火で、焦げないように注意しましょう。"
+    },
+    "豚汁": {
+        "required": ["豚肉", "野菜"],
+        "optional": ["大根", "にんじん", "ごぼう", "こんにゃく", "豆腐"],
+        "keywords": [],
+        "type": ["和食"],
+        "time": "25分",
+        "servings": "4人分",
+        "difficulty": "⭐ 簡単",
+        "ingredients": [SELECTED_ITEMS, "だし汁 800ml", "味噌 大さじ3", "ごま油 大さじ1"],
+        "steps": [
+            "野菜を一口大に切る",
+            "鍋にごま油を熱し、豚肉を炒める",
+            "野菜とだし汁を加えて煮る",
+            "味噌を溶き入れる"
+        ],
+        "tips": "具だくさんで栄養満点の定番料理です。"
+    },
+    # 中華・アジア
+    "簡単チャーハン": {
+        "required": ["卵"],
+        "optional": ["肉", "ハム", "ソーセージ", "ネギ", "野菜"],
+        "keywords": ["玉ねぎ", "にんじん", "ピーマン"],
+        "type": ["中華", "簡単レシピ"],
+        "time": "10分",
+        "servings": "2人分",
+        "difficulty": "⭐⭐ 普通",
+        "ingredients": ["ご飯 2膳分", SELECTED_ITEMS, "醤油 大さじ1", "塩こしょう 少々", "ごま油 大さじ1", "中華スープの素 小さじ1"],
+        "steps": [
+            "材料を細かく刻む",
+            "フライパンを強火で熱し、ごま油を入れる",
+            "溶き卵を入れてすぐにご飯を加え、パラパラになるまで炒める",
+            "野菜や肉を加えてさらに炒める",
+            "醤油、中華スープの素、塩こしょうで味付けして完成"
+        ],
+        "tips": "ご飯は冷ご飯を使うとパラパラに仕上がりやすいです。"
+    },
+    "麻婆豆腐": {
+        "required": ["豆腐", "ひき肉"],
+        "optional": ["ネギ"],
+        "keywords": ["肉"],
+        "type": ["中華"],
+        "time": "20分",
+        "servings": "2-3人分",
+        "difficulty": "⭐⭐ 普通",
+        "ingredients": [SELECTED_ITEMS, "豆板醤 大さじ1", "醤油 大さじ1", "鶏ガラスープ 200ml", "片栗粉 大さじ1", "ごま油 少々", "にんにく 1片"],
+        "steps": [
+            "豆腐を2cm角に切り、下茹でする",
+            "フライパンでにんにくを炒め、肉を炒める",
+            "豆板醤を加えて香りを出す",
+            "スープと調味料を加えて煮立てる",
+            "豆腐を加えて煮込み、水溶き片栗粉でとろみをつける"
+        ],
+        "tips": "豆板醤の量で辛さを調整できます。"
+    },
+    "八宝菜": {
+        "required": ["野菜"],
+        "optional": ["肉", "豚肉", "海鮮"],
+        "keywords": ["キャベツ", "にんじん", "玉ねぎ", "ピーマン"],
+        "type": ["中華"],
+        "time": "20分",
+        "servings": "3-4人分",
+        "difficulty": "⭐⭐ 普通",
+        "ingredients": [SELECTED_ITEMS, "オイスターソース 大さじ1", "醤油 大さじ1", "鶏ガラスープ 150ml", "片栗粉 大さじ1", "ごま油 大さじ1"],
+        "steps": [
+            "材料を食べやすい大きさに切る",
+            "フライパンで肉を炒め、野菜を加える",
+            "スープと調味料を加えて炒め煮する",
+            "水溶き片栗粉でとろみをつけて完成"
+        ],
+        "tips": "具材はお好みで変更できます。"
+    },
+    "回鍋肉": {
+        "required": ["豚肉", "キャベツ"],
+        "optional": ["ピーマン", "ネギ"],
+        "keywords": [],
+        "type": ["中華"],
+        "time": "15分",
+        "servings": "2人分",
+        "difficulty": "⭐⭐ 普通",
+        "ingredients": [SELECTED_ITEMS, "甜麺醤 大さじ2", "醤油 大さじ1", "酒 大さじ1", "豆板醤 小さじ1", "ごま油 大さじ1"],
+        "steps": [
+            "豚肉とキャベツを食べやすい大きさに切る",
+            "フライパンで豚肉を炒める",
+            "キャベツと野菜を加えて炒める",
+            "調味料を加えて強火で炒め合わせる"
+        ],
+        "tips": "強火でサッと炒めるのがポイントです。"
+    },
+    "餃子": {
+        "required": ["ひき肉", "キャベツ"],
+        "optional": ["ニラ", "ネギ"],
+        "keywords": [],
+        "type": ["中華"],
+        "time": "30分",
+        "servings": "30個分",
+        "difficulty": "⭐⭐⭐ 普通",
+        "ingredients": [SELECTED_ITEMS, "餃子の皮 30枚", "にんにく 1片", "生姜 1片", "醤油 大さじ1", "ごま油 大さじ1"],
+        "steps": [
+            "キャベツをみじん切りにして塩もみする",
+            "水気を絞ってひき肉と調味料を混ぜる",
+            "皮で包む",
+            "フライパンで焼く"
+        ],
+        "tips": "皮の縁に水をつけるとしっかり閉じられます。"
+    },
+    # 洋食
+    "オムレツ": {
+        "required": ["卵"],
+        "optional": ["チーズ", "ハム", "野菜"],
+        "keywords": ["玉ねぎ", "ピーマン", "トマト"],
+        "type": ["洋食", "簡単レシピ"],
+        "time": "10分",
+        "servings": "1-2人分",
+        "difficulty": "⭐⭐ 普通",
+        "ingredients": [SELECTED_ITEMS, "牛乳 大さじ2", "バター 10g", "塩こしょう 少々"],
+        "steps": [
+            "卵を溶きほぐし、牛乳、塩こしょうを混ぜる",
+            "具材は細かく刻んでおく",
+            "フライパンにバターを溶かし、卵液を流し込む",
+            "半熟になったら具材をのせて半分に折る"
+        ],
+        "tips": "火は中火より少し弱めで、ゆっくり焼くとふわふわに仕上がります。"
+    },
+    "トマトパスタ": {
+        "required": ["トマト"],
+        "optional": ["ベーコン", "ツナ", "野菜", "玉ねぎ"],
+        "keywords": [],
+        "type": ["洋食"],
+        "time": "20分",
+        "servings": "2人分",
+        "difficulty": "⭐ 簡単",
+        "ingredients": ["パスタ 200g", SELECTED_ITEMS, "にんにく 1片", "オリーブオイル 大さじ2", "塩こしょう 少々"],
+        "steps": [
+            "パスタを茹で始める",
+            "にんにくをみじん切りにし、オリーブオイルで炒める",
+            "トマトと具材を加えて煮込む",
+            "茹でたパスタを加えて和え、塩こしょうで味を整える"
+        ],
+        "tips": "パスタの茹で汁を少し加えると、ソースがよく絡みます。"
+    },
+    "カルボナーラ": {
+        "required": ["卵", "ベーコン"],
+        "optional": ["チーズ"],
+        "keywords": ["ハム"],
+        "type": ["洋食"],
+        "time": "20分",
+        "servings": "2人分",
+        "difficulty": "⭐⭐ 普通",
+        "ingredients": ["パスタ 200g", SELECTED_ITEMS, "生クリーム 100ml", "粉チーズ 大さじ3", "塩こしょう 少々"],
+        "steps": [
+            "パスタを茹でる",
+            "ベーコンを炒める",
+            "ボウルに卵、生クリーム、チーズを混ぜる",
+            "茹でたパスタをベーコンと混ぜ、火を止めて卵液を加える"
+        ],
+        "tips": "卵液は火を止めてから加えないと固まってしまいます。"
+    },
+    "クリームシチュー": {
+        "required": ["野菜"],
+        "optional": ["じゃがいも", "にんじん", "玉ねぎ", "肉", "鶏肉"],
+        "keywords": [],
+        "type": ["洋食"],
+        "time": "30分",
+        "servings": "3-4人分",
+        "difficulty": "⭐⭐ 普通",
+        "ingredients": [SELECTED_ITEMS, "牛乳 400ml", "シチューのルー 1/2箱", "バター 20g", "水 400ml"],
+        "steps": [
+            "材料を一口大に切る",
+            "鍋にバターを溶かし、肉と野菜を炒める",
+            "水を加えて20分ほど煮込む",
+            "ルーと牛乳を加えてとろみがつくまで煮る"
+        ],
+        "tips": "ルーを入れる前に一度火を止めると、ダマになりにくいです。"
+    },
+    "ハンバーグ": {
+        "required": ["ひき肉", "卵"],
+        "optional": ["玉ねぎ"],
+        "keywords": ["肉"],
+        "type": ["洋食"],
+        "time": "30分",
+        "servings": "3-4個分",
+        "difficulty": "⭐⭐⭐ 普通",
+        "ingredients": [SELECTED_ITEMS, "パン粉 大さじ3", "牛乳 大さじ2", "塩こしょう 少々", "ソース 適量"],
+        "steps": [
+            "玉ねぎをみじん切りにして炒め、冷ます",
+            "ひき肉に卵、パン粉、牛乳、玉ねぎ、調味料を混ぜる",
+            "よく練って小判型に成形する",
+            "フライパンで両面を焼き、蓋をして中まで火を通す"
+        ],
+        "tips": "タネを冷蔵庫で30分寝かせると、成形しやすくなります。"
+    },
+    "ポークソテー": {
+        "required": ["豚肉"],
+        "optional": ["野菜"],
+        "keywords": [],
+        "type": ["洋食", "簡単レシピ"],
+        "time": "15分",
+        "servings": "2人分",
+        "difficulty": "⭐ 簡単",
+        "ingredients": [SELECTED_ITEMS, "塩こしょう 少々", "小麦粉 適量", "バター 10g"],
+        "steps": [
+            "豚肉に塩こしょうをして小麦粉をまぶす",
+            "フライパンで両面を焼く",
+            "バターで味付け"
+        ],
+        "tips": "肉の筋を切っておくと縮みにくいです。"
+    },
+    # その他・スープ
+    "野菜スープ": {
+        "required": ["野菜"],
+        "optional": ["キャベツ", "にんじん", "玉ねぎ", "じゃがいも", "トマト"],
+        "keywords": [],
+        "type": ["簡単レシピ"],
+        "time": "20分",
+        "servings": "3-4人分",
+        "difficulty": "⭐ 簡単",
+        "ingredients": [SELECTED_ITEMS, "水 800ml", "コンソメ 2個", "塩こしょう 少々", "オリーブオイル 大さじ1"],
+        "steps": [
+            "野菜を一口大に切る",
+            "鍋にオリーブオイルを熱し、野菜を軽く炒める",
+            "水とコンソメを加えて15分ほど煮込む",
+            "塩こしょうで味を整えて完成"
+        ],
+        "tips": "余った野菜を何でも入れられる、冷蔵庫整理にぴったりのレシピです。"
+    },
+    "中華スープ": {
+        "required": ["野菜"],
+        "optional": ["卵", "豆腐", "わかめ", "ネギ"],
+        "keywords": [],
+        "type": ["中華", "簡単レシピ"],
+        "time": "15分",
+        "servings": "3-4人分",
+        "difficulty": "⭐ 簡単",
+        "ingredients": [SELECTED_ITEMS, "水 800ml", "鶏ガラスープの素 大さじ2", "醤油 小さじ1", "ごま油 少々"],
+        "steps": [
+            "野菜を食べやすい大きさに切る",
+            "鍋に水と鶏ガラスープの素を入れて沸騰させる",
+            "野菜を加えて煮る",
+            "醤油とごま油で味を整える"
+        ],
+        "tips": "溶き卵を加えると卵スープになります。"
+    },
+    "ポテトサラダ": {
+        "required": ["じゃがいも"],
+        "optional": ["きゅうり", "にんじん", "ハム", "卵"],
+        "keywords": [],
+        "type": ["簡単レシピ"],
+        "time": "20分",
+        "servings": "3-4人分",
+        "difficulty": "⭐ 簡単",
+        "ingredients": [SELECTED_ITEMS, "マヨネーズ 大さじ3", "塩こしょう 少々", "酢 小さじ1"],
+        "steps": [
+            "じゃがいもを茹でて潰す",
+            "他の具材を細かく切る",
+            "すべてを混ぜ、マヨネーズと調味料で味付け"
+        ],
+        "tips": "じゃがいもは熱いうちに潰すと滑らかになります。"
+    },
+    "サラダ": {
+        "required": ["野菜"],
+        "optional": ["レタス", "キャベツ", "トマト", "きゅうり", "にんじん", "卵"],
+        "keywords": [],
+        "type": ["簡単レシピ"],
+        "time": "5分",
+        "servings": "2-3人分",
+        "difficulty": "⭐ 簡単",
+        "ingredients": [SELECTED_ITEMS, "ドレッシング お好みで"],
+        "steps": [
+            "野菜をよく洗う",
+            "食べやすい大きさに切る",
+            "お皿に盛り付け、ドレッシングをかける"
+        ],
+        "tips": "野菜は冷水に浸すとシャキッとします。"
+    },
+    "唐揚げ": {
+        "required": ["鶏肉"],
+        "optional": [],
+        "keywords": [],
+        "type": ["簡単レシピ"],
+        "time": "30分",
+        "servings": "2-3人分",
+        "difficulty": "⭐⭐ 普通",
+        "ingredients": [SELECTED_ITEMS, "醤油 大さじ2", "酒 大さじ1", "にんにく 1片", "生姜 1片", "片栗粉 適量", "揚げ油 適量"],
+        "steps": [
+            "鶏肉を一口大に切る",
+            "醤油、酒、にんにく、生姜で下味をつけて15分置く",
+            "片栗粉をまぶす",
+            "170度の油で揚げる"
+        ],
+        "tips": "二度揚げするとカリッと仕上がります。"
+    },
+    "焼きそば": {
+        "required": ["野菜"],
+        "optional": ["肉", "キャベツ", "もやし", "豚肉"],
+        "keywords": [],
+        "type": ["簡単レシピ"],
+        "time": "15分",
+        "servings": "2人分",
+        "difficulty": "⭐ 簡単",
+        "ingredients": ["焼きそば麺 2玉", SELECTED_ITEMS, "焼きそばソース 適量", "サラダ油 大さじ1"],
+        "steps": [
+            "材料を食べやすく切る",
+            "フライパンで肉と野菜を炒める",
+            "麺を加えて炒める",
+            "ソースで味付けして完成"
+        ],
+        "tips": "麺を入れる前に少し水を加えるとほぐれやすいです。"
+    },
+    "お好み焼き": {
+        "required": ["キャベツ", "卵"],
+        "optional": ["豚肉", "エビ", "イカ"],
+        "keywords": [],
+        "type": ["簡単レシピ"],
+        "time": "20分",
+        "servings": "2枚分",
+        "difficulty": "⭐⭐ 普通",
+        "ingredients": [SELECTED_ITEMS, "お好み焼き粉 100g", "水 100ml", "ソース 適量", "マヨネーズ 適量"],
+        "steps": [
+            "キャベツを千切りにする",
+            "粉と水、卵を混ぜ、キャベツと具材を加える",
+            "フライパンで両面を焼く",
+            "ソースとマヨネーズをかける"
+        ],
+        "tips": "生地は混ぜすぎないのがふんわり仕上げるコツです。"
+    }
+}
+
+
+# 食材リストを生成するヘルパー関数
+def make_ingredients(items):
+    return [f"{item} 適量" for item in items]
+
+
+def _freeze_recipe(data):
+    """レシピの各リストをタプルにして読み取り専用にする"""
+    frozen = {key: tuple(value) if isinstance(value, list) else value for key, value in data.items()}
+    for key in ("required", "optional", "keywords", "type"):
+        frozen.setdefault(key, ())
+    return MappingProxyType(frozen)
+
+
+class RecipeCatalog:
+    """不変のレシピカタログと、キーワード→レシピの転置インデックス"""
+
+    def __init__(self, recipes):
+        self.recipes = MappingProxyType({name: _freeze_recipe(data) for name, data in recipes.items()})
+        self.names = tuple(self.recipes)
+
+        # 内容から決まるバージョン（レシピが変われば別の値になる）
+        # 別名辞書が変わればマッチ結果も変わるので、辞書もバージョンに含める
+        content = json.dumps([recipes, ALIASES], ensure_ascii=False, sort_keys=True)
+        self.version = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+        # レシピごとのマッチ対象キーワード（normalize_name で表記をそろえたもの）
+        self.required = tuple(
+            tuple(normalize_name(req) for req in data["required"]) for data in self.recipes.values()
+        )
+        self.match_keywords = tuple(
+            tuple(normalize_name(keyword) for keyword in data["keywords"] + data["required"] + data["optional"])
+            for data in self.recipes.values()
+        )
+
+        # キーワード → そのキーワードを持つレシピの位置（カタログ順）
+        index = {}
+        for position, keywords in enumerate(self.match_keywords):
+            for keyword in keywords:
+                index.setdefault(keyword, {})[position] = None
+        self.keyword_index = MappingProxyType({keyword: tuple(positions) for keyword, positions in index.items()})
+        self.matcher = KeywordMatcher(self.keyword_index)
+        self.fuzzy = NgramIndex(self.keyword_index)
+        self._match_cache = {}
+        self._match_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getstate__(self):
+        # MappingProxyType は pickle できないため、普通の dict にして保存する
+        state = dict(self.__dict__)
+        state["recipes"] = {name: dict(data) for name, data in self.recipes.items()}
+        state["keyword_index"] = dict(self.keyword_index)
+        # マッチ結果のキャッシュとロックは保存しない
+        state["_match_cache"] = {}
+        del state["_match_lock"]
+        return state
+
+    def __setstate__(self, state):
+        state["recipes"] = MappingProxyType(
+            {name: MappingProxyType(data) for name, data in state["recipes"].items()}
+        )
+        state["keyword_index"] = MappingProxyType(state["keyword_index"])
+        state["_match_lock"] = threading.Lock()
+        self.__dict__.update(state)
+
+    def match_item(self, item):
+        """食材名に一致するキーワードの集合を返す
+
+        表記をそろえた名前で、部分一致（KeywordMatcher）と n-gram の近似一致（NgramIndex）を
+        求める。結果はそろえた名前ごとに覚えておく。
+        """
+        name = normalize_name(item)
+        found = self._match_cache.get(name)
+        if found is None:
+            found = frozenset(self.matcher.find(name) | self.fuzzy.similar(name))
+            with self._match_lock:
+                if len(self._match_cache) >= MATCH_CACHE_SIZE:
+                    self._match_cache.clear()
+                self._match_cache[name] = found
+        return found
+
+    def match(self, items):
+        """食材ごとに、一致したキーワードの集合を返す"""
+        return [self.match_item(item) for item in items]
+
+
+CATALOG = RecipeCatalog(RECIPE_DATA)
+
+
+def _expand_ingredients(template, selected_items):
+    """材料テンプレートの目印を選択食材に置き換える"""
+    ingredients = []
+    for entry in template:
+        if entry == SELECTED_ITEMS:
+            ingredients.extend(make_ingredients(selected_items))
+        else:
+            ingredients.append(entry)
+    return ingredients
+
+
+# レシピ生成関数（大幅改善版）
+def generate_recipe_suggestions(selected_items, recipe_type, items_df, catalog=CATALOG):
+    """選択された食材からレシピを生成"""
+    recipes = []
+    items_str = "、".join(selected_items)
+    
+    # 各食材にマッチしたキーワードを一度だけ求め、必須判定・スコア・使用食材すべてに使う
+    # （表記ゆれは catalog.match の中でそろえる）
+    item_matches = catalog.match(selected_items)
+    matched_keywords = set().union(*item_matches)
+    
+    # レシピの位置 → そのレシピで使われる食材の番号（選択順）
+    used_by_recipe = {}
+    for item_index, keywords in enumerate(item_matches):
+        positions = set()
+        for keyword in keywords:
+            positions.update(catalog.keyword_index[keyword])
+        for position in positions:
+            used_by_recipe.setdefault(position, []).append(item_index)
+    
+    # レシピマッチングとスコアリング（キーワードを共有するレシピだけを調べる）
+    scored_recipes = []
+    for position in sorted(used_by_recipe):
+        recipe_data = catalog.recipes[catalog.names[position]]
+        
+        # 必須食材チェック
+        if not all(req in matched_keywords for req in catalog.required[position]):
+            continue  # 必須食材がない場合はスキップ
+        
+        # レシピタイプでのフィルタリング
+        if recipe_type != "おまかせ" and recipe_type not in recipe_data["type"]:
+            continue
+        
+        used_items = [selected_items[item_index] for item_index in used_by_recipe[position]]
+        scored_recipes.append({
+            "name": catalog.names[position],
+            "score": len(used_items),
+            "used_items": used_items,
+            "data": recipe_data
+        })
+    
+    # スコアでソートして上位を取得
+    scored_recipes.sort(key=lambda x: x["score"], reverse=True)
+    
+    # レシピを構築（材料リストはここで初めて組み立てる）
+    for scored in scored_recipes[:5]:  # 上位5つまで
+        recipe_data = scored["data"]
+        recipe = {
+            "title": scored["name"],
+            "time": recipe_data["time"],
+            "servings": recipe_data["servings"],
+            "difficulty": recipe_data["difficulty"],
+            "ingredients_used": scored["used_items"],
+            "ingredients": _expand_ingredients(recipe_data["ingredients"], selected_items),
+            "steps": list(recipe_data["steps"]),
+            "tips": recipe_data["tips"],
+            "match_count": scored["score"]
+        }
+        recipes.append(recipe)
+    
+    # デフォルトレシピ（マッチするものがない場合）
+    if not recipes:
+        recipes.append({
+            "title": f"{items_str}の炒め物",
+            "time": "15分",
+            "servings": "2人分",
+            "difficulty": "⭐ 簡単",
+            "ingredients_used": selected_items,
+            "ingredients": make_ingredients(selected_items) + ["醤油 大さじ1", "みりん 大さじ1", "サラダ油 大さじ1"],
+            "steps": [
+                "材料を食べやすい大きさに切る",
+                "フライパンに油を熱し、火が通りにくいものから順に炒める",
+                "醤油とみりんで味付けする",
+                "全体に味が馴染んだら完成"
+            ],
+            "tips": "余った食材を有効活用できる万能レシピです！",
+            "match_count": 0
+        })
+    
+    return recipes[:3]
+
+
+class SuggestionCache:
+    """レシピ提案の結果を覚えておく LRU キャッシュ（全セッションで共有する）
+
+    キーは (選択食材の frozenset, 料理のタイプ, カタログのバージョン)。
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        result = compute()
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+
+SUGGESTION_CACHE = SuggestionCache()
+
+
+def suggest_recipes(selected_items, recipe_type, catalog=CATALOG, cache=SUGGESTION_CACHE):
+    """generate_recipe_suggestions の結果をキャッシュして返す
+
+    選択食材は前後の空白を除いた集合として扱い、並び順によらず同じ結果を返す
+    （計算は食材名の昇順で行う）。返り値は共有されるため変更しないこと。
+    """
+    items = frozenset(item.strip() for item in selected_items if item.strip())
+    key = (items, recipe_type, catalog.version)
+    return cache.get_or_compute(
+        key, lambda: generate_recipe_suggestions(sorted(items), recipe_type, None, catalog)
+    )
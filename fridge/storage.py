@@ -0,0 +1,348 @@
+"""世帯・利用者と食材を保存する SQLite ストレージ"""
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+
+from fridge.inventory import InventoryArrays
+
+# データベースファイルの場所（環境変数で変更できる）
+DEFAULT_DB_PATH = os.environ.get("FRIDGE_DB_PATH", "fridge.db")
+
+# 食材1件分の項目（registered_by までが画面で扱う辞書のキー）
+ITEM_FIELDS = (
+    "name",
+    "barcode",
+    "purchase_date",
+    "expiry_date",
+    "category",
+    "quantity",
+    "registered_at",
+    "registered_by",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS households (
+    name TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0  -- 食材が変わるたびに増える
+);
+CREATE TABLE IF NOT EXISTS users (
+    name TEXT PRIMARY KEY,
+    household TEXT NOT NULL REFERENCES households(name),
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,  -- 削除後も再利用されない食材ID
+    household TEXT NOT NULL REFERENCES households(name) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    barcode TEXT NOT NULL,
+    purchase_date TEXT NOT NULL,
+    expiry_date TEXT NOT NULL,
+    category TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    registered_at TEXT NOT NULL,
+    registered_by TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_items_household_expiry ON items (household, expiry_date);
+CREATE INDEX IF NOT EXISTS idx_items_barcode ON items (barcode);
+"""
+
+# 世帯が無かったころ（食材を利用者ごとに持っていた）のデータベースを移行する。
+# 利用者1人ずつを、その人だけの世帯にする
+MIGRATE_PER_USER = f"""
+BEGIN IMMEDIATE;
+ALTER TABLE users RENAME TO users_old;
+ALTER TABLE items RENAME TO items_old;
+-- 索引は名前を変えても元のテーブルに付いたままなので、先に消してから新しいテーブルに作る
+DROP INDEX IF EXISTS idx_items_user_expiry;
+DROP INDEX IF EXISTS idx_items_barcode;
+{SCHEMA}
+INSERT INTO households (name, created_at, version) SELECT name, created_at, version FROM users_old;
+INSERT INTO users (name, household, created_at) SELECT name, name, created_at FROM users_old;
+INSERT INTO items (id, household, {', '.join(ITEM_FIELDS)})
+    SELECT id, user, {', '.join(ITEM_FIELDS)} FROM items_old;
+DELETE FROM sqlite_sequence WHERE name = 'items';
+UPDATE sqlite_sequence SET name = 'items' WHERE name = 'items_old';
+DROP TABLE items_old;
+DROP TABLE users_old;
+COMMIT;
+"""
+
+# iter_items で一度に読む件数
+CHUNK_SIZE = 10_000
+
+# ほかの接続が書き込み中のとき、待つ最大秒数
+BUSY_TIMEOUT = 10
+
+
+class InventoryConflict(Exception):
+    """画面に表示したあとに、同じ世帯の食材がほかの人に変更されていた"""
+
+
+class HouseholdExists(Exception):
+    """新しく作ろうとした世帯の名前が、すでにほかの世帯で使われている"""
+
+
+class Storage:
+    """SQLite（WAL モード）に世帯・利用者・食材を保存する
+
+    食材は世帯（1つの冷蔵庫）ごとに持ち、同じ世帯の利用者どうしで共有する。
+    接続はプールして使い回し、読み込みは複数のセッションから同時に行える。
+    書き込みは短いトランザクション1つで終わらせ、プロセス全体のロックは持たない。
+    世帯ごとのバージョン番号で、画面に表示した内容が古くなっていないかを確かめられる。
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._pool = []
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(items)")}
+            if "user" in columns:
+                # テーブルを作り直すあいだは外部キーの確認を止める
+                conn.execute("PRAGMA foreign_keys=OFF")
+                try:
+                    conn.executescript(MIGRATE_PER_USER)
+                except sqlite3.Error:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    raise
+                finally:
+                    conn.execute("PRAGMA foreign_keys=ON")
+            else:
+                conn.executescript(SCHEMA)
+
+    def close(self):
+        while self._pool:
+            self._pool.pop().close()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path, timeout=BUSY_TIMEOUT, check_same_thread=False, isolation_level=None
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        """プールから接続を1つ借りる（空いていなければ新しく開く）"""
+        try:
+            conn = self._pool.pop()
+        except IndexError:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            self._pool.append(conn)
+
+    @contextmanager
+    def _transaction(self):
+        """BEGIN〜COMMIT をまとめる（例外時は ROLLBACK）"""
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    # 世帯と利用者
+    def list_households(self):
+        """登録順に世帯名を返す"""
+        with self._connection() as conn:
+            rows = conn.execute("SELECT name FROM households ORDER BY rowid").fetchall()
+        return [row["name"] for row in rows]
+
+    def add_household(self, name):
+        """利用者のいない世帯を作る。すでにあれば False を返す"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO households (name, created_at) VALUES (?, ?)",
+                (name, datetime.now().strftime('%Y-%m-%d %H:%M')),
+            )
+        return cursor.rowcount == 1
+
+    def has_household(self, name):
+        """世帯が登録されていれば True"""
+        with self._connection() as conn:
+            return conn.execute("SELECT 1 FROM households WHERE name = ?", (name,)).fetchone() is not None
+
+    def list_users(self):
+        """登録順に利用者名を返す"""
+        with self._connection() as conn:
+            rows = conn.execute("SELECT name FROM users ORDER BY rowid").fetchall()
+        return [row["name"] for row in rows]
+
+    def add_user(self, name, household=None, join=False):
+        """利用者を世帯に登録する
+
+        join=False なら新しい世帯を作って登録する（household を省略すると本人の名前の世帯）。
+        同じ名前の世帯がすでにあれば、ほかの家族の冷蔵庫に入らないよう HouseholdExists を送出する。
+        join=True なら既存の世帯 household に加わる（世帯が無ければ ValueError）。
+        すでに登録済みの利用者なら何もせずに False を返す。
+        """
+        household = household or name
+        now = datetime.now().strftime('%Y-%m-%d %H:%M')
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM users WHERE name = ?", (name,)).fetchone():
+                return False
+            if join:
+                if not conn.execute("SELECT 1 FROM households WHERE name = ?", (household,)).fetchone():
+                    raise ValueError(f"世帯がありません: {household}")
+            else:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO households (name, created_at) VALUES (?, ?)", (household, now)
+                )
+                if cursor.rowcount != 1:
+                    raise HouseholdExists(f"世帯「{household}」はすでにあります。加わるときは一覧から選んでください")
+            conn.execute(
+                "INSERT INTO users (name, household, created_at) VALUES (?, ?, ?)", (name, household, now)
+            )
+        return True
+
+    def household_of(self, user):
+        """利用者の世帯名を返す。登録されていなければ None"""
+        with self._connection() as conn:
+            row = conn.execute("SELECT household FROM users WHERE name = ?", (user,)).fetchone()
+        return row["household"] if row else None
+
+    def household_members(self, household):
+        """世帯の利用者を登録順に返す"""
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT name FROM users WHERE household = ? ORDER BY rowid", (household,)
+            ).fetchall()
+        return [row["name"] for row in rows]
+
+    def inventory_version(self, household):
+        """世帯の食材が変更されるたびに増えるバージョン番号を返す"""
+        with self._connection() as conn:
+            return self._version(conn, household)
+
+    # 食材
+    def load_items(self, household):
+        """世帯の食材を登録順に返す（各辞書に id を含む）"""
+        with self._connection() as conn:
+            rows = conn.execute(
+                f"SELECT id, {', '.join(ITEM_FIELDS)} FROM items WHERE household = ? ORDER BY id",
+                (household,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def iter_items(self, household=None, chunk_size=CHUNK_SIZE):
+        """食材を (世帯, *ITEM_FIELDS) のタプルのリストで chunk_size 件ずつ返す
+
+        household を省略するとすべての世帯の食材を返す。読み込み中も書き込みは止めない。
+        """
+        query = f"SELECT household, {', '.join(ITEM_FIELDS)} FROM items"
+        params = ()
+        if household is not None:
+            query += " WHERE household = ?"
+            params = (household,)
+        with self._connection() as conn:
+            cursor = conn.execute(query + " ORDER BY id", params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [tuple(row) for row in rows]
+
+    def load_inventory(self, household):
+        """世帯の食材を列ごとの配列（InventoryArrays）で返す。日付は日数に変換して読む"""
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT id, name, barcode, "
+                "CAST(julianday(purchase_date) - 2440587.5 AS INTEGER), "
+                "CAST(julianday(expiry_date) - 2440587.5 AS INTEGER), "
+                "category, quantity, registered_at, registered_by "
+                "FROM items WHERE household = ? ORDER BY id",
+                (household,),
+            ).fetchall()
+        return InventoryArrays.from_rows(rows)
+
+    def iter_expiring(self, until, chunk_size=CHUNK_SIZE):
+        """すべての世帯の、賞味期限が until（'YYYY-MM-DD'）より前の食材を chunk_size 件ずつ返す
+
+        行は (世帯, id, 食材名, カテゴリ, 数量, 賞味期限の日数) のタプル。
+        """
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "SELECT household, id, name, category, quantity, "
+                "CAST(julianday(expiry_date) - 2440587.5 AS INTEGER) "
+                "FROM items WHERE expiry_date < ? ORDER BY id",
+                (until,),
+            )
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [tuple(row) for row in rows]
+
+    def list_members(self):
+        """{世帯: [利用者, ...]}（利用者は登録順）を返す"""
+        members = {}
+        with self._connection() as conn:
+            for row in conn.execute("SELECT name, household FROM users ORDER BY rowid"):
+                members.setdefault(row["household"], []).append(row["name"])
+        return members
+
+    def add_items(self, household, items):
+        """食材をまとめて1つのトランザクションで登録し、新しいバージョン番号を返す
+
+        追加はほかの人の変更とぶつからないため、バージョンは確かめない。
+        """
+        rows = [(household,) + tuple(item[field] for field in ITEM_FIELDS) for item in items]
+        with self._transaction() as conn:
+            conn.executemany(
+                f"INSERT INTO items (household, {', '.join(ITEM_FIELDS)}) "
+                f"VALUES (?, {', '.join('?' for _ in ITEM_FIELDS)})",
+                rows,
+            )
+            return self._bump_version(conn, household)
+
+    def delete_item(self, household, item_id):
+        """食材を1件削除する"""
+        return self.delete_items(household, [item_id])
+
+    def delete_items(self, household, item_ids):
+        """食材を ID でまとめて削除し、実際に削除した件数を返す
+
+        ID は再利用されないため、ほかの人が先に削除していた食材は数えないだけでよい。
+        """
+        rows = [(int(item_id), household) for item_id in item_ids]
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany("DELETE FROM items WHERE id = ? AND household = ?", rows)
+            deleted = conn.total_changes - before
+            if deleted:
+                self._bump_version(conn, household)
+        return deleted
+
+    def delete_all_items(self, household, expected_version=None):
+        """世帯の食材をすべて削除する
+
+        expected_version を渡すと、画面に表示したあとにほかの人が食材を変更していた場合は
+        何も削除せずに InventoryConflict を送出する（見ていない食材まで消さないため）。
+        """
+        with self._transaction() as conn:
+            if expected_version is not None:
+                version = self._version(conn, household)
+                if version != expected_version:
+                    raise InventoryConflict(
+                        f"{household} の食材はほかの人に変更されています"
+                        f"（表示: {expected_version}, 現在: {version}）"
+                    )
+            conn.execute("DELETE FROM items WHERE household = ?", (household,))
+            self._bump_version(conn, household)
+
+    def _version(self, conn, household):
+        row = conn.execute("SELECT version FROM households WHERE name = ?", (household,)).fetchone()
+        return row["version"] if row else 0
+
+    def _bump_version(self, conn, household):
+        conn.execute("UPDATE households SET version = version + 1 WHERE name = ?", (household,))
+        return self._version(conn, household)
@@ -0,0 +1,17 @@
+"""画面のスタイル（CSS）"""
+
+# ボタンや入力欄をスマートフォンでも押しやすい大きさにする
+CUSTOM_CSS = """
+<style>
+.big-font { font-size: 24px !important; font-weight: bold; }
+.warning-font { font-size: 28px !important; font-weight: bold; color: #ff4444; }
+.safe-font { font-size: 22px !important; color: #44ff44; }
+.stButton>button { font-size: 18px; padding: 15px 20px; width: 100%; min-height: 50px; border-radius: 10px; font-weight: bold; }
+@media (max-width: 768px) {
+    h1 { font-size: 28px !important; }
+    h2 { font-size: 22px !important; }
+    .stButton>button { font-size: 20px; padding: 18px 25px; min-height: 60px; }
+    .stTextInput>div>div>input, .stNumberInput>div>div>input, .stSelectbox>div>div>select { font-size: 18px !important; padding: 12px !important; min-height: 50px !important; }
+}
+</style>
+"""
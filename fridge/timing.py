@@ -0,0 +1,113 @@
+"""画面の区間ごとの処理時間を測る
+
+1回の再実行（rerun）ごとに RunTimer を作り、区間を ``with timer.span("名前"):`` で囲む。
+測定を止めているときは何もしない同じオブジェクトを返すだけなので、ほとんど負荷がない。
+測った時間は TimingLog に集めて区間ごとの p50/p95 を求め、JSONL ファイルにも追記する。
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+# 測定結果を追記するファイル（環境変数で変更できる）
+DEFAULT_LOG_PATH = os.environ.get("FRIDGE_TIMING_LOG", "timings.jsonl")
+
+# 区間ごとに集計に使う直近の件数
+WINDOW = 500
+
+
+class _NullSpan:
+    """測定しないときの何もしない区間"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        # st.stop() などの例外で抜けた場合も記録する
+        self.timer.spans.append((self.name, (time.perf_counter() - self.start) * 1000))
+        return False
+
+
+class RunTimer:
+    """1回の再実行のあいだの区間の時間を記録する"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.spans = []
+        self.started = time.perf_counter()
+
+    def span(self, name):
+        """区間を測る with 文用のオブジェクトを返す（無効なときは何もしない）"""
+        if not self.enabled:
+            return NULL_SPAN
+        return _Span(self, name)
+
+    def finish(self, name="total"):
+        """再実行全体の時間を記録して、区間の一覧を返す"""
+        if self.enabled:
+            self.spans.append((name, (time.perf_counter() - self.started) * 1000))
+        return self.spans
+
+
+class TimingLog:
+    """プロセス全体の測定結果を区間ごとに集計し、JSONL ファイルに追記する"""
+
+    def __init__(self, path=DEFAULT_LOG_PATH, window=WINDOW):
+        self.path = path
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def add_run(self, spans, session=None):
+        """1回の再実行の区間を集計に加え、1区間1行でファイルに追記する"""
+        if not spans:
+            return
+        timestamp = datetime.now().isoformat(timespec="milliseconds")
+        lines = "".join(
+            json.dumps({"ts": timestamp, "session": session, "section": name, "ms": round(ms, 3)},
+                       ensure_ascii=False) + "\n"
+            for name, ms in spans
+        )
+        with self._lock:
+            for name, ms in spans:
+                self._samples.setdefault(name, deque(maxlen=self.window)).append(ms)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(lines)
+
+    def summary(self):
+        """区間ごとの件数・p50・p95・最大（ミリ秒）を返す"""
+        with self._lock:
+            samples = {name: np.array(values) for name, values in self._samples.items()}
+        return [
+            {
+                "section": name,
+                "count": len(values),
+                "p50": float(np.percentile(values, 50)),
+                "p95": float(np.percentile(values, 95)),
+                "max": float(values.max()),
+            }
+            for name, values in samples.items()
+        ]
@@ -0,0 +1,257 @@
+"""食材のエクスポートとインポート（CSV / Parquet / JSON Lines）
+
+エクスポートはデータベースから一定件数ずつ読み、そのまま書き出す。
+Parquet は日付を date32、カテゴリ・世帯・登録者を辞書型（カテゴリ型）の列にする。
+インポートも一定件数ずつ読み、日付の検証（validate_date_columns）と重複の除外を
+まとめて行ってから登録する。10万行のファイルでも、同時に持つのは1チャンク分だけ。
+
+使い方::
+
+    python -m fridge.transfer export backup.parquet               # すべての世帯
+    python -m fridge.transfer export tanaka.csv --household 田中家
+    python -m fridge.transfer import backup.parquet               # ファイルの世帯に登録
+    python -m fridge.transfer import seed.jsonl --household 田中家
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from fridge.inventory import validate_date_columns
+from fridge.storage import CHUNK_SIZE, DEFAULT_DB_PATH, ITEM_FIELDS, Storage
+
+# ファイルの列（household はすべての世帯を書き出すとき、どの世帯の食材かを表す）
+COLUMNS = ("household",) + ITEM_FIELDS
+
+FORMATS = ("csv", "parquet", "jsonl")
+
+# 最初のいくつかだけ、登録しなかった行の理由を返す
+MAX_ERRORS = 20
+
+
+def detect_format(name):
+    """ファイル名の拡張子から形式を決める"""
+    extension = os.path.splitext(name)[1].lower().lstrip(".")
+    extension = {"parq": "parquet", "pq": "parquet", "ndjson": "jsonl", "json": "jsonl"}.get(extension, extension)
+    if extension not in FORMATS:
+        raise ValueError(f"対応していない形式です: {name}（CSV / Parquet / JSON Lines）")
+    return extension
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    category = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("household", category),
+        ("name", pa.string()),
+        ("barcode", pa.string()),
+        ("purchase_date", pa.date32()),
+        ("expiry_date", pa.date32()),
+        ("category", category),
+        ("quantity", pa.int32()),
+        ("registered_at", pa.string()),
+        ("registered_by", category),
+    ])
+
+
+def _chunk_frame(rows):
+    """データベースの行から、型を付けた DataFrame を作る"""
+    df = pd.DataFrame.from_records(rows, columns=COLUMNS)
+    for column in ("purchase_date", "expiry_date"):
+        df[column] = pd.to_datetime(df[column], format="%Y-%m-%d").dt.date
+    for column in ("household", "category", "registered_by"):
+        df[column] = df[column].astype("category")
+    df["quantity"] = df["quantity"].astype(np.int32)
+    return df
+
+
+def export_items(storage, destination, fmt=None, household=None, chunk_size=CHUNK_SIZE):
+    """食材をファイルに書き出し、件数を返す
+
+    destination はパスかバイナリのファイルオブジェクト。household を省略するとすべての世帯。
+    """
+    fmt = fmt or detect_format(destination)
+    owns_file = isinstance(destination, (str, os.PathLike))
+    out = open(destination, "wb") if owns_file else destination
+    count = 0
+    try:
+        chunks = storage.iter_items(household, chunk_size)
+        if fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            schema = _parquet_schema()
+            with pq.ParquetWriter(out, schema) as writer:
+                for rows in chunks:
+                    writer.write_table(pa.Table.from_pandas(_chunk_frame(rows), schema=schema, preserve_index=False))
+                    count += len(rows)
+        else:
+            text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+            if fmt == "csv":
+                writer = csv.writer(text)
+                writer.writerow(COLUMNS)
+                for rows in chunks:
+                    writer.writerows(rows)
+                    count += len(rows)
+            else:
+                for rows in chunks:
+                    text.writelines(
+                        json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + "\n" for row in rows
+                    )
+                    count += len(rows)
+            text.flush()
+            text.detach()  # 呼び出し側のファイルは閉じない
+    finally:
+        if owns_file:
+            out.close()
+    return count
+
+
+def _read_chunks(source, fmt, chunk_size):
+    """ファイルを chunk_size 行ずつの DataFrame で読む（列はすべて文字列か日付）"""
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas(date_as_object=False)
+    elif fmt == "csv":
+        yield from pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=chunk_size)
+    else:
+        yield from pd.read_json(source, lines=True, dtype=False, chunksize=chunk_size)
+
+
+def _prepare_chunk(df, household, registered_by, now):
+    """読み込んだ1チャンクをそろえて、(登録できる行, 不正な行の理由) を返す"""
+    missing = [column for column in ("name", "purchase_date", "expiry_date") if column not in df.columns]
+    if not household and "household" not in df.columns:
+        missing.append("household（または登録先の世帯の指定）")
+    if missing:
+        raise ValueError(f"必要な列がありません: {', '.join(missing)}")
+
+    text = {}
+    for column in ("household", "name", "barcode", "category", "registered_at", "registered_by"):
+        values = df[column] if column in df.columns else pd.Series("", index=df.index)
+        text[column] = values.astype("string").fillna("").str.strip()
+    if household:
+        text["household"] = pd.Series(household, index=df.index)
+    has_household = (text["household"] != "").to_numpy()
+    barcode = text["barcode"].mask(text["barcode"] == "", "未登録")
+    category = text["category"].mask(text["category"] == "", "その他")
+    registered_at = text["registered_at"].mask(text["registered_at"] == "", now)
+    registered_by = text["registered_by"].mask(text["registered_by"] == "", registered_by or "")
+
+    purchase = pd.to_datetime(df["purchase_date"], format="ISO8601", errors="coerce").dt.normalize()
+    expiry = pd.to_datetime(df["expiry_date"], format="ISO8601", errors="coerce").dt.normalize()
+    if "quantity" in df.columns:
+        quantity = pd.to_numeric(df["quantity"], errors="coerce")
+    else:
+        quantity = pd.Series(1, index=df.index)
+
+    has_name = (text["name"] != "").to_numpy()
+    dates_ok = validate_date_columns(purchase, expiry)
+    quantity_ok = (quantity.notna() & (quantity >= 1) & (quantity == quantity.round())).to_numpy()
+    valid = has_household & has_name & dates_ok & quantity_ok
+
+    reasons = np.select(
+        [~has_household, ~has_name, ~dates_ok, ~quantity_ok],
+        ["世帯がありません", "食材名がありません", "日付が読めないか、賞味期限が購入日より前です", "数量が正しくありません"],
+        default="",
+    )
+    errors = [(int(position), str(reason)) for position, reason in zip(np.flatnonzero(~valid), reasons[~valid])]
+
+    prepared = pd.DataFrame({
+        "household": text["household"],
+        "name": text["name"],
+        "barcode": barcode,
+        "purchase_date": purchase.dt.strftime("%Y-%m-%d"),
+        "expiry_date": expiry.dt.strftime("%Y-%m-%d"),
+        "category": category,
+        "quantity": quantity.fillna(0).astype(np.int64),
+        "registered_at": registered_at,
+        "registered_by": registered_by,
+    })[valid]
+    return prepared, errors
+
+
+def _item_key(household, name, barcode, purchase_date, expiry_date):
+    """重複を見分けるキー（バーコードが未登録の食材は食材名で区別する）"""
+    return (household, barcode if barcode != "未登録" else "名前:" + name, purchase_date, expiry_date)
+
+
+def import_items(storage, source, fmt=None, household=None, registered_by=None, chunk_size=CHUNK_SIZE):
+    """ファイルから食材を登録し、{"imported", "duplicates", "invalid", "errors"} を返す
+
+    household を指定するとすべての行をその世帯に登録し、省略するとファイルの household 列を使う
+    （無い世帯は作る）。同じ世帯・バーコード・購入日・賞味期限の食材は、すでに登録済みのものも
+    ファイル内で重複するものも1件だけにする。errors は (行番号, 理由) の最初の数件。
+    """
+    fmt = fmt or detect_format(getattr(source, "name", source))
+    now = datetime.now().strftime('%Y-%m-%d %H:%M')
+    result = {"imported": 0, "duplicates": 0, "invalid": 0, "errors": []}
+    seen = {}  # 世帯 → 登録済みの食材のキー
+    offset = 0
+
+    for df in _read_chunks(source, fmt, chunk_size):
+        prepared, errors = _prepare_chunk(df, household, registered_by, now)
+        result["invalid"] += len(errors)
+        room = MAX_ERRORS - len(result["errors"])
+        result["errors"].extend((offset + position + 1, reason) for position, reason in errors[:room])
+        offset += len(df)
+
+        for name, group in prepared.groupby("household", sort=False):
+            keys = seen.get(name)
+            if keys is None:
+                storage.add_household(name)
+                keys = seen[name] = {
+                    _item_key(*row[:5]) for rows in storage.iter_items(name, chunk_size) for row in rows
+                }
+            # 行は (世帯, *ITEM_FIELDS) のタプルで扱う（列をリストにしてから並べる方が速い）
+            items = []
+            for row in zip(*(group[column].tolist() for column in COLUMNS)):
+                key = _item_key(*row[:5])
+                if key in keys:
+                    result["duplicates"] += 1
+                    continue
+                keys.add(key)
+                items.append(dict(zip(ITEM_FIELDS, row[1:])))
+            if items:
+                storage.add_items(name, items)
+                result["imported"] += len(items)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="食材を CSV / Parquet / JSON Lines でエクスポート・インポートする")
+    parser.add_argument("command", choices=("export", "import"))
+    parser.add_argument("path", help="ファイル（形式は拡張子で判断する）")
+    parser.add_argument("--household", help="対象の世帯（省略するとすべての世帯 / ファイルの household 列）")
+    parser.add_argument("--format", choices=FORMATS, help="ファイルの形式")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="データベースファイル")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="一度に読み書きする件数")
+    args = parser.parse_args(argv)
+
+    storage = Storage(args.db)
+    try:
+        if args.command == "export":
+            count = export_items(storage, args.path, args.format, args.household, args.chunk_size)
+            print(f"{count}件の食材を {args.path} に書き出しました")
+        else:
+            result = import_items(storage, args.path, args.format, args.household, chunk_size=args.chunk_size)
+            print(f"{result['imported']}件を登録しました"
+                  f"（重複 {result['duplicates']}件・不正 {result['invalid']}件を除外）")
+            for line, reason in result["errors"]:
+                print(f"  {line}行目: {reason}")
+    finally:
+        storage.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,22 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-import json
-from PIL import Image
 import io
-import requests
-from urllib.parse import urlencode
+import uuid
+
+from fridge.barcode import BarcodeLookup
+from fridge.bulk import build_bulk_rows, parse_barcodes, read_barcode_csv
+from fridge.ean13 import decode_ean13
+from fridge.images import DECODE_SIZE, THUMBNAIL_SIZE, load_thumbnail
+from fridge.inventory import CATEGORIES, expiry_alerts, validate_dates
+from fridge.recipe_files import RecipeSource
+from fridge.recipes import suggest_recipes
+from fridge.storage import HouseholdExists, InventoryConflict, Storage
+from fridge.styles import CUSTOM_CSS
+from fridge.timing import RunTimer, TimingLog
+from fridge.transfer import FORMATS, export_items, import_items
  
 # ページ設定
 st.set_page_config(
@@ -14,22 +25,50 @@ st.set_page_config(
     layout="wide"
 )
 
-# セッション状態の完全リセット（デバッグ用）
-if 'app_initialized' not in st.session_state:
-    for key in list(st.session_state.keys()):
-        del st.session_state[key]
-    st.session_state.app_initialized = True
- 
+# 世帯・利用者と食材はプロセス全体で共有する SQLite に保存する
+# （同じ世帯の利用者は、別のブラウザからでも同じ冷蔵庫の食材を見る）
+@st.cache_resource
+def get_storage():
+    return Storage()
+
+storage = get_storage()
+
+# 食材の配列と表示用 DataFrame は、食材が変わるか日付が変わったときだけ作り直す
+@st.cache_resource(max_entries=256)
+def get_inventory(_storage, household, version):
+    return _storage.load_inventory(household)
+
+@st.cache_resource(max_entries=256)
+def get_inventory_view(_storage, household, version, today):
+    return get_inventory(_storage, household, version).to_frame(today)
+
 # セッション状態の初期化
-if 'users' not in st.session_state:
-    st.session_state['users'] = {}
 if 'current_user' not in st.session_state:
     st.session_state['current_user'] = None
-if 'items' not in st.session_state:
-    st.session_state['items'] = []
-if 'items_user' not in st.session_state:
-    st.session_state['items_user'] = None
+if 'session_id' not in st.session_state:
+    st.session_state['session_id'] = uuid.uuid4().hex[:8]
+
+# 区間ごとの処理時間（サイドバーの「処理時間を表示する」をオンにしたときだけ測る）
+@st.cache_resource
+def get_timing_log():
+    return TimingLog()
+
+timer = RunTimer(enabled=st.session_state.get('debug_timing', False))
+
+# 画面全体の再実行が最後まで終わったか（終わったあとのタブの実行は、フラグメントだけの再実行）
+full_run_finished = False
  
+# 商品名の検索結果はプロセス全体でキャッシュする
+# （オフライン索引があれば先に引き、API は索引に無いときだけ使う）
+@st.cache_resource
+def get_barcode_lookup():
+    return BarcodeLookup.from_environment()
+
+# レシピは組み込みのものに recipes/ のファイルを足したもの（ファイルを直すと次の操作で反映される）
+@st.cache_resource
+def get_recipe_source():
+    return RecipeSource()
+
 # Open Food Facts APIから商品名を取得
 def get_product_name_from_barcode(barcode):
     """バーコード（JAN）から商品名を取得"""
@@ -37,619 +76,13 @@ def get_product_name_from_barcode(barcode):
         return None
    
     try:
-        url = f"https://world.openfoodfacts.org/api/v0/product/{barcode}.json"
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()
-        data = response.json()
-       
-        if data.get('status') == 1:
-            product = data.get('product', {})
-            product_name = (product.get('product_name_ja') or 
-                          product.get('product_name') or 
-                          product.get('product_name_en'))
-            
-            if product_name:
-                product_name = product_name.split('【')[0].split('(')[0].strip()
-                return product_name
-        
-        return None
-           
+        return get_barcode_lookup().lookup(barcode)
     except Exception as e:
         st.error(f"API エラー: {str(e)}")
         return None
 
-# レシピ生成関数（大幅改善版）
-def generate_recipe_suggestions(selected_items, recipe_type, items_df):
-    """選択された食材からレシピを生成"""
-    recipes = []
-    items_str = "、".join(selected_items)
-    
-    # 食材を小文字に変換して検索しやすくする
-    selected_items_lower = [item.lower() for item in selected_items]
-    
-    # 食材の包含チェック関数
-    def has_ingredients(required_items):
-        """必要な食材がすべて選択されているかチェック"""
-        for req in required_items:
-            req_lower = req.lower()
-            found = False
-            for selected in selected_items_lower:
-                if req_lower in selected or selected in req_lower:
-                    found = True
-                    break
-            if not found:
-                return False
-        return True
-    
-    # 食材リストを生成するヘルパー関数
-    def make_ingredients(items):
-        return [f"{item} 適量" for item in items]
-    
-    # 大幅に拡充したレシピデータベース
-    recipe_db = {
-        # 和食
-        "野菜炒め": {
-            "required": ["野菜"],
-            "optional": ["肉", "豚肉", "鶏肉", "牛肉"],
-            "keywords": ["キャベツ", "ピーマン", "玉ねぎ", "にんじん", "もやし", "ネギ", "ニラ"],
-            "type": ["和食", "簡単レシピ"],
-            "time": "15分",
-            "servings": "2人分",
-            "difficulty": "⭐ 簡単",
-            "ingredients": make_ingredients(selected_items) + ["醤油 大さじ1", "酒 大さじ1", "塩こしょう 少々", "サラダ油 大さじ1"],
-            "steps": [
-                "野菜を食べやすい大きさに切る",
-                "フライパンに油を熱し、火が通りにくいものから炒める",
-                "全体に火が通ったら、醤油・酒・塩こしょうで味付けする",
-                "強火でサッと炒めて完成"
-            ],
-            "tips": "野菜は大きさを揃えて切ると、火の通りが均一になります。"
-        },
-        "具だくさん味噌汁": {
-            "required": ["野菜"],
-            "optional": ["豆腐", "わかめ", "油揚げ"],
-            "keywords": ["キャベツ", "大根", "にんじん", "じゃがいも", "玉ねぎ", "ネギ"],
-            "type": ["和食", "簡単レシピ"],
-            "time": "20分",
-            "servings": "3-4人分",
-            "difficulty": "⭐ 簡単",
-            "ingredients": make_ingredients(selected_items) + ["水 800ml", "だしの素 小さじ2", "味噌 大さじ3"],
-            "steps": [
-                "野菜を一口大に切る",
-                "鍋に水とだしの素を入れて沸騰させる",
-                "火が通りにくい野菜から順に入れて煮る",
-                "全ての野菜が柔らかくなったら、味噌を溶き入れる",
-                "ひと煮立ちしたら完成"
-            ],
-            "tips": "味噌は沸騰させると香りが飛ぶので、火を止める直前に入れましょう。"
-        },
-        "肉じゃが": {
-            "required": ["じゃがいも", "肉"],
-            "optional": ["にんじん", "玉ねぎ"],
-            "keywords": ["牛肉", "豚肉"],
-            "type": ["和食"],
-            "time": "30分",
-            "servings": "3-4人分",
-            "difficulty": "⭐⭐ 普通",
-            "ingredients": make_ingredients(selected_items) + ["醤油 大さじ3", "砂糖 大さじ2", "みりん 大さじ2", "だし汁 400ml"],
-            "steps": [
-                "じゃがいも・にんじん・玉ねぎを一口大に切る",
-                "鍋に油を熱し、肉を炒める",
-                "野菜を加えて軽く炒める",
-                "だし汁と調味料を加えて20分ほど煮込む",
-                "じゃがいもが柔らかくなったら完成"
-            ],
-            "tips": "じゃがいもは煮崩れしにくいメークインがおすすめです。"
-        },
-        "親子丼": {
-            "required": ["鶏肉", "卵"],
-            "optional": ["玉ねぎ", "ネギ"],
-            "keywords": [],
-            "type": ["和食", "簡単レシピ"],
-            "time": "15分",
-            "servings": "2人分",
-            "difficulty": "⭐ 簡単",
-            "ingredients": make_ingredients(selected_items) + ["ご飯 2膳", "醤油 大さじ2", "みりん 大さじ2", "砂糖 大さじ1", "だし汁 100ml"],
-            "steps": [
-                "玉ねぎをスライスし、鶏肉は一口大に切る",
-                "フライパンにだし汁と調味料を入れて煮立てる",
-                "鶏肉と玉ねぎを加えて煮る",
-                "溶き卵を回し入れ、半熟になったらご飯にのせる"
-            ],
-            "tips": "卵は2回に分けて入れると、ふわふわに仕上がります。"
-        },
-        "他人丼": {
-            "required": ["豚肉", "卵"],
-            "optional": ["玉ねぎ", "ネギ"],
-            "keywords": [],
-            "type": ["和食", "簡単レシピ"],
-            "time": "15分",
-            "servings": "2人分",
-            "difficulty": "⭐ 簡単",
-            "ingredients": make_ingredients(selected_items) + ["ご飯 2膳", "醤油 大さじ2", "みりん 大さじ2", "砂糖 大さじ1", "だし汁 100ml"],
-            "steps": [
-                "玉ねぎをスライスし、豚肉は食べやすく切る",
-                "フライパンにだし汁と調味料を入れて煮立てる",
-                "豚肉と玉ねぎを加えて煮る",
-                "溶き卵を回し入れ、半熟になったらご飯にのせる"
-            ],
-            "tips": "豚肉でも親子丼のような味わいが楽しめます。"
-        },
-        "豚の生姜焼き": {
-            "required": ["豚肉"],
-            "optional": ["玉ねぎ", "キャベツ"],
-            "keywords": [],
-            "type": ["和食", "簡単レシピ"],
-            "time": "15分",
-            "servings": "2人分",
-            "difficulty": "⭐ 簡単",
-            "ingredients": make_ingredients(selected_items) + ["醤油 大さじ2", "みりん 大さじ2", "生姜 1片", "サラダ油 大さじ1"],
-            "steps": [
-                "豚肉に塩こしょうをふる",
-                "生姜をすりおろし、調味料と混ぜる",
-                "フライパンで豚肉を焼く",
-                "タレを加えて絡める"
-            ],
-            "tips": "生姜は多めに入れると風味が増します。"
-        },
-        "卵焼き": {
-            "required": ["卵"],
-            "optional": ["ネギ", "チーズ"],
-            "keywords": [],
-            "type": ["和食", "簡単レシピ"],
-            "time": "10分",
-            "servings": "2人分",
-            "difficulty": "⭐⭐ 普通",
-            "ingredients": make_ingredients(selected_items) + ["砂糖 大さじ1", "醤油 小さじ1", "だし汁 大さじ2", "サラダ油 適量"],
-            "steps": [
-                "卵を溶きほぐし、調味料を混ぜる",
-                "卵焼き器に油を薄く引き、卵液を1/3流し込む",
-                "半熟になったら手前に巻く",
-                "同じ作業を繰り返して厚みを出す"
-            ],
-            "tips": "火加減は中火で、焦げないように注意しましょう。"
-        },
-        "豚汁": {
-            "required": ["豚肉", "野菜"],
-            "optional": ["大根", "にんじん", "ごぼう", "こんにゃく", "豆腐"],
-            "keywords": [],
-            "type": ["和食"],
-            "time": "25分",
-            "servings": "4人分",
-            "difficulty": "⭐ 簡単",
-            "ingredients": make_ingredients(selected_items) + ["だし汁 800ml", "味噌 大さじ3", "ごま油 大さじ1"],
-            "steps": [
-                "野菜を一口大に切る",
-                "鍋にごま油を熱し、豚肉を炒める",
-                "野菜とだし汁を加えて煮る",
-                "味噌を溶き入れる"
-            ],
-            "tips": "具だくさんで栄養満点の定番料理です。"
-        },
-        # 中華・アジア
-        "簡単チャーハン": {
-            "required": ["卵"],
-            "optional": ["肉", "ハム", "ソーセージ", "ネギ", "野菜"],
-            "keywords": ["玉ねぎ", "にんじん", "ピーマン"],
-            "type": ["中華", "簡単レシピ"],
-            "time": "10分",
-            "servings": "2人分",
-            "difficulty": "⭐⭐ 普通",
-            "ingredients": ["ご飯 2膳分"] + make_ingredients(selected_items) + ["醤油 大さじ1", "塩こしょう 少々", "ごま油 大さじ1", "中華スープの素 小さじ1"],
-            "steps": [
-                "材料を細かく刻む",
-                "フライパンを強火で熱し、ごま油を入れる",
-                "溶き卵を入れてすぐにご飯を加え、パラパラになるまで炒める",
-                "野菜や肉を加えてさらに炒める",
-                "醤油、中華スープの素、塩こしょうで味付けして完成"
-            ],
-            "tips": "ご飯は冷ご飯を使うとパラパラに仕上がりやすいです。"
-        },
-        "麻婆豆腐": {
-            "required": ["豆腐", "ひき肉"],
-            "optional": ["ネギ"],
-            "keywords": ["肉"],
-            "type": ["中華"],
-            "time": "20分",
-            "servings": "2-3人分",
-            "difficulty": "⭐⭐ 普通",
-            "ingredients": make_ingredients(selected_items) + ["豆板醤 大さじ1", "醤油 大さじ1", "鶏ガラスープ 200ml", "片栗粉 大さじ1", "ごま油 少々", "にんにく 1片"],
-            "steps": [
-                "豆腐を2cm角に切り、下茹でする",
-                "フライパンでにんにくを炒め、肉を炒める",
-                "豆板醤を加えて香りを出す",
-                "スープと調味料を加えて煮立てる",
-                "豆腐を加えて煮込み、水溶き片栗粉でとろみをつける"
-            ],
-            "tips": "豆板醤の量で辛さを調整できます。"
-        },
-        "八宝菜": {
-            "required": ["野菜"],
-            "optional": ["肉", "豚肉", "海鮮"],
-            "keywords": ["キャベツ", "にんじん", "玉ねぎ", "ピーマン"],
-            "type": ["中華"],
-            "time": "20分",
-            "servings": "3-4人分",
-            "difficulty": "⭐⭐ 普通",
-            "ingredients": make_ingredients(selected_items) + ["オイスターソース 大さじ1", "醤油 大さじ1", "鶏ガラスープ 150ml", "片栗粉 大さじ1", "ごま油 大さじ1"],
-            "steps": [
-                "材料を食べやすい大きさに切る",
-                "フライパンで肉を炒め、野菜を加える",
-                "スープと調味料を加えて炒め煮する",
-                "水溶き片栗粉でとろみをつけて完成"
-            ],
-            "tips": "具材はお好みで変更できます。"
-        },
-        "回鍋肉": {
-            "required": ["豚肉", "キャベツ"],
-            "optional": ["ピーマン", "ネギ"],
-            "keywords": [],
-            "type": ["中華"],
-            "time": "15分",
-            "servings": "2人分",
-            "difficulty": "⭐⭐ 普通",
-            "ingredients": make_ingredients(selected_items) + ["甜麺醤 大さじ2", "醤油 大さじ1", "酒 大さじ1", "豆板醤 小さじ1", "ごま油 大さじ1"],
-            "steps": [
-                "豚肉とキャベツを食べやすい大きさに切る",
-                "フライパンで豚肉を炒める",
-                "キャベツと野菜を加えて炒める",
-                "調味料を加えて強火で炒め合わせる"
-            ],
-            "tips": "強火でサッと炒めるのがポイントです。"
-        },
-        "餃子": {
-            "required": ["ひき肉", "キャベツ"],
-            "optional": ["ニラ", "ネギ"],
-            "keywords": [],
-            "type": ["中華"],
-            "time": "30分",
-            "servings": "30個分",
-            "difficulty": "⭐⭐⭐ 普通",
-            "ingredients": make_ingredients(selected_items) + ["餃子の皮 30枚", "にんにく 1片", "生姜 1片", "醤油 大さじ1", "ごま油 大さじ1"],
-            "steps": [
-                "キャベツをみじん切りにして塩もみする",
-                "水気を絞ってひき肉と調味料を混ぜる",
-                "皮で包む",
-                "フライパンで焼く"
-            ],
-            "tips": "皮の縁に水をつけるとしっかり閉じられます。"
-        },
-        # 洋食
-        "オムレツ": {
-            "required": ["卵"],
-            "optional": ["チーズ", "ハム", "野菜"],
-            "keywords": ["玉ねぎ", "ピーマン", "トマト"],
-            "type": ["洋食", "簡単レシピ"],
-            "time": "10分",
-            "servings": "1-2人分",
-            "difficulty": "⭐⭐ 普通",
-            "ingredients": make_ingredients(selected_items) + ["牛乳 大さじ2", "バター 10g", "塩こしょう 少々"],
-            "steps": [
-                "卵を溶きほぐし、牛乳、塩こしょうを混ぜる",
-                "具材は細かく刻んでおく",
-                "フライパンにバターを溶かし、卵液を流し込む",
-                "半熟になったら具材をのせて半分に折る"
-            ],
-            "tips": "火は中火より少し弱めで、ゆっくり焼くとふわふわに仕上がります。"
-        },
-        "トマトパスタ": {
-            "required": ["トマト"],
-            "optional": ["ベーコン", "ツナ", "野菜", "玉ねぎ"],
-            "keywords": [],
-            "type": ["洋食"],
-            "time": "20分",
-            "servings": "2人分",
-            "difficulty": "⭐ 簡単",
-            "ingredients": ["パスタ 200g"] + make_ingredients(selected_items) + ["にんにく 1片", "オリーブオイル 大さじ2", "塩こしょう 少々"],
-            "steps": [
-                "パスタを茹で始める",
-                "にんにくをみじん切りにし、オリーブオイルで炒める",
-                "トマトと具材を加えて煮込む",
-                "茹でたパスタを加えて和え、塩こしょうで味を整える"
-            ],
-            "tips": "パスタの茹で汁を少し加えると、ソースがよく絡みます。"
-        },
-        "カルボナーラ": {
-            "required": ["卵", "ベーコン"],
-            "optional": ["チーズ"],
-            "keywords": ["ハム"],
-            "type": ["洋食"],
-            "time": "20分",
-            "servings": "2人分",
-            "difficulty": "⭐⭐ 普通",
-            "ingredients": ["パスタ 200g"] + make_ingredients(selected_items) + ["生クリーム 100ml", "粉チーズ 大さじ3", "塩こしょう 少々"],
-            "steps": [
-                "パスタを茹でる",
-                "ベーコンを炒める",
-                "ボウルに卵、生クリーム、チーズを混ぜる",
-                "茹でたパスタをベーコンと混ぜ、火を止めて卵液を加える"
-            ],
-            "tips": "卵液は火を止めてから加えないと固まってしまいます。"
-        },
-        "クリームシチュー": {
-            "required": ["野菜"],
-            "optional": ["じゃがいも", "にんじん", "玉ねぎ", "肉", "鶏肉"],
-            "keywords": [],
-            "type": ["洋食"],
-            "time": "30分",
-            "servings": "3-4人分",
-            "difficulty": "⭐⭐ 普通",
-            "ingredients": make_ingredients(selected_items) + ["牛乳 400ml", "シチューのルー 1/2箱", "バター 20g", "水 400ml"],
-            "steps": [
-                "材料を一口大に切る",
-                "鍋にバターを溶かし、肉と野菜を炒める",
-                "水を加えて20分ほど煮込む",
-                "ルーと牛乳を加えてとろみがつくまで煮る"
-            ],
-            "tips": "ルーを入れる前に一度火を止めると、ダマになりにくいです。"
-        },
-        "ハンバーグ": {
-            "required": ["ひき肉", "卵"],
-            "optional": ["玉ねぎ"],
-            "keywords": ["肉"],
-            "type": ["洋食"],
-            "time": "30分",
-            "servings": "3-4個分",
-            "difficulty": "⭐⭐⭐ 普通",
-            "ingredients": make_ingredients(selected_items) + ["パン粉 大さじ3", "牛乳 大さじ2", "塩こしょう 少々", "ソース 適量"],
-            "steps": [
-                "玉ねぎをみじん切りにして炒め、冷ます",
-                "ひき肉に卵、パン粉、牛乳、玉ねぎ、調味料を混ぜる",
-                "よく練って小判型に成形する",
-                "フライパンで両面を焼き、蓋をして中まで火を通す"
-            ],
-            "tips": "タネを冷蔵庫で30分寝かせると、成形しやすくなります。"
-        },
-        "ポークソテー": {
-            "required": ["豚肉"],
-            "optional": ["野菜"],
-            "keywords": [],
-            "type": ["洋食", "簡単レシピ"],
-            "time": "15分",
-            "servings": "2人分",
-            "difficulty": "⭐ 簡単",
-            "ingredients": make_ingredients(selected_items) + ["塩こしょう 少々", "小麦粉 適量", "バター 10g"],
-            "steps": [
-                "豚肉に塩こしょうをして小麦粉をまぶす",
-                "フライパンで両面を焼く",
-                "バターで味付け"
-            ],
-            "tips": "肉の筋を切っておくと縮みにくいです。"
-        },
-        # その他・スープ
-        "野菜スープ": {
-            "required": ["野菜"],
-            "optional": ["キャベツ", "にんじん", "玉ねぎ", "じゃがいも", "トマト"],
-            "keywords": [],
-            "type": ["簡単レシピ"],
-            "time": "20分",
-            "servings": "3-4人分",
-            "difficulty": "⭐ 簡単",
-            "ingredients": make_ingredients(selected_items) + ["水 800ml", "コンソメ 2個", "塩こしょう 少々", "オリーブオイル 大さじ1"],
-            "steps": [
-                "野菜を一口大に切る",
-                "鍋にオリーブオイルを熱し、野菜を軽く炒める",
-                "水とコンソメを加えて15分ほど煮込む",
-                "塩こしょうで味を整えて完成"
-            ],
-            "tips": "余った野菜を何でも入れられる、冷蔵庫整理にぴったりのレシピです。"
-        },
-        "中華スープ": {
-            "required": ["野菜"],
-            "optional": ["卵", "豆腐", "わかめ", "ネギ"],
-            "keywords": [],
-            "type": ["中華", "簡単レシピ"],
-            "time": "15分",
-            "servings": "3-4人分",
-            "difficulty": "⭐ 簡単",
-            "ingredients": make_ingredients(selected_items) + ["水 800ml", "鶏ガラスープの素 大さじ2", "醤油 小さじ1", "ごま油 少々"],
-            "steps": [
-                "野菜を食べやすい大きさに切る",
-                "鍋に水と鶏ガラスープの素を入れて沸騰させる",
-                "野菜を加えて煮る",
-                "醤油とごま油で味を整える"
-            ],
-            "tips": "溶き卵を加えると卵スープになります。"
-        },
-        "ポテトサラダ": {
-            "required": ["じゃがいも"],
-            "optional": ["きゅうり", "にんじん", "ハム", "卵"],
-            "keywords": [],
-            "type": ["簡単レシピ"],
-            "time": "20分",
-            "servings": "3-4人分",
-            "difficulty": "⭐ 簡単",
-            "ingredients": make_ingredients(selected_items) + ["マヨネーズ 大さじ3", "塩こしょう 少々", "酢 小さじ1"],
-            "steps": [
-                "じゃがいもを茹でて潰す",
-                "他の具材を細かく切る",
-                "すべてを混ぜ、マヨネーズと調味料で味付け"
-            ],
-            "tips": "じゃがいもは熱いうちに潰すと滑らかになります。"
-        },
-        "サラダ": {
-            "required": ["野菜"],
-            "optional": ["レタス", "キャベツ", "トマト", "きゅうり", "にんじん", "卵"],
-            "keywords": [],
-            "type": ["簡単レシピ"],
-            "time": "5分",
-            "servings": "2-3人分",
-            "difficulty": "⭐ 簡単",
-            "ingredients": make_ingredients(selected_items) + ["ドレッシング お好みで"],
-            "steps": [
-                "野菜をよく洗う",
-                "食べやすい大きさに切る",
-                "お皿に盛り付け、ドレッシングをかける"
-            ],
-            "tips": "野菜は冷水に浸すとシャキッとします。"
-        },
-        "唐揚げ": {
-            "required": ["鶏肉"],
-            "optional": [],
-            "keywords": [],
-            "type": ["簡単レシピ"],
-            "time": "30分",
-            "servings": "2-3人分",
-            "difficulty": "⭐⭐ 普通",
-            "ingredients": make_ingredients(selected_items) + ["醤油 大さじ2", "酒 大さじ1", "にんにく 1片", "生姜 1片", "片栗粉 適量", "揚げ油 適量"],
-            "steps": [
-                "鶏肉を一口大に切る",
-                "醤油、酒、にんにく、生姜で下味をつけて15分置く",
-                "片栗粉をまぶす",
-                "170度の油で揚げる"
-            ],
-            "tips": "二度揚げするとカリッと仕上がります。"
-        },
-        "焼きそば": {
-            "required": ["野菜"],
-            "optional": ["肉", "キャベツ", "もやし", "豚肉"],
-            "keywords": [],
-            "type": ["簡単レシピ"],
-            "time": "15分",
-            "servings": "2人分",
-            "difficulty": "⭐ 簡単",
-            "ingredients": ["焼きそば麺 2玉"] + make_ingredients(selected_items) + ["焼きそばソース 適量", "サラダ油 大さじ1"],
-            "steps": [
-                "材料を食べやすく切る",
-                "フライパンで肉と野菜を炒める",
-                "麺を加えて炒める",
-                "ソースで味付けして完成"
-            ],
-            "tips": "麺を入れる前に少し水を加えるとほぐれやすいです。"
-        },
-        "お好み焼き": {
-            "required": ["キャベツ", "卵"],
-            "optional": ["豚肉", "エビ", "イカ"],
-            "keywords": [],
-            "type": ["簡単レシピ"],
-            "time": "20分",
-            "servings": "2枚分",
-            "difficulty": "⭐⭐ 普通",
-            "ingredients": make_ingredients(selected_items) + ["お好み焼き粉 100g", "水 100ml", "ソース 適量", "マヨネーズ 適量"],
-            "steps": [
-                "キャベツを千切りにする",
-                "粉と水、卵を混ぜ、キャベツと具材を加える",
-                "フライパンで両面を焼く",
-                "ソースとマヨネーズをかける"
-            ],
-            "tips": "生地は混ぜすぎないのがふんわり仕上げるコツです。"
-        }
-    }
-    
-    # レシピマッチングとスコアリング（改善版）
-    scored_recipes = []
-    for recipe_name, recipe_data in recipe_db.items():
-        # 必須食材チェック
-        required = recipe_data.get("required", [])
-        if not has_ingredients(required):
-            continue  # 必須食材がない場合はスキップ
-        
-        # マッチスコア計算
-        match_score = 0
-        
-        # 選択された食材がレシピに含まれているかチェック
-        all_recipe_keywords = (recipe_data.get("keywords", []) + 
-                              recipe_data.get("required", []) + 
-                              recipe_data.get("optional", []))
-        
-        for item in selected_items_lower:
-            for keyword in all_recipe_keywords:
-                keyword_lower = keyword.lower()
-                if keyword_lower in item or item in keyword_lower:
-                    match_score += 1
-                    break
-        
-        # レシピタイプでのフィルタリング
-        type_match = False
-        if recipe_type == "おまかせ":
-            type_match = True
-        elif recipe_type in recipe_data["type"]:
-            type_match = True
-        
-        if match_score > 0 and type_match:
-            scored_recipes.append({
-                "name": recipe_name,
-                "score": match_score,
-                "data": recipe_data
-            })
-    
-    # スコアでソートして上位を取得
-    scored_recipes.sort(key=lambda x: x["score"], reverse=True)
-    
-    # レシピを構築
-    for scored in scored_recipes[:5]:  # 上位5つまで
-        recipe_data = scored["data"]
-        
-        # 実際に使用する食材を抽出
-        used_items = []
-        all_keywords = (recipe_data.get("keywords", []) + 
-                       recipe_data.get("required", []) + 
-                       recipe_data.get("optional", []))
-        
-        for item in selected_items:
-            item_lower = item.lower()
-            for keyword in all_keywords:
-                keyword_lower = keyword.lower()
-                if keyword_lower in item_lower or item_lower in keyword_lower:
-                    used_items.append(item)
-                    break
-        
-        recipe = {
-            "title": scored["name"],
-            "time": recipe_data["time"],
-            "servings": recipe_data["servings"],
-            "difficulty": recipe_data["difficulty"],
-            "ingredients_used": used_items if used_items else selected_items[:3],
-            "ingredients": recipe_data["ingredients"],
-            "steps": recipe_data["steps"],
-            "tips": recipe_data["tips"],
-            "match_count": scored["score"]
-        }
-        recipes.append(recipe)
-    
-    # デフォルトレシピ（マッチするものがない場合）
-    if not recipes:
-        recipes.append({
-            "title": f"{items_str}の炒め物",
-            "time": "15分",
-            "servings": "2人分",
-            "difficulty": "⭐ 簡単",
-            "ingredients_used": selected_items,
-            "ingredients": make_ingredients(selected_items) + ["醤油 大さじ1", "みりん 大さじ1", "サラダ油 大さじ1"],
-            "steps": [
-                "材料を食べやすい大きさに切る",
-                "フライパンに油を熱し、火が通りにくいものから順に炒める",
-                "醤油とみりんで味付けする",
-                "全体に味が馴染んだら完成"
-            ],
-            "tips": "余った食材を有効活用できる万能レシピです！",
-            "match_count": 0
-        })
-    
-    return recipes[:3]
-
-# 日付の検証
-def validate_dates(purchase_date, expiry_date):
-    """日付の妥当性をチェック"""
-    if expiry_date < purchase_date:
-        return False, "賞味期限は購入日より後の日付を選択してください"
-    return True, ""
- 
 # カスタムCSS
-st.markdown("""
-    <style>
-    .big-font { font-size: 24px !important; font-weight: bold; }
-    .warning-font { font-size: 28px !important; font-weight: bold; color: #ff4444; }
-    .safe-font { font-size: 22px !important; color: #44ff44; }
-    .stButton>button { font-size: 18px; padding: 15px 20px; width: 100%; min-height: 50px; border-radius: 10px; font-weight: bold; }
-    @media (max-width: 768px) {
-        h1 { font-size: 28px !important; }
-        h2 { font-size: 22px !important; }
-        .stButton>button { font-size: 20px; padding: 18px 25px; min-height: 60px; }
-        .stTextInput>div>div>input, .stNumberInput>div>div>input, .stSelectbox>div>div>select { font-size: 18px !important; padding: 12px !important; min-height: 50px !important; }
-    }
-    </style>
-    """, unsafe_allow_html=True)
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
  
 st.title("🍱 冷蔵庫管理アプリ")
 st.markdown("---")
@@ -657,387 +90,572 @@ st.markdown("---")
 # ユーザー選択
 st.markdown("### 👤 利用者を選択")
 
-if len(st.session_state['users']) > 0:
-    user_list = ["新しい利用者を追加"] + list(st.session_state['users'].keys())
-    current_index = 0
-    if st.session_state['current_user'] and st.session_state['current_user'] in user_list:
-        current_index = user_list.index(st.session_state['current_user'])
+with timer.span("user_selection"):
+    registered_users = storage.list_users()
+
+    if len(registered_users) > 0:
+        user_list = ["新しい利用者を追加"] + registered_users
+        current_index = 0
+        if st.session_state['current_user'] and st.session_state['current_user'] in user_list:
+            current_index = user_list.index(st.session_state['current_user'])
     
-    selected_user = st.selectbox("利用者名", user_list, index=current_index, label_visibility="collapsed")
-else:
-    selected_user = "新しい利用者を追加"
-    st.info("👋 最初の利用者を登録してください")
+        selected_user = st.selectbox("利用者名", user_list, index=current_index, label_visibility="collapsed")
+    else:
+        selected_user = "新しい利用者を追加"
+        st.info("👋 最初の利用者を登録してください")
 
-if selected_user == "新しい利用者を追加":
-    new_user_name = st.text_input("利用者の名前", placeholder="例: 田中太郎")
+    if selected_user == "新しい利用者を追加":
+        new_user_name = st.text_input("利用者の名前", placeholder="例: 田中太郎")
     
-    if st.button("➕ 登録", type="primary", use_container_width=True):
-        if new_user_name and new_user_name.strip():
-            if new_user_name not in st.session_state['users']:
-                st.session_state['users'][new_user_name] = []
-                st.session_state['current_user'] = new_user_name
-                st.session_state['items'] = []
-                st.session_state['items_user'] = new_user_name
-                st.success(f"✅ {new_user_name}さんを登録しました！")
-                st.rerun()
-            else:
-                st.error("⚠️ すでに登録されています")
+        # 家族で冷蔵庫を共有するときは、同じ世帯を選ぶ
+        household_list = ["新しい世帯を作る"] + storage.list_households()
+        selected_household = st.selectbox("世帯（冷蔵庫）", household_list)
+        if selected_household == "新しい世帯を作る":
+            new_household = st.text_input("世帯の名前", placeholder="例: 田中家（空欄なら利用者の名前）")
         else:
-            st.error("⚠️ 名前を入力してください")
-else:
-    if st.button("✅ この利用者を選択", type="primary", use_container_width=True):
-        st.session_state['current_user'] = selected_user
-        st.session_state['items'] = list(st.session_state['users'].get(selected_user, []))
-        st.session_state['items_user'] = selected_user
-        st.rerun()
+            new_household = selected_household
+    
+        if st.button("➕ 登録", type="primary", use_container_width=True):
+            if new_user_name and new_user_name.strip():
+                # 既存の世帯に加わるのは、一覧から選んだときだけ
+                join = selected_household != "新しい世帯を作る"
+                try:
+                    added = storage.add_user(new_user_name, new_household.strip() or None, join=join)
+                except (HouseholdExists, ValueError) as e:
+                    st.error(f"⚠️ {e}")
+                else:
+                    if added:
+                        st.session_state['current_user'] = new_user_name
+                        st.success(f"✅ {new_user_name}さんを登録しました！")
+                        st.rerun()
+                    else:
+                        st.error("⚠️ すでに登録されています")
+            else:
+                st.error("⚠️ 名前を入力してください")
+    else:
+        if st.button("✅ この利用者を選択", type="primary", use_container_width=True):
+            st.session_state['current_user'] = selected_user
+            st.rerun()
  
-if st.session_state['current_user']:
-    st.success(f"📱 現在の利用者: **{st.session_state['current_user']}**さん")
-    if st.session_state['items_user'] != st.session_state['current_user']:
-        st.session_state['items'] = list(st.session_state['users'].get(st.session_state['current_user'], []))
-        st.session_state['items_user'] = st.session_state['current_user']
-else:
-    st.warning("⚠️ 利用者を選択してください")
+    household = storage.household_of(st.session_state['current_user']) if st.session_state['current_user'] else None
+    if household:
+        members = "、".join(storage.household_members(household))
+        st.success(f"📱 現在の利用者: **{st.session_state['current_user']}**さん（世帯: {household}／{members}）")
+    else:
+        st.warning("⚠️ 利用者を選択してください")
+
+if not household:
     st.stop()
  
 st.markdown("---")
 
+# 現在の世帯の食材（通知・各タブ・サイドバーで共有する。変更しないこと）
+with timer.span("inventory_load"):
+    inventory_version = storage.inventory_version(household)
+    today = datetime.now().date()
+    inventory_index = get_inventory(storage, household, inventory_version)
+    inventory = get_inventory_view(storage, household, inventory_version, today)
+
 # 通知
-if st.session_state.get('notification_enabled', True):
-    current_items = st.session_state['items']
-    if isinstance(current_items, list) and len(current_items) > 0:
-        df_check = pd.DataFrame(current_items)
-        df_check['expiry_date_dt'] = pd.to_datetime(df_check['expiry_date'])
-        today = pd.Timestamp(datetime.now().date())
-        df_check['days_left'] = (df_check['expiry_date_dt'] - today).dt.days
+with timer.span("notifications"):
+    if st.session_state.get('notification_enabled', True):
+        if len(inventory) > 0:
+            notification_days = st.session_state.get('notification_days', 3)
         
-        notification_days = st.session_state.get('notification_days', 3)
+            expired_count = inventory_index.count_expiring(today, stop=0)
+            if expired_count:
+                st.error(f"🚨 **緊急**: {expired_count}個の食材が期限切れです！")
         
-        expired = df_check[df_check['days_left'] < 0]
-        if not expired.empty:
-            st.error(f"🚨 **緊急**: {len(expired)}個の食材が期限切れです！")
+            today_count = inventory_index.count_expiring(today, start=0, stop=1)
+            if today_count:
+                st.warning(f"⚠️ **今日が期限**: {today_count}個")
         
-        today_expiry = df_check[df_check['days_left'] == 0]
-        if not today_expiry.empty:
-            st.warning(f"⚠️ **今日が期限**: {len(today_expiry)}個")
-        
-        warning_items = df_check[(df_check['days_left'] > 0) & (df_check['days_left'] <= notification_days)]
-        if not warning_items.empty:
-            st.info(f"📢 **注意**: {len(warning_items)}個が{notification_days}日以内に期限切れ")
+            warning_count = inventory_index.count_expiring(today, start=1, stop=notification_days + 1)
+            if warning_count:
+                st.info(f"📢 **注意**: {warning_count}個が{notification_days}日以内に期限切れ")
 
 st.markdown("---")
  
+# 各タブとサイドバーはフラグメントにして、その中の操作ではそこだけを再実行する。
+# 食材を変更したときは st.rerun() で画面全体を作り直す
+@contextmanager
+def fragment_section(name):
+    """フラグメントの中身を囲み、処理時間を測る RunTimer を返す
+
+    フラグメントだけの再実行では、ほかの人が食材を変更したか日付が変わっていれば
+    画面全体を作り直し、そうでなければその回の分を別に記録する。
+    """
+    if not full_run_finished:
+        with timer.span(name):
+            yield timer
+        return
+    
+    if storage.inventory_version(household) != inventory_version or datetime.now().date() != today:
+        st.rerun()
+    fragment_timer = RunTimer(enabled=st.session_state.get('debug_timing', False))
+    with fragment_timer.span(name):
+        yield fragment_timer
+    if fragment_timer.enabled:
+        get_timing_log().add_run(fragment_timer.spans, session=st.session_state['session_id'])
+
 # タブ
 tab1, tab2, tab3, tab4 = st.tabs(["📝 食材を登録", "📋 食材リスト", "⚠️ 警告", "🍳 レシピ提案"])
  
 # タブ1: 食材登録
-with tab1:
-    st.header("新しい食材を登録")
+@st.fragment
+def render_register_tab():
+    with fragment_section("tab_register") as section:
+        st.header("新しい食材を登録")
    
-    uploaded_file = st.file_uploader("写真をアップロード", type=['png', 'jpg', 'jpeg'])
+        uploaded_file = st.file_uploader("写真をアップロード", type=['png', 'jpg', 'jpeg'])
    
-    if uploaded_file:
-        image = Image.open(uploaded_file)
-        st.image(image, caption="アップロードされた写真", use_container_width=True)
+        if uploaded_file:
+            # 同じ写真は1回だけ読み込み、写っているバーコードを読み取ってバーコード欄に入れる
+            upload_id = getattr(uploaded_file, 'file_id', None) or f"{uploaded_file.name}:{uploaded_file.size}"
+            if st.session_state.get('upload', {}).get('id') != upload_id:
+                upload = {'id': upload_id, 'image': None, 'error': None, 'barcode': None}
+                try:
+                    image, upload['original_size'] = load_thumbnail(uploaded_file, size=DECODE_SIZE)
+                except ValueError as e:
+                    upload['error'] = str(e)
+                else:
+                    upload['barcode'] = decode_ean13(image)
+                    image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+                    upload['image'] = image
+                    if upload['barcode']:
+                        st.session_state['barcode_input'] = upload['barcode']
+                st.session_state['upload'] = upload
+        
+            upload = st.session_state['upload']
+            if upload['error']:
+                st.error(f"⚠️ {upload['error']}")
+            else:
+                original_width, original_height = upload['original_size']
+                st.image(upload['image'], caption=f"アップロードされた写真（元のサイズ: {original_width}×{original_height}）", use_container_width=True)
+                if upload['barcode']:
+                    st.success(f"✅ バーコードを読み取りました: {upload['barcode']}")
+                else:
+                    st.info("📷 写真からバーコードを読み取れませんでした。番号を入力してください")
    
-    barcode = st.text_input("バーコード番号（JAN）", placeholder="例: 4901234567890", key="barcode_input")
+        barcode = st.text_input("バーコード番号（JAN）", placeholder="例: 4901234567890", key="barcode_input")
    
-    search_button = st.button("🔍 商品名を検索", type="secondary", use_container_width=True)
+        search_button = st.button("🔍 商品名を検索", type="secondary", use_container_width=True)
    
-    auto_product_name = ""
-    if search_button and barcode:
-        with st.spinner("商品を検索中..."):
-            auto_product_name = get_product_name_from_barcode(barcode)
-            if auto_product_name:
-                st.success(f"✅ 商品が見つかりました: {auto_product_name}")
-            else:
-                st.warning("⚠️ 商品が見つかりませんでした")
+        auto_product_name = ""
+        if search_button and barcode:
+            with st.spinner("商品を検索中..."), section.span("barcode_lookup"):
+                auto_product_name = get_product_name_from_barcode(barcode)
+                if auto_product_name:
+                    st.success(f"✅ 商品が見つかりました: {auto_product_name}")
+                else:
+                    st.warning("⚠️ 商品が見つかりませんでした")
    
-    item_name = st.text_input("食材名", value=auto_product_name if auto_product_name else "", placeholder="例: 牛乳", key="item_name_input")
-    purchase_date = st.date_input("購入日", value=datetime.now())
-    expiry_date = st.date_input("賞味期限", value=datetime.now() + timedelta(days=7))
-    category = st.selectbox("カテゴリ", ["野菜", "果物", "肉類", "魚類", "乳製品", "卵", "調味料", "その他"])
-    quantity = st.number_input("数量", min_value=1, value=1)
+        item_name = st.text_input("食材名", value=auto_product_name if auto_product_name else "", placeholder="例: 牛乳", key="item_name_input")
+        purchase_date = st.date_input("購入日", value=datetime.now())
+        expiry_date = st.date_input("賞味期限", value=datetime.now() + timedelta(days=7))
+        category = st.selectbox("カテゴリ", CATEGORIES)
+        quantity = st.number_input("数量", min_value=1, value=1)
    
-    st.markdown("---")
-    if st.button("✅ 登録する", type="primary", key="register_button", use_container_width=True):
-        if item_name:
-            # 日付の検証
-            is_valid, error_msg = validate_dates(purchase_date, expiry_date)
-            if not is_valid:
-                st.error(f"⚠️ {error_msg}")
+        st.markdown("---")
+        if st.button("✅ 登録する", type="primary", key="register_button", use_container_width=True):
+            if item_name:
+                # 日付の検証
+                is_valid, error_msg = validate_dates(purchase_date, expiry_date)
+                if not is_valid:
+                    st.error(f"⚠️ {error_msg}")
+                else:
+                    new_item = {
+                        'name': item_name,
+                        'barcode': barcode if barcode else "未登録",
+                        'purchase_date': purchase_date.strftime('%Y-%m-%d'),
+                        'expiry_date': expiry_date.strftime('%Y-%m-%d'),
+                        'category': category,
+                        'quantity': quantity,
+                        'registered_at': datetime.now().strftime('%Y-%m-%d %H:%M'),
+                        'registered_by': st.session_state['current_user']
+                    }
+                    storage.add_items(household, [new_item])
+                    st.success(f"✅ {item_name} を登録しました！")
+                    st.balloons()
+                    st.rerun()
             else:
-                new_item = {
-                    'name': item_name,
-                    'barcode': barcode if barcode else "未登録",
-                    'purchase_date': purchase_date.strftime('%Y-%m-%d'),
-                    'expiry_date': expiry_date.strftime('%Y-%m-%d'),
-                    'category': category,
-                    'quantity': quantity,
-                    'registered_at': datetime.now().strftime('%Y-%m-%d %H:%M'),
-                    'registered_by': st.session_state['current_user']
-                }
-                current_items = list(st.session_state['items'])
-                current_items.append(new_item)
-                st.session_state['items'] = current_items
-                st.session_state['users'][st.session_state['current_user']] = list(current_items)
-                st.success(f"✅ {item_name} を登録しました！")
-                st.balloons()
-                st.rerun()
-        else:
-            st.error("⚠️ 食材名を入力してください")
+                st.error("⚠️ 食材名を入力してください")
+    
+        # まとめて登録（買い物のあとに複数の JAN コードを一度に登録する）
+        st.markdown("---")
+        with st.expander("📦 まとめて登録"):
+            bulk_text = st.text_area("バーコード番号（JAN）を貼り付け", placeholder="4901234567890\n4902345678901", key="bulk_barcodes")
+            bulk_csv = st.file_uploader("または CSV をアップロード", type=['csv'], key="bulk_csv")
+            bulk_category = st.selectbox("カテゴリ（まとめて設定）", CATEGORIES, index=len(CATEGORIES) - 1, key="bulk_category")
+            bulk_days = st.number_input("賞味期限（購入日の何日後）", min_value=0, value=7, key="bulk_days")
+        
+            if st.button("🔍 商品名をまとめて検索", use_container_width=True):
+                counts = parse_barcodes(bulk_text)
+                csv_error = None
+                if bulk_csv:
+                    try:
+                        counts.update(read_barcode_csv(bulk_csv))
+                    except ValueError as e:
+                        csv_error = str(e)
+                if csv_error:
+                    st.error(f"⚠️ {csv_error}")
+                elif not counts:
+                    st.error("⚠️ バーコードが見つかりません")
+                else:
+                    with st.spinner(f"{len(counts)}件の商品を検索中..."), section.span("barcode_lookup_many"):
+                        names = get_barcode_lookup().lookup_many(counts)
+                    today = datetime.now().date()
+                    st.session_state['bulk_rows'] = build_bulk_rows(
+                        counts, names, today, today + timedelta(days=bulk_days), bulk_category
+                    )
+        
+            if 'bulk_rows' in st.session_state:
+                bulk_rows = st.data_editor(
+                    st.session_state['bulk_rows'],
+                    num_rows="dynamic",
+                    use_container_width=True,
+                    key="bulk_editor",
+                    column_config={
+                        "barcode": st.column_config.TextColumn("バーコード"),
+                        "name": st.column_config.TextColumn("食材名", required=True),
+                        "category": st.column_config.SelectboxColumn("カテゴリ", options=CATEGORIES, required=True),
+                        "quantity": st.column_config.NumberColumn("数量", min_value=1, step=1, required=True),
+                        "purchase_date": st.column_config.DateColumn("購入日", required=True),
+                        "expiry_date": st.column_config.DateColumn("賞味期限", required=True),
+                    },
+                )
+            
+                missing_names = int((bulk_rows['name'].fillna("").str.strip() == "").sum())
+                if missing_names:
+                    st.warning(f"⚠️ {missing_names}件の商品名が見つかりませんでした。食材名を入力してください")
+            
+                if st.button("✅ まとめて登録する", type="primary", key="bulk_register_button", use_container_width=True):
+                    errors = []
+                    new_items = []
+                    registered_at = datetime.now().strftime('%Y-%m-%d %H:%M')
+                    for row in bulk_rows.itertuples(index=False):
+                        name = row.name.strip() if isinstance(row.name, str) else ""
+                        if not name or pd.isna(row.quantity) or pd.isna(row.purchase_date) or pd.isna(row.expiry_date):
+                            errors.append(f"{row.barcode}: 食材名・数量・日付を入力してください")
+                            continue
+                        is_valid, error_msg = validate_dates(row.purchase_date, row.expiry_date)
+                        if not is_valid:
+                            errors.append(f"{name}: {error_msg}")
+                            continue
+                        new_items.append({
+                            'name': name,
+                            'barcode': row.barcode if isinstance(row.barcode, str) and row.barcode else "未登録",
+                            'purchase_date': row.purchase_date.strftime('%Y-%m-%d'),
+                            'expiry_date': row.expiry_date.strftime('%Y-%m-%d'),
+                            'category': row.category,
+                            'quantity': int(row.quantity),
+                            'registered_at': registered_at,
+                            'registered_by': st.session_state['current_user']
+                        })
+                
+                    if errors:
+                        for error in errors:
+                            st.error(f"⚠️ {error}")
+                    elif new_items:
+                        storage.add_items(household, new_items)
+                        del st.session_state['bulk_rows']
+                        st.success(f"✅ {len(new_items)}件の食材を登録しました！")
+                        st.rerun()
+
+with tab1:
+    render_register_tab()
  
 # タブ2: 食材リスト
-with tab2:
-    st.header("登録されている食材")
+@st.fragment
+def render_list_tab():
+    with fragment_section("tab_list"):
+        st.header("登録されている食材")
     
-    current_items = st.session_state['items']
-    
-    if isinstance(current_items, list) and len(current_items) > 0:
-        df = pd.DataFrame(current_items)
-        
-        if 'registered_by' not in df.columns:
-            df['registered_by'] = '不明'
+        if len(inventory) > 0:
+            df = inventory.iloc[inventory_index.expiry_order]
        
-        df['expiry_date_dt'] = pd.to_datetime(df['expiry_date'])
-        today = pd.Timestamp(datetime.now().date())
-        df['days_left'] = (df['expiry_date_dt'] - today).dt.days
-        df = df.sort_values('days_left').reset_index(drop=True)
-       
-        col_filter1, col_filter2 = st.columns(2)
+            col_filter1, col_filter2 = st.columns(2)
         
-        with col_filter1:
-            selected_category = st.selectbox("カテゴリで絞り込み", ["すべて"] + list(df['category'].unique()))
+            with col_filter1:
+                selected_category = st.selectbox("カテゴリで絞り込み", ["すべて"] + list(df['category'].unique()))
         
-        with col_filter2:
-            unique_users = list(df['registered_by'].unique())
-            selected_user_filter = st.selectbox("登録者で絞り込み", ["すべて"] + unique_users)
+            with col_filter2:
+                unique_users = list(df['registered_by'].unique())
+                selected_user_filter = st.selectbox("登録者で絞り込み", ["すべて"] + unique_users)
        
-        df_display = df.copy()
-        if selected_category != "すべて":
-            df_display = df_display[df_display['category'] == selected_category]
-        if selected_user_filter != "すべて":
-            df_display = df_display[df_display['registered_by'] == selected_user_filter]
+            df_display = df
+            if selected_category != "すべて":
+                df_display = df_display[df_display['category'] == selected_category]
+            if selected_user_filter != "すべて":
+                df_display = df_display[df_display['registered_by'] == selected_user_filter]
         
-        df_display = df_display.reset_index(drop=True)
+            if len(df_display) > 0:
+                st.info(f"📊 表示中: {len(df_display)}個 / 全{len(df)}個")
         
-        if len(df_display) > 0:
-            st.info(f"📊 表示中: {len(df_display)}個 / 全{len(df)}個")
-       
-        for idx in range(len(df_display)):
-            row = df_display.iloc[idx]
-            days_left = row['days_left']
-            registered_by = row.get('registered_by', '不明')
-           
-            if days_left < 0:
-                alert_color = "#ffcccc"
-                alert_text = f"⚠️ 期限切れ（{abs(days_left)}日前）"
-                alert_class = "warning-font"
-            elif days_left == 0:
-                alert_color = "#ffeecc"
-                alert_text = "⚠️ 今日が期限です！"
-                alert_class = "warning-font"
-            elif days_left <= 2:
-                alert_color = "#fff4cc"
-                alert_text = f"⚠️ あと{days_left}日"
-                alert_class = "warning-font"
-            elif days_left <= 5:
-                alert_color = "#ffffcc"
-                alert_text = f"注意: あと{days_left}日"
-                alert_class = "big-font"
-            else:
-                alert_color = "#e8f5e9"
-                alert_text = f"あと{days_left}日"
-                alert_class = "safe-font"
-           
-            with st.container():
-                st.markdown(f"""
-                    <div style="background-color: {alert_color}; padding: 15px; border-radius: 10px; margin: 10px 0;">
-                        <h2 style="margin: 0; font-size: 20px;">{row['name']} ({row['category']})</h2>
-                        <p class="{alert_class}" style="margin: 10px 0;">{alert_text}</p>
-                        <p style="margin: 5px 0;"><strong>数量:</strong> {row['quantity']}</p>
-                        <p style="margin: 5px 0;"><strong>購入日:</strong> {row['purchase_date']}</p>
-                        <p style="margin: 5px 0;"><strong>賞味期限:</strong> {row['expiry_date']}</p>
-                        <p style="margin: 5px 0;"><strong>登録者:</strong> {registered_by}</p>
-                    </div>
-                """, unsafe_allow_html=True)
-               
-                if st.button(f"🗑️ 削除", key=f"del_{idx}_{row['name']}_{row['purchase_date']}", use_container_width=True):
-                    item_to_remove = row.to_dict()
-                    updated_items = [item for item in current_items if not all(item.get(k) == v for k, v in item_to_remove.items())]
-                    st.session_state['items'] = updated_items
-                    st.session_state['users'][st.session_state['current_user']] = list(updated_items)
-                    st.success("削除しました！")
-                    st.rerun()
-    else:
-        st.info("📝 まだ食材が登録されていません")
+            # ページ分けして、1ページを1つの表としてまとめて描画する
+            col_page1, col_page2 = st.columns(2)
+            with col_page1:
+                page_size = st.selectbox("1ページの表示件数", [20, 50, 100], key="list_page_size")
+            page_count = max(1, -(-len(df_display) // page_size))
+            with col_page2:
+                page = st.number_input(f"ページ（全{page_count}ページ）", min_value=1, max_value=page_count, value=1)
+            page_df = df_display.iloc[(page - 1) * page_size:page * page_size]
+        
+            alerts, alert_colors = expiry_alerts(page_df['days_left'])
+            table = page_df[['name', 'category', 'quantity', 'purchase_date', 'expiry_date', 'registered_by']]
+            table.insert(2, 'alert', alerts)
+            colors = alert_colors.to_numpy()
+            styled = table.style.apply(
+                lambda frame: pd.DataFrame(
+                    np.repeat(("background-color: " + colors)[:, None], frame.shape[1], axis=1),
+                    index=frame.index, columns=frame.columns,
+                ),
+                axis=None,
+            )
+            event = st.dataframe(
+                styled,
+                hide_index=True,
+                use_container_width=True,
+                on_select="rerun",
+                selection_mode="multi-row",
+                # 食材や絞り込みが変わったら選択を解除する（行番号がずれないように）
+                key=f"inventory_table_{inventory_version}_{selected_category}_{selected_user_filter}_{page}",
+                column_config={
+                    "name": st.column_config.TextColumn("食材名"),
+                    "category": st.column_config.TextColumn("カテゴリ"),
+                    "alert": st.column_config.TextColumn("賞味期限まで"),
+                    "quantity": st.column_config.NumberColumn("数量"),
+                    "purchase_date": st.column_config.DateColumn("購入日", format="YYYY-MM-DD"),
+                    "expiry_date": st.column_config.DateColumn("賞味期限", format="YYYY-MM-DD"),
+                    "registered_by": st.column_config.TextColumn("登録者"),
+                },
+            )
+        
+            selected_ids = page_df.index[event.selection.rows].tolist()
+            delete_label = f"🗑️ 選択した食材を削除（{len(selected_ids)}件）" if selected_ids else "🗑️ 選択した食材を削除"
+            if st.button(delete_label, disabled=not selected_ids, use_container_width=True):
+                # ほかの人が先に削除していた食材は数えない
+                deleted = storage.delete_items(household, selected_ids)
+                st.success(f"{deleted}件削除しました！")
+                st.rerun()
+        else:
+            st.info("📝 まだ食材が登録されていません")
+
+with tab2:
+    render_list_tab()
  
 # タブ3: 警告
-with tab3:
-    st.header("⚠️ 賞味期限の警告")
-    
-    current_items = st.session_state['items']
+@st.fragment
+def render_alerts_tab():
+    with fragment_section("tab_alerts"):
+        st.header("⚠️ 賞味期限の警告")
    
-    if isinstance(current_items, list) and len(current_items) > 0:
-        df = pd.DataFrame(current_items)
-        
-        if 'registered_by' not in df.columns:
-            df['registered_by'] = '不明'
-            
-        df['expiry_date_dt'] = pd.to_datetime(df['expiry_date'])
-        today = pd.Timestamp(datetime.now().date())
-        df['days_left'] = (df['expiry_date_dt'] - today).dt.days
-       
-        expired = df[df['days_left'] < 0].sort_values('days_left')
-        today_expiry = df[df['days_left'] == 0]
-        warning = df[(df['days_left'] > 0) & (df['days_left'] <= 3)].sort_values('days_left')
+        if len(inventory) > 0:
+            expired = inventory.iloc[inventory_index.expiring(today, stop=0)]
+            today_expiry = inventory.iloc[inventory_index.expiring(today, start=0, stop=1)]
+            warning = inventory.iloc[inventory_index.expiring(today, start=1, stop=4)]
        
-        if not expired.empty:
-            st.error(f"🚨 期限切れの食材が {len(expired)} 個あります！")
-            for _, row in expired.iterrows():
-                st.markdown(f"**{row['name']}** ({row['category']}) - 期限切れ: {abs(row['days_left'])}日前")
+            if not expired.empty:
+                st.error(f"🚨 期限切れの食材が {len(expired)} 個あります！")
+                for _, row in expired.iterrows():
+                    st.markdown(f"**{row['name']}** ({row['category']}) - 期限切れ: {abs(row['days_left'])}日前")
        
-        if not today_expiry.empty:
-            st.warning(f"⚠️ 今日が期限の食材が {len(today_expiry)} 個あります！")
-            for _, row in today_expiry.iterrows():
-                st.markdown(f"**{row['name']}** ({row['category']}) - 今日が賞味期限")
+            if not today_expiry.empty:
+                st.warning(f"⚠️ 今日が期限の食材が {len(today_expiry)} 個あります！")
+                for _, row in today_expiry.iterrows():
+                    st.markdown(f"**{row['name']}** ({row['category']}) - 今日が賞味期限")
        
-        if not warning.empty:
-            st.warning(f"📢 もうすぐ期限が切れる食材が {len(warning)} 個あります")
-            for _, row in warning.iterrows():
-                st.markdown(f"**{row['name']}** ({row['category']}) - あと{row['days_left']}日")
+            if not warning.empty:
+                st.warning(f"📢 もうすぐ期限が切れる食材が {len(warning)} 個あります")
+                for _, row in warning.iterrows():
+                    st.markdown(f"**{row['name']}** ({row['category']}) - あと{row['days_left']}日")
        
-        if expired.empty and today_expiry.empty and warning.empty:
-            st.success("✅ すべての食材の賞味期限に余裕があります！")
-    else:
-        st.info("📝 まだ食材が登録されていません")
+            if expired.empty and today_expiry.empty and warning.empty:
+                st.success("✅ すべての食材の賞味期限に余裕があります！")
+        else:
+            st.info("📝 まだ食材が登録されていません")
+
+with tab3:
+    render_alerts_tab()
  
 # タブ4: レシピ提案
-with tab4:
-    st.header("🍳 レシピ提案")
+@st.fragment
+def render_recipes_tab():
+    with fragment_section("tab_recipes") as section:
+        st.header("🍳 レシピ提案")
     
-    current_items = st.session_state['items']
-    
-    if isinstance(current_items, list) and len(current_items) > 0:
-        df = pd.DataFrame(current_items)
+        if len(inventory) > 0:
+            df = inventory
         
-        if 'registered_by' not in df.columns:
-            df['registered_by'] = '不明'
-            
-        df['expiry_date_dt'] = pd.to_datetime(df['expiry_date'])
-        today = pd.Timestamp(datetime.now().date())
-        df['days_left'] = (df['expiry_date_dt'] - today).dt.days
+            st.subheader("🎯 レシピ設定")
         
-        st.subheader("🎯 レシピ設定")
+            recipe_source = get_recipe_source()
+            catalog = recipe_source.catalog()
+            if recipe_source.error:
+                st.warning(f"⚠️ レシピファイルを読み込めませんでした（前の内容を使います）: {recipe_source.error}")
         
-        col_recipe1, col_recipe2 = st.columns(2)
+            col_recipe1, col_recipe2 = st.columns(2)
         
-        with col_recipe1:
-            recipe_priority = st.selectbox("優先する食材", ["緊急の食材を優先", "すべての食材から選択"])
+            with col_recipe1:
+                recipe_priority = st.selectbox("優先する食材", ["緊急の食材を優先", "すべての食材から選択"])
         
-        with col_recipe2:
-            recipe_type = st.selectbox("料理のタイプ", ["おまかせ", "和食", "洋食", "中華", "簡単レシピ"])
+            with col_recipe2:
+                recipe_types = ["おまかせ", "和食", "洋食", "中華", "簡単レシピ"]
+                recipe_types += sorted({t for data in catalog.recipes.values() for t in data["type"]} - set(recipe_types))
+                recipe_type = st.selectbox("料理のタイプ", recipe_types)
         
-        st.markdown("### 🥗 使いたい食材を選択")
+            st.markdown("### 🥗 使いたい食材を選択")
         
-        if recipe_priority == "緊急の食材を優先":
-            urgent_items = df[df['days_left'] <= 5].sort_values('days_left')
-            if len(urgent_items) > 0:
-                selected_items = st.multiselect("レシピに使う食材", options=urgent_items['name'].tolist(), default=urgent_items['name'].tolist()[:5])
+            if recipe_priority == "緊急の食材を優先":
+                urgent_items = inventory.iloc[inventory_index.expiring(today, stop=6)]
+                if len(urgent_items) > 0:
+                    selected_items = st.multiselect("レシピに使う食材", options=urgent_items['name'].tolist(), default=urgent_items['name'].tolist()[:5])
+                else:
+                    selected_items = st.multiselect("レシピに使う食材", options=df['name'].tolist())
             else:
                 selected_items = st.multiselect("レシピに使う食材", options=df['name'].tolist())
-        else:
-            selected_items = st.multiselect("レシピに使う食材", options=df['name'].tolist())
         
-        if st.button("🍳 レシピを提案してもらう", type="primary", use_container_width=True):
-            if not selected_items:
-                st.error("⚠️ 食材を選択してください")
-            else:
-                with st.spinner("🤖 AIがレシピを考えています..."):
-                    import time
-                    time.sleep(1)
-                    
-                    recipes = generate_recipe_suggestions(selected_items, recipe_type, df)
+            if st.button("🍳 レシピを提案してもらう", type="primary", use_container_width=True):
+                if not selected_items:
+                    st.error("⚠️ 食材を選択してください")
+                else:
+                    with st.spinner("🤖 AIがレシピを考えています..."), section.span("recipe_suggestions"):
+                        recipes = suggest_recipes(selected_items, recipe_type, catalog)
                     
-                    st.success("✅ レシピを提案しました！")
+                        st.success("✅ レシピを提案しました！")
                     
-                    for idx, recipe in enumerate(recipes):
-                        with st.expander(f"📖 {recipe['title']}", expanded=(idx==0)):
-                            st.markdown(f"**🍳 料理名:** {recipe['title']}")
-                            st.markdown(f"**⏱️ 調理時間:** {recipe['time']}")
-                            st.markdown(f"**👥 分量:** {recipe['servings']}")
-                            st.markdown(f"**📊 難易度:** {recipe['difficulty']}")
+                        for idx, recipe in enumerate(recipes):
+                            with st.expander(f"📖 {recipe['title']}", expanded=(idx==0)):
+                                st.markdown(f"**🍳 料理名:** {recipe['title']}")
+                                st.markdown(f"**⏱️ 調理時間:** {recipe['time']}")
+                                st.markdown(f"**👥 分量:** {recipe['servings']}")
+                                st.markdown(f"**📊 難易度:** {recipe['difficulty']}")
                             
-                            st.markdown("**📝 材料:**")
-                            for ingredient in recipe['ingredients']:
-                                st.markdown(f"• {ingredient}")
+                                st.markdown("**📝 材料:**")
+                                for ingredient in recipe['ingredients']:
+                                    st.markdown(f"• {ingredient}")
                             
-                            st.markdown("**👨‍🍳 作り方:**")
-                            for step_num, step in enumerate(recipe['steps'], 1):
-                                st.markdown(f"{step_num}. {step}")
+                                st.markdown("**👨‍🍳 作り方:**")
+                                for step_num, step in enumerate(recipe['steps'], 1):
+                                    st.markdown(f"{step_num}. {step}")
                             
-                            st.markdown(f"💡 **ポイント:** {recipe['tips']}")
-    else:
-        st.info("📝 食材を登録すると、レシピを提案できます！")
+                                st.markdown(f"💡 **ポイント:** {recipe['tips']}")
+        else:
+            st.info("📝 食材を登録すると、レシピを提案できます！")
+
+with tab4:
+    render_recipes_tab()
  
 # サイドバー
-with st.sidebar:
-    st.header("⚙️ 設定")
+@st.fragment
+def render_sidebar():
+    with fragment_section("sidebar"):
+        st.header("⚙️ 設定")
     
-    st.divider()
+        st.divider()
     
-    st.subheader("🔔 通知設定")
+        st.subheader("🔔 通知設定")
     
-    if 'notification_enabled' not in st.session_state:
-        st.session_state['notification_enabled'] = True
+        if 'notification_enabled' not in st.session_state:
+            st.session_state['notification_enabled'] = True
     
-    notification_enabled = st.checkbox("通知を有効にする", value=st.session_state['notification_enabled'])
-    st.session_state['notification_enabled'] = notification_enabled
+        notification_enabled = st.checkbox("通知を有効にする", value=st.session_state['notification_enabled'])
     
-    if 'notification_days' not in st.session_state:
-        st.session_state['notification_days'] = 3
+        if 'notification_days' not in st.session_state:
+            st.session_state['notification_days'] = 3
     
-    notification_days = st.slider("何日前に通知するか", min_value=1, max_value=7, value=st.session_state['notification_days'])
-    st.session_state['notification_days'] = notification_days
+        notification_days = st.slider("何日前に通知するか", min_value=1, max_value=7, value=st.session_state['notification_days'])
+        
+        # 通知は画面の上部に出すため、設定が変わったら画面全体を作り直す
+        if (notification_enabled, notification_days) != (st.session_state['notification_enabled'], st.session_state['notification_days']):
+            st.session_state['notification_enabled'] = notification_enabled
+            st.session_state['notification_days'] = notification_days
+            st.rerun()
    
-    st.divider()
+        st.divider()
    
-    st.header("📊 統計情報")
+        st.header("📊 統計情報")
    
-    if st.session_state['current_user']:
-        st.info(f"👤 {st.session_state['current_user']}さん")
-    
-    current_items = st.session_state['items']
+        if st.session_state['current_user']:
+            st.info(f"👤 {st.session_state['current_user']}さん（{household}）")
    
-    if isinstance(current_items, list) and len(current_items) > 0:
-        total = len(current_items)
-        df = pd.DataFrame(current_items)
-        
-        if 'registered_by' not in df.columns:
-            df['registered_by'] = '不明'
-            
-        df['expiry_date_dt'] = pd.to_datetime(df['expiry_date'])
-        today = pd.Timestamp(datetime.now().date())
-        df['days_left'] = (df['expiry_date_dt'] - today).dt.days
+        if len(inventory) > 0:
+            total = len(inventory)
+            expired_count = inventory_index.count_expiring(today, stop=0)
+            warning_count = inventory_index.count_expiring(today, start=0, stop=4)
+            safe_count = inventory_index.count_expiring(today, start=4)
        
-        expired_count = len(df[df['days_left'] < 0])
-        warning_count = len(df[(df['days_left'] >= 0) & (df['days_left'] <= 3)])
-        safe_count = len(df[df['days_left'] > 3])
-       
-        st.metric("登録食材数", f"{total}個")
-        st.metric("期限切れ", f"{expired_count}個")
-        st.metric("要注意(3日以内)", f"{warning_count}個")
-        st.metric("安全", f"{safe_count}個")
-    else:
-        st.info("データがありません")
+            st.metric("登録食材数", f"{total}個")
+            st.metric("期限切れ", f"{expired_count}個")
+            st.metric("要注意(3日以内)", f"{warning_count}個")
+            st.metric("安全", f"{safe_count}個")
+        else:
+            st.info("データがありません")
+   
+        st.divider()
+   
+        st.subheader("🗑️ データ管理")
    
-    st.divider()
+        if st.session_state['current_user']:
+            # バックアップ（この世帯の食材をファイルに書き出す）
+            export_format = st.selectbox("エクスポートの形式", FORMATS, key="export_format")
+            if st.button("📤 エクスポートを作成", use_container_width=True):
+                buffer = io.BytesIO()
+                count = export_items(storage, buffer, export_format, household=household)
+                st.session_state['export_file'] = (f"{household}.{export_format}", buffer.getvalue(), count)
+            if 'export_file' in st.session_state:
+                file_name, data, count = st.session_state['export_file']
+                st.download_button(f"⬇️ {file_name}（{count}件）", data, file_name=file_name, use_container_width=True)
+            
+            # ファイルから登録（同じバーコード・日付の食材は1件だけにする）
+            import_file = st.file_uploader("インポート（CSV / Parquet / JSON Lines）", type=['csv', 'parquet', 'jsonl'], key="import_file")
+            if import_file and st.button("📥 インポート", use_container_width=True):
+                try:
+                    result = import_items(storage, import_file, household=household, registered_by=st.session_state['current_user'])
+                except ValueError as e:
+                    st.error(f"⚠️ {e}")
+                else:
+                    st.session_state['import_result'] = result
+                    st.rerun()
+            if 'import_result' in st.session_state:
+                result = st.session_state.pop('import_result')
+                st.success(f"✅ {result['imported']}件を登録しました（重複 {result['duplicates']}件・不正 {result['invalid']}件を除外）")
+                for line, reason in result['errors']:
+                    st.caption(f"{line}行目: {reason}")
+            
+            if st.button("この世帯の食材を全削除", use_container_width=True):
+                # 表示している内容のあとに家族が登録した食材まで消さないよう、バージョンを確かめる
+                try:
+                    storage.delete_all_items(household, expected_version=inventory_version)
+                except InventoryConflict:
+                    st.warning("⚠️ ほかの人が食材を更新していました。内容を確認して、もう一度押してください")
+                else:
+                    st.success("全ての食材を削除しました")
+                    st.rerun()
    
-    st.subheader("🗑️ データ管理")
+        st.divider()
    
-    if st.session_state['current_user']:
-        if st.button("このユーザーの食材を全削除", use_container_width=True):
-            st.session_state['items'] = []
-            st.session_state['users'][st.session_state['current_user']] = []
-            st.success("全ての食材を削除しました")
-            st.rerun()
\ No newline at end of file
+        st.subheader("⏱️ デバッグ")
+        # 測定の開始・停止は画面全体の再実行から反映する
+        if st.checkbox("処理時間を表示する", key="debug_timing") != timer.enabled:
+            st.rerun()
+
+with st.sidebar:
+    render_sidebar()
+ 
+# 処理時間の表示（この回の区間と、これまでの p50/p95）
+spans = timer.finish()
+full_run_finished = True
+if timer.enabled:
+    timing_log = get_timing_log()
+    timing_log.add_run(spans, session=st.session_state['session_id'])
+    with st.sidebar:
+        st.caption(f"測定結果は {timing_log.path} に追記しています")
+        st.dataframe(
+            pd.DataFrame(spans, columns=["区間", "ms"]).round(1),
+            hide_index=True, use_container_width=True,
+        )
+        st.dataframe(
+            pd.DataFrame(timing_log.summary()).round(1),
+            hide_index=True, use_container_width=True,
+        )
\ No newline at end of file
@@ -0,0 +1,31 @@
+import pytest
+
+from fridge.api import MAX_QUANTITY, ApiError, _parse_item
+
+NOW = "2026-10-17 12:00"
+
+
+def _item(**fields):
+    return {"name": "牛乳", "expiry_date": "2026-10-20", **fields}
+
+
+def test_parse_item_defaults():
+    item = _parse_item(_item(), NOW)
+    assert (item["barcode"], item["quantity"], item["category"]) == ("未登録", 1, "その他")
+    assert _parse_item(_item(barcode="4902220770199", quantity=MAX_QUANTITY), NOW)["barcode"] == "4902220770199"
+
+
+@pytest.mark.parametrize("fields", [
+    {"quantity": 2 ** 70},
+    {"quantity": MAX_QUANTITY + 1},
+    {"quantity": 0},
+    {"quantity": True},
+    {"barcode": {"a": 1}},
+    {"barcode": 4902220770199},
+    {"barcode": "49022"},
+    {"barcode": "abcdefghij"},
+])
+def test_parse_item_rejects(fields):
+    with pytest.raises(ApiError) as excinfo:
+        _parse_item(_item(**fields), NOW)
+    assert excinfo.value.status_code == 400
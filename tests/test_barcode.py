@@ -0,0 +1,42 @@
+from fridge.barcode import MISS, BarcodeLookup
+
+
+class FakeSession:
+    """送られたリクエストを記録するだけのセッション"""
+
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, timeout=None):
+        self.urls.append(url)
+        raise AssertionError(f"API に問い合わせた: {url}")
+
+
+class FakeIndex:
+    def __init__(self, names):
+        self.names = names
+
+    def lookup(self, barcode):
+        return self.names.get(barcode)
+
+
+def _offline_lookup(tmp_path, offline_index=None):
+    lookup = BarcodeLookup(cache_path=str(tmp_path / "cache.db"), offline_index=offline_index, online=False)
+    lookup._session = FakeSession()
+    return lookup
+
+
+def test_offline_without_index_does_not_call_api(tmp_path):
+    lookup = _offline_lookup(tmp_path)
+    assert lookup.lookup("4901234567894") is None
+    assert lookup._session.urls == []
+    # 見つからない結果もキャッシュする
+    assert lookup.memory_cached("4901234567894") is None
+
+
+def test_offline_with_index_does_not_call_api(tmp_path):
+    lookup = _offline_lookup(tmp_path, FakeIndex({"4901234567894": "牛乳"}))
+    assert lookup.lookup("4901234567894") == "牛乳"
+    assert lookup.lookup("4900000000000") is None
+    assert lookup._session.urls == []
+    assert lookup.memory_cached("4911111111111") is MISS
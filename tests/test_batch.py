@@ -0,0 +1,32 @@
+import random
+
+import pytest
+
+from fridge import batch
+from fridge.batch import batch_rank_recipes
+from fridge.recipes import CATALOG, generate_recipe_suggestions
+
+WORDS = sorted(
+    {word for data in CATALOG.recipes.values() for word in data["keywords"] + data["required"] + data["optional"]}
+) + ["牛乳", "明治おいしい牛乳", "合びき肉", "豚バラ肉", "Tomato", "トマト缶", "りんご", "新玉ねぎ"]
+
+
+@pytest.mark.parametrize("recipe_type", ["おまかせ", "和食", "洋食", "中華", "簡単レシピ", "なし"])
+def test_same_ranking_as_generate_recipe_suggestions(recipe_type):
+    rng = random.Random(recipe_type)
+    inventories = [[rng.choice(WORDS) for _ in range(rng.randint(0, 7))] for _ in range(500)]
+    ranked = batch_rank_recipes(inventories, recipe_type)
+    for items, got in zip(inventories, ranked):
+        expected = [
+            (recipe["title"], recipe["match_count"])
+            for recipe in generate_recipe_suggestions(items, recipe_type, None)
+            if recipe["match_count"] > 0
+        ]
+        assert got == expected, items
+
+
+def test_keeps_only_latest_catalog_version(monkeypatch):
+    # レシピファイルを読み直す前のバージョンの行列は、新しいバージョンを使った時点で捨てる
+    monkeypatch.setattr(batch, "_INCIDENCE", {"古いバージョン": object()})
+    batch_rank_recipes([["卵"]])
+    assert list(batch._INCIDENCE) == [CATALOG.version]
@@ -0,0 +1,20 @@
+import io
+
+import pytest
+
+from fridge.bulk import read_barcode_csv
+
+
+@pytest.mark.parametrize("data", [b"", b"barcode\n", b"\n\n"])
+def test_empty_csv_has_no_barcodes(data):
+    assert read_barcode_csv(io.BytesIO(data)) == {}
+
+
+def test_csv_quantities_are_added():
+    data = "バーコード,quantity\n４９０１２３４５６７８９４,2\n4901234567894,\nabc,3\n".encode("utf-8")
+    assert read_barcode_csv(io.BytesIO(data)) == {"4901234567894": 3}
+
+
+def test_unreadable_csv_raises_value_error():
+    with pytest.raises(ValueError):
+        read_barcode_csv(io.BytesIO(b"\xff\xfe\x00\x81"))
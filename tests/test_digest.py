@@ -0,0 +1,68 @@
+import json
+import os
+from datetime import date, timedelta
+
+from fridge.digest import MAX_FILENAME_BYTES, digest_filename, run_once
+from fridge.storage import Storage
+
+TODAY = date(2026, 10, 17)
+
+
+def _item(name, days_left):
+    return {
+        "name": name, "barcode": "未登録", "purchase_date": "2026-10-01",
+        "expiry_date": (TODAY + timedelta(days=days_left)).isoformat(), "category": "その他",
+        "quantity": 1, "registered_at": "2026-10-01 12:00", "registered_by": "",
+    }
+
+
+def test_digest_filenames_do_not_collide():
+    names = ["a/b", "a_b", "a%2Fb", "a:b", "田中"]
+    filenames = [digest_filename(name) for name in names]
+    assert len(set(filenames)) == len(names)
+    assert digest_filename("田中") == "田中.json"
+
+
+def test_long_names_are_shortened_without_collisions(tmp_path):
+    names = ["冷" * 90, "冷" * 91, "冷" * 89 + "/", "%" * 100]
+    filenames = [digest_filename(name) for name in names]
+    assert len(set(filenames)) == len(names)
+    for filename in filenames:
+        assert len(filename.encode("utf-8")) <= MAX_FILENAME_BYTES + len(".json")
+
+    storage = Storage(str(tmp_path / "fridge.db"))
+    storage.add_user("冷" * 90, "h1")
+    storage.add_user("花子", "h1", join=True)
+    storage.add_items("h1", [_item("牛乳", 0)])
+    outbox = str(tmp_path / "outbox")
+    assert run_once(storage, outbox, days=3, today=TODAY)["users"] == 2
+    assert sorted(os.listdir(os.path.join(outbox, TODAY.isoformat()))) == sorted(
+        [digest_filename("冷" * 90), digest_filename("花子")]
+    )
+    storage.close()
+
+
+def test_run_once_writes_each_user_and_removes_stale_digests(tmp_path):
+    storage = Storage(str(tmp_path / "fridge.db"))
+    storage.add_user("a/b", "h1")
+    storage.add_user("a_b", "h2")
+    storage.add_items("h1", [_item("牛乳", 0)])
+    storage.add_items("h2", [_item("卵", -1), _item("豆腐", 10)])
+    outbox = str(tmp_path / "outbox")
+
+    result = run_once(storage, outbox, days=3, today=TODAY)
+    directory = os.path.join(outbox, TODAY.isoformat())
+    assert result["users"] == 2
+    assert len(os.listdir(directory)) == 2
+    with open(os.path.join(directory, digest_filename("a/b")), encoding="utf-8") as f:
+        digest = json.load(f)
+    assert (digest["user"], digest["household"]) == ("a/b", "h1")
+    assert [item["name"] for item in digest["today"]] == ["牛乳"]
+    with open(os.path.join(directory, digest_filename("a_b")), encoding="utf-8") as f:
+        assert [item["name"] for item in json.load(f)["expired"]] == ["卵"]
+
+    # 知らせる食材が無くなった利用者の、同じ日の古いお知らせは消える
+    storage.delete_all_items("h1")
+    run_once(storage, outbox, days=3, today=TODAY)
+    assert os.listdir(directory) == [digest_filename("a_b")]
+    storage.close()
@@ -0,0 +1,25 @@
+import io
+
+import pytest
+from PIL import Image
+
+from fridge.images import load_thumbnail
+
+
+def _jpeg(size=(800, 600)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (10, 200, 30)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def test_load_thumbnail_shrinks_image():
+    image, original_size = load_thumbnail(io.BytesIO(_jpeg((3000, 2000))), size=1000)
+    assert original_size == (3000, 2000)
+    assert max(image.size) <= 1000 and image.mode == "RGB"
+
+
+def test_truncated_jpeg_raises_value_error():
+    data = _jpeg()
+    # ヘッダーは読めるが、画素のデコード中に途切れる
+    with pytest.raises(ValueError):
+        load_thumbnail(io.BytesIO(data[:len(data) // 3]))
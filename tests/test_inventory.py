@@ -0,0 +1,30 @@
+from datetime import date
+
+import numpy as np
+
+from fridge.inventory import InventoryArrays
+
+ROWS = [
+    (1, "牛乳", "4902220770199", 20697, 20701, "乳製品", 1, "2026-09-01 12:00", "太郎"),
+    (2, "にんじん", "未登録", 20698, 20699, "野菜", 3, "2026-09-02 12:00", "花子"),
+]
+
+
+def test_to_frame_shares_arrays():
+    inventory = InventoryArrays.from_rows(ROWS)
+    df = inventory.to_frame(date(2026, 9, 5))
+    assert np.shares_memory(df["id"].to_numpy(), inventory.ids)
+    assert np.shares_memory(df["quantity"].to_numpy(), inventory.quantities)
+    assert np.shares_memory(df["purchase_date"].to_numpy(), inventory.purchase_dates)
+    assert np.shares_memory(df["expiry_date"].to_numpy(), inventory.expiry_dates)
+    assert np.shares_memory(df["category"].array.codes, inventory.category_codes)
+    assert np.shares_memory(df["registered_by"].array.codes, inventory.user_codes)
+
+
+def test_to_frame_values():
+    df = InventoryArrays.from_rows(ROWS).to_frame(date(2026, 9, 5))
+    assert df.loc[1, "expiry_date"].date() == date(2026, 9, 5)
+    assert df.loc[2, "purchase_date"].date() == date(2026, 9, 2)
+    assert df["days_left"].tolist() == [0, -2]
+    assert df["category"].tolist() == ["乳製品", "野菜"]
+    assert df["registered_by"].tolist() == ["太郎", "花子"]
@@ -0,0 +1,36 @@
+import pytest
+
+from fridge.matcher import NgramIndex
+from fridge.recipes import CATALOG
+
+
+@pytest.mark.parametrize("item, keyword", [
+    ("かいわれ", "いか"),
+    ("なつみかん", "つな"),
+    ("ぎんねこ", "ねぎ"),
+    ("えのきびん", "えび"),
+    ("焼き肉のたれ", "ひき肉"),
+])
+def test_no_match_from_scattered_characters(item, keyword):
+    assert keyword not in CATALOG.match_item(item)
+
+
+@pytest.mark.parametrize("item, keyword", [
+    ("タマネギ", "たまねぎ"),
+    ("玉葱", "たまねぎ"),
+    ("ﾀﾏﾈｷﾞ", "たまねぎ"),
+    ("じゃかいも", "じゃがいも"),
+    ("あらびきソーセジ", "そーせーじ"),
+    ("キャベッ", "きゃべつ"),
+])
+def test_spelling_variants_match(item, keyword):
+    assert keyword in CATALOG.match_item(item)
+
+
+def test_fuzzy_needs_a_shared_bigram():
+    index = NgramIndex(["あいう"])
+    assert index.similar("あいうえ") == {"あいう"}
+    # 文字はすべて含み割合も足りるが、隣り合う2文字が1つも共通しない
+    assert NgramIndex(["あいう"], threshold=0.5).similar("うxあxい") == set()
+    # 短いキーワードは近似一致の対象にしない
+    assert NgramIndex(["いか"]).similar("かいわれ") == set()
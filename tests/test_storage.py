@@ -0,0 +1,77 @@
+import sqlite3
+
+import pytest
+
+from fridge.storage import HouseholdExists, Storage
+
+# 世帯が無かったころ（食材を利用者ごとに持っていた）のスキーマ
+PER_USER_SCHEMA = """
+CREATE TABLE users (
+    name TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT NOT NULL REFERENCES users(name) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    barcode TEXT NOT NULL,
+    purchase_date TEXT NOT NULL,
+    expiry_date TEXT NOT NULL,
+    category TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    registered_at TEXT NOT NULL,
+    registered_by TEXT NOT NULL
+);
+CREATE INDEX idx_items_user_expiry ON items (user, expiry_date);
+CREATE INDEX idx_items_barcode ON items (barcode);
+INSERT INTO users (name, created_at, version) VALUES ('太郎', '2026-01-01 12:00', 3);
+INSERT INTO items (user, name, barcode, purchase_date, expiry_date, category, quantity, registered_at, registered_by)
+    VALUES ('太郎', '牛乳', '4902220770199', '2026-01-01', '2026-01-08', '乳製品', 1, '2026-01-01 12:00', '太郎');
+"""
+
+
+def test_migrate_per_user_keeps_indexes(tmp_path):
+    path = str(tmp_path / "fridge.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(PER_USER_SCHEMA)
+    conn.close()
+
+    storage = Storage(path)
+    assert storage.household_of("太郎") == "太郎"
+    assert storage.inventory_version("太郎") == 3
+    assert [item["name"] for item in storage.load_items("太郎")] == ["牛乳"]
+    storage.close()
+
+    conn = sqlite3.connect(path)
+    indexes = {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'items' AND sql IS NOT NULL"
+        )
+    }
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    assert indexes == {"idx_items_household_expiry", "idx_items_barcode"}
+    assert not {"users_old", "items_old"} & tables
+
+
+def test_add_user_does_not_join_existing_household_by_name(tmp_path):
+    storage = Storage(str(tmp_path / "fridge.db"))
+    assert storage.add_user("太郎", "田中家")
+    # 同じ名前の世帯を新しく作ろうとしても、ほかの家族の世帯には入らない
+    with pytest.raises(HouseholdExists):
+        storage.add_user("花子", "田中家")
+    storage.add_household("次郎")
+    with pytest.raises(HouseholdExists):
+        storage.add_user("次郎")
+    assert storage.household_of("花子") is None
+    assert storage.household_of("次郎") is None
+
+    # 一覧から選んだときだけ加わる
+    assert storage.add_user("花子", "田中家", join=True)
+    assert storage.household_members("田中家") == ["太郎", "花子"]
+    with pytest.raises(ValueError):
+        storage.add_user("三郎", "鈴木家", join=True)
+    assert not storage.add_user("太郎", "山田家")
+    assert not storage.has_household("山田家")
+    storage.close()